@@ -1,10 +1,13 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.admin.views.main import ChangeList
 from django.utils.html import format_html
+
+from pages.admin_tools import BigTableAdmin
 from .models import (
     Account, JournalEntry, Transaction, StudentReceipt, ExpenseEntry,
     Course, Student, StudentEnrollment, EmployeeAdvance, CostCenter,
-    AccountingPeriod, Budget, StudentAccountLink
+    AccountingPeriod, Budget, StudentAccountLink, AccountBalanceSnapshot,
+    LedgerEvent, LedgerProjection
 )
 
 
@@ -15,24 +18,48 @@ class AccountAdmin(admin.ModelAdmin):
     search_fields = ['code', 'name', 'name_ar']
     ordering = ['code']
     readonly_fields = ['balance', 'created_at', 'updated_at']
+    autocomplete_fields = ['parent']
 
 
 class TransactionInline(admin.TabularInline):
     model = Transaction
     extra = 0
     readonly_fields = ['debit_amount', 'credit_amount']
+    autocomplete_fields = ['account', 'cost_center']
 
 
 @admin.register(JournalEntry)
-class JournalEntryAdmin(admin.ModelAdmin):
+class JournalEntryAdmin(BigTableAdmin):
     list_display = ['reference', 'date', 'description', 'total_amount', 'is_posted', 'created_by']
-    list_filter = ['is_posted', 'entry_type', 'date']
+    list_select_related = ['created_by']
+    list_filter = ['is_posted', 'entry_type']
+    date_hierarchy = 'date'
     search_fields = ['reference', 'description']
-    readonly_fields = ['created_at', 'updated_at', 'posted_at', 'posted_by']
+    readonly_fields = ['created_at', 'updated_at', 'posted_at', 'posted_by', 'reversal_of']
+    autocomplete_fields = ['created_by']
     inlines = [TransactionInline]
+    actions = ['reverse_entries']
     # Force a safe default ordering on valid fields only
     ordering = ('-date', '-created_at', 'reference', 'id')
 
+    @admin.action(description='عكس القيود المحددة / Reverse selected entries', permissions=['add'])
+    def reverse_entries(self, request, queryset):
+        from .services import reverse_entries
+
+        try:
+            reversals, skipped = reverse_entries(queryset, request.user)
+        except ValueError as e:
+            self.message_user(request, f'خطأ في عكس القيود / Reversal error: {e}', messages.ERROR)
+            return
+        self.message_user(request, f'تم عكس {len(reversals)} قيد / Reversed {len(reversals)} entries', messages.SUCCESS)
+        if skipped:
+            self.message_user(
+                request,
+                f'تم تخطي {len(skipped)} قيد / Skipped {len(skipped)} entries: '
+                + ', '.join(f'{entry.reference} ({reason})' for entry, reason in skipped[:20]),
+                messages.WARNING,
+            )
+
     def get_ordering(self, request):
         # Ignore any invalid external ordering parameters
         return ('-date', '-created_at', 'reference', 'id')
@@ -48,25 +75,37 @@ class JournalEntryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Transaction)
-class TransactionAdmin(admin.ModelAdmin):
+class TransactionAdmin(BigTableAdmin):
     list_display = ['journal_entry', 'account', 'amount', 'is_debit', 'description']
-    list_filter = ['is_debit', 'journal_entry__date']
-    search_fields = ['account__name', 'description']
+    list_select_related = ['journal_entry', 'account']
+    # Choices and fixed date ranges only: a dropdown of every account, or a
+    # date hierarchy that scans the join for its years, does not scale
+    list_filter = ['is_debit', 'account__account_type', 'journal_entry__entry_type', 'journal_entry__date']
+    # Exact matches use the unique indexes instead of scanning the joins
+    search_fields = ['=journal_entry__reference', '=account__code', 'description']
+    autocomplete_fields = ['journal_entry', 'account', 'cost_center']
 
 
 @admin.register(StudentReceipt)
-class StudentReceiptAdmin(admin.ModelAdmin):
+class StudentReceiptAdmin(BigTableAdmin):
     list_display = ['receipt_number', 'date', 'student_name', 'course_name', 'paid_amount', 'created_by']
-    list_filter = ['date', 'payment_method']
+    list_select_related = ['created_by']
+    list_filter = ['payment_method', 'is_printed']
+    date_hierarchy = 'date'
     search_fields = ['receipt_number', 'student_name', 'course_name']
     readonly_fields = ['receipt_number', 'net_amount', 'created_at']
+    autocomplete_fields = ['student', 'student_profile', 'course', 'enrollment', 'journal_entry', 'created_by']
 
 
 @admin.register(ExpenseEntry)
-class ExpenseEntryAdmin(admin.ModelAdmin):
+class ExpenseEntryAdmin(BigTableAdmin):
     list_display = ['id', 'date', 'description', 'category', 'amount', 'created_by']
-    list_filter = ['date', 'category', 'payment_method']
+    list_select_related = ['created_by']
+    list_filter = ['category', 'payment_method']
+    date_hierarchy = 'date'
     search_fields = ['description', 'vendor']
+    autocomplete_fields = ['journal_entry', 'created_by']
+    raw_id_fields = ['employee', 'teacher']
 
 
 @admin.register(Course)
@@ -88,9 +127,11 @@ class StudentAdmin(admin.ModelAdmin):
 @admin.register(StudentEnrollment)
 class StudentEnrollmentAdmin(admin.ModelAdmin):
     list_display = ['student', 'course', 'enrollment_date', 'total_amount', 'net_amount', 'amount_paid', 'balance_due', 'is_completed']
+    list_select_related = ['student', 'course']
     list_filter = ['enrollment_date', 'is_completed', 'payment_method']
     search_fields = ['student__name', 'course__name']
     readonly_fields = ['created_at', 'net_amount', 'amount_paid', 'balance_due']
+    autocomplete_fields = ['student', 'course', 'enrollment_journal_entry', 'completion_journal_entry']
     
     def net_amount(self, obj):
         return obj.net_amount
@@ -108,9 +149,12 @@ class StudentEnrollmentAdmin(admin.ModelAdmin):
 @admin.register(EmployeeAdvance)
 class EmployeeAdvanceAdmin(admin.ModelAdmin):
     list_display = ['employee_name', 'date', 'amount', 'purpose', 'is_repaid', 'created_by']
+    list_select_related = ['created_by']
     list_filter = ['date', 'is_repaid']
     search_fields = ['employee_name', 'purpose']
     readonly_fields = ['outstanding_amount', 'created_at']
+    autocomplete_fields = ['journal_entry', 'created_by']
+    raw_id_fields = ['employee']
     
     def outstanding_amount(self, obj):
         return obj.outstanding_amount
@@ -129,7 +173,8 @@ class AccountingPeriodAdmin(admin.ModelAdmin):
     list_display = ['name', 'start_date', 'end_date', 'is_closed', 'is_current']
     list_filter = ['is_closed']
     search_fields = ['name']
-    readonly_fields = ['closed_at', 'closed_by']
+    # Closing posts the closing entry and the snapshots: only through AccountingPeriod.close()
+    readonly_fields = ['is_closed', 'closed_at', 'closed_by']
     
     def is_current(self, obj):
         return obj.is_current
@@ -137,16 +182,49 @@ class AccountingPeriodAdmin(admin.ModelAdmin):
     is_current.short_description = 'Current Period'
 
 
+@admin.register(AccountBalanceSnapshot)
+class AccountBalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['period', 'account', 'debit_total', 'credit_total', 'balance']
+    list_select_related = ['period', 'account']
+    list_filter = ['period']
+    search_fields = ['account__code', 'account__name']
+    readonly_fields = ['period', 'account', 'debit_total', 'credit_total', 'balance', 'created_at']
+
+
 @admin.register(Budget)
 class BudgetAdmin(admin.ModelAdmin):
     list_display = ['account', 'period', 'budgeted_amount', 'actual_amount', 'variance']
+    list_select_related = ['account', 'period']
     list_filter = ['period']
     search_fields = ['account__name', 'period__name']
     readonly_fields = ['variance']
+    autocomplete_fields = ['account']
 
 
 @admin.register(StudentAccountLink)
 class StudentAccountLinkAdmin(admin.ModelAdmin):
     list_display = ['student', 'account', 'created_at']
+    list_select_related = ['student', 'account']
     search_fields = ['student__full_name', 'account__name']
     readonly_fields = ['created_at']
+    autocomplete_fields = ['student', 'account']
+
+
+@admin.register(LedgerEvent)
+class LedgerEventAdmin(BigTableAdmin):
+    list_display = ['id', 'name', 'created_at', 'payload']
+    list_filter = ['name']
+    date_hierarchy = 'created_at'
+    readonly_fields = ['name', 'payload', 'created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LedgerProjection)
+class LedgerProjectionAdmin(admin.ModelAdmin):
+    list_display = ['name', 'position', 'failures', 'updated_at']
+    readonly_fields = ['name', 'position', 'failures', 'error', 'updated_at']
@@ -0,0 +1,141 @@
+"""Read-only REST API for tablets and spreadsheets that sync our data.
+
+Every list is cursor-paginated in modification order, so a client can pull
+a large table page by page and resume from the last ``next`` link, and
+later fetch only what changed with ``?updated_since=<timestamp>``.
+``?fields=a,b`` limits the output to the listed fields (sparse fieldsets);
+nested journal lines are only loaded when they are asked for.
+"""
+from datetime import datetime, time
+
+from django.db.models import Prefetch
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+
+from attendance.models import Attendance
+from students.models import Student as StudentProfile
+from .models import Account, JournalEntry, StudentReceipt, Transaction
+from .serializers import (
+    AccountSerializer, AttendanceSerializer, JournalEntrySerializer,
+    StudentReceiptSerializer, StudentSerializer,
+)
+
+
+class SyncCursorPagination(CursorPagination):
+    """Cursor over ``(updated_at, id)``; the view may name another timestamp"""
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = ('updated_at', 'id')
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, 'cursor_ordering', self.ordering)
+
+
+class SyncViewSet(viewsets.ReadOnlyModelViewSet):
+    """Base for the sync endpoints: ``updated_since`` and ``fields`` handling"""
+    pagination_class = SyncCursorPagination
+    updated_field = 'updated_at'
+
+    def requested_fields(self):
+        fields = self.request.query_params.get('fields')
+        if not fields:
+            return None
+        return [name.strip() for name in fields.split(',') if name.strip()]
+
+    def wants(self, field):
+        fields = self.requested_fields()
+        return fields is None or field in fields
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def updated_since(self):
+        value = self.request.query_params.get('updated_since')
+        if not value:
+            return None
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValidationError({'updated_since': 'صيغة التاريخ غير صحيحة / Invalid date or datetime'})
+            moment = datetime.combine(day, time.min)
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        since = self.updated_since()
+        if since is not None:
+            queryset = queryset.filter(**{f'{self.updated_field}__gte': since})
+        return queryset
+
+
+class AccountViewSet(SyncViewSet):
+    """Chart of accounts with each account's stored balance"""
+    serializer_class = AccountSerializer
+
+    def get_queryset(self):
+        queryset = Account.objects.all()
+        account_type = self.request.query_params.get('account_type')
+        if account_type:
+            queryset = queryset.filter(account_type=account_type)
+        return queryset
+
+
+class JournalEntryViewSet(SyncViewSet):
+    """Journal entries with their lines"""
+    serializer_class = JournalEntrySerializer
+
+    def get_queryset(self):
+        queryset = JournalEntry.objects.all()
+        if self.request.query_params.get('posted') in ('1', 'true'):
+            queryset = queryset.filter(is_posted=True)
+        if self.wants('lines'):
+            queryset = queryset.prefetch_related(
+                Prefetch('transactions', queryset=Transaction.objects.select_related('account').order_by('id'))
+            )
+        return queryset
+
+
+class StudentReceiptViewSet(SyncViewSet):
+    serializer_class = StudentReceiptSerializer
+
+    def get_queryset(self):
+        return StudentReceipt.objects.all()
+
+
+class StudentViewSet(SyncViewSet):
+    """Students with their receivable balance.
+
+    A payment changes the balance without touching the student row, so
+    ``changed_at`` (the later of the student's and the account's
+    ``updated_at``) drives both the cursor and ``updated_since``.
+    """
+    serializer_class = StudentSerializer
+    updated_field = 'changed_at'
+    cursor_ordering = ('changed_at', 'id')
+
+    def get_queryset(self):
+        return StudentProfile.objects.select_related('account').annotate(
+            changed_at=Greatest('updated_at', Coalesce('account__updated_at', 'updated_at')),
+        )
+
+
+class AttendanceViewSet(SyncViewSet):
+    serializer_class = AttendanceSerializer
+
+    def get_queryset(self):
+        queryset = Attendance.objects.select_related('student')
+        classroom = self.request.query_params.get('classroom')
+        if classroom:
+            if not classroom.isdigit():
+                raise ValidationError({'classroom': 'رقم الشعبة غير صحيح / Invalid classroom id'})
+            queryset = queryset.filter(classroom_id=classroom)
+        return queryset
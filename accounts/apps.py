@@ -0,0 +1,18 @@
+from django.apps import AppConfig
+
+
+class AccountsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'accounts'
+
+    def ready(self):
+        from django.core.signals import request_started
+        from django.utils.module_loading import autodiscover_modules
+        from . import signals
+
+        # Ledger event projections (see accounts/events.py)
+        autodiscover_modules('projections')
+
+        # Querying in ready() itself is too early (tables may not exist yet,
+        # tests have not switched databases), so warm on the first request.
+        request_started.connect(signals.warm_resolver, dispatch_uid='accounts.warm_resolver')
@@ -0,0 +1,155 @@
+"""Archiving the journal of closed accounting periods.
+
+``archive_period`` moves the posted entries dated inside a closed period,
+with their transactions, into ``ArchivedJournalEntry`` /
+``ArchivedTransaction`` in chunks.  Every chunk also adds its net movement
+per account to one ``CARRY_FORWARD`` entry dated on the period's last day,
+so hot-table balances (``Account.rebuild_all_balances``, ledgers, the
+snapshots in ``accounts.reports``) are the same after every chunk.
+
+Receipts, expenses, etc. that pointed at an archived entry lose the
+foreign key but keep its id in ``archived_<field>_id``, so they are not
+posted again; the archived entry lists them in ``documents``.  Entries
+linked by ``reversal_of`` to an entry outside the period stay hot.
+Historical reports read the archive through the ``LedgerLine`` view.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from pages.archive import CHUNK_SIZE, purge
+from .models import AccountingPeriod, ArchivedJournalEntry, ArchivedTransaction, JournalEntry, Transaction
+
+CARRY_FORWARD = 'CARRY_FORWARD'
+
+
+def archivable_periods():
+    return AccountingPeriod.objects.filter(is_closed=True, archived_at__isnull=True).order_by('end_date')
+
+
+def archivable_entries(period):
+    span = (period.start_date, period.end_date)
+    in_period = JournalEntry.objects.filter(is_posted=True, date__range=span).exclude(entry_type=CARRY_FORWARD)
+    outside = ~Q(is_posted=True, date__range=span) | Q(entry_type=CARRY_FORWARD)
+    return in_period.exclude(
+        reversal_of__in=JournalEntry.objects.filter(outside),
+    ).exclude(
+        reversals__in=JournalEntry.objects.filter(outside),
+    )
+
+
+def _with_reversal_partners(ids, entries):
+    """``ids`` plus the archivable entries linked to them by ``reversal_of``"""
+    ids = set(ids)
+    while True:
+        partners = set(entries.filter(
+            Q(reversal_of_id__in=ids) | Q(reversals__in=ids)
+        ).exclude(pk__in=ids).values_list('pk', flat=True))
+        if not partners:
+            return ids
+        ids |= partners
+
+
+def _document_relations():
+    """Nullable foreign keys of other models pointing at ``JournalEntry``"""
+    return [
+        rel for rel in JournalEntry._meta.related_objects
+        if rel.one_to_many and rel.on_delete is models.SET_NULL
+    ]
+
+
+def _carry_forward_entry(period, user):
+    entry, _ = JournalEntry.objects.get_or_create(
+        reference=f"CF-{period.pk:06d}",
+        defaults={
+            'date': period.end_date,
+            'description': f"رصيد مرحّل من الأرشيف / Carried forward from archive: {period.name}",
+            'entry_type': CARRY_FORWARD,
+            'total_amount': Decimal('0'),
+            'is_posted': True,
+            'posted_at': timezone.now(),
+            'posted_by': user,
+            'created_by': user,
+        },
+    )
+    return entry
+
+
+def _add_to_carry_forward(entry, period, nets):
+    """Add ``{account_id: debit - credit}`` to the lines of the carry-forward entry"""
+    totals = defaultdict(Decimal)
+    for account_id, amount, is_debit in entry.transactions.values_list('account_id', 'amount', 'is_debit'):
+        totals[account_id] += amount if is_debit else -amount
+    for account_id, net in nets.items():
+        totals[account_id] += net
+
+    purge(entry.transactions.all())
+    lines = [Transaction(
+        journal_entry=entry,
+        account_id=account_id,
+        amount=abs(net),
+        is_debit=net > 0,
+        description=f"Carried forward - {period.name}",
+    ) for account_id, net in sorted(totals.items()) if net]
+    Transaction.objects.bulk_create(lines)
+    entry.total_amount = sum((line.amount for line in lines if line.is_debit), Decimal('0'))
+    entry.save(update_fields=['total_amount', 'updated_at'])
+
+
+def _archive_chunk(period, ids, carry_forward):
+    entry_fields = [
+        'id', 'reference', 'date', 'description', 'entry_type', 'total_amount', 'is_posted',
+        'posted_at', 'posted_by_id', 'created_by_id', 'reversal_of_id', 'created_at', 'updated_at',
+    ]
+    line_fields = ['id', 'journal_entry_id', 'account_id', 'amount', 'is_debit', 'description',
+                   'cost_center_id', 'created_at']
+
+    documents = defaultdict(dict)
+    for rel in _document_relations():
+        label = rel.related_model._meta.label_lower
+        links = rel.related_model._base_manager.filter(**{f'{rel.field.attname}__in': ids})
+        for pk, entry_id in links.values_list('pk', rel.field.attname):
+            documents[entry_id].setdefault(label, []).append(pk)
+        links.update(**{f'archived_{rel.field.attname}': F(rel.field.attname), rel.field.name: None})
+
+    ArchivedJournalEntry.objects.bulk_create([
+        ArchivedJournalEntry(period=period, documents=documents.get(row['id'], {}), **row)
+        for row in JournalEntry.objects.filter(pk__in=ids).values(*entry_fields)
+    ])
+    lines = list(Transaction.objects.filter(journal_entry_id__in=ids).values(*line_fields))
+    ArchivedTransaction.objects.bulk_create([ArchivedTransaction(**row) for row in lines], batch_size=1000)
+
+    nets = defaultdict(Decimal)
+    for line in lines:
+        nets[line['account_id']] += line['amount'] if line['is_debit'] else -line['amount']
+    _add_to_carry_forward(carry_forward, period, nets)
+
+    # Reversal pairs go in the same chunk; foreign keys are checked at commit
+    purge(Transaction.objects.filter(journal_entry_id__in=ids))
+    purge(JournalEntry.objects.filter(pk__in=ids))
+    return len(lines)
+
+
+def archive_period(period, user, chunk_size=CHUNK_SIZE):
+    """Archive the journal of closed ``period``; returns ``(entries, transactions)`` moved"""
+    if not period.is_closed:
+        raise ValueError("Only closed periods can be archived")
+    entries = archivable_entries(period)
+    moved_entries = moved_lines = 0
+    carry_forward = None
+    while True:
+        with transaction.atomic():
+            ids = list(entries.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+            ids = list(_with_reversal_partners(ids, entries))
+            if carry_forward is None:
+                carry_forward = _carry_forward_entry(period, user)
+            moved_lines += _archive_chunk(period, ids, carry_forward)
+        moved_entries += len(ids)
+
+    AccountingPeriod.objects.filter(pk=period.pk).update(archived_at=timezone.now())
+    return moved_entries, moved_lines
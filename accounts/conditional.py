@@ -0,0 +1,66 @@
+"""Conditional GET (ETag / Last-Modified) for reports and student statements.
+
+The ETag combines a fingerprint of the underlying data (see
+``accounts.reports``) with everything else that changes the rendered page:
+the query string, the user, the CSRF cookie and today's date.  When the
+browser's copy is still current the view answers 304 before running any
+aggregation or rendering a template.
+"""
+import hashlib
+from datetime import datetime, time
+
+from django.conf import settings
+from django.contrib import messages
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from .reports import ledger_version, student_statement_version
+
+
+def _conditional(version_func):
+    """``condition`` decorator for a ``version_func(request, *args, **kwargs)``"""
+
+    def state(request, *args, **kwargs):
+        cached = getattr(request, '_conditional_state', None)
+        if cached is not None:
+            return cached
+        version = None
+        # Pending flash messages have to be rendered, never answer 304 then
+        if not len(messages.get_messages(request)):
+            version = version_func(request, *args, **kwargs)
+        if version is None:
+            cached = (None, None)
+        else:
+            token, modified = version
+            today = timezone.localdate()
+            key = '|'.join(str(part) for part in (
+                token, request.get_full_path(), request.user.pk,
+                request.COOKIES.get(settings.CSRF_COOKIE_NAME), today,
+            ))
+            # Pages without ?as_of= show today's date, so they expire at midnight too
+            midnight = timezone.make_aware(datetime.combine(today, time.min))
+            cached = (hashlib.sha1(key.encode('utf-8')).hexdigest(), max(modified or midnight, midnight))
+        request._conditional_state = cached
+        return cached
+
+    return condition(
+        etag_func=lambda request, *args, **kwargs: state(request, *args, **kwargs)[0],
+        last_modified_func=lambda request, *args, **kwargs: state(request, *args, **kwargs)[1],
+    )
+
+
+def _ledger(request, *args, **kwargs):
+    return ledger_version()
+
+
+def _statement(request, student_id, **kwargs):
+    from students.models import Student
+
+    student = Student.objects.filter(pk=student_id).only('updated_at', 'account_id').first()
+    if student is None:
+        return None
+    return student_statement_version(student)
+
+
+report_condition = _conditional(_ledger)
+statement_condition = _conditional(_statement)
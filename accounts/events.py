@@ -0,0 +1,191 @@
+"""Ledger domain events: a transactional outbox and its projections.
+
+Posting, reversing, receipts and period closing write ``LedgerEvent`` rows
+in the same transaction as the ledger change, so an event exists exactly
+when its change was committed.  Derived views (budget actuals, caches,
+student balances...) register a projection handler that receives the
+events in batches, in id order::
+
+    @projection('accounts.budget_actuals', events=[LedgerEvent.ENTRY_POSTED])
+    def budget_actuals(events):
+        ...
+
+``dispatch`` delivers what each projection has not seen yet and moves its
+``LedgerProjection`` cursor in the transaction that ran the handler.  A
+handler that fails, or a dispatcher that dies, gets the same batch again:
+delivery is at least once, so handlers must be idempotent.  SQLite commits
+one writer at a time, so event ids become visible in order and the cursor
+never skips a late commit.  Run the dispatcher and replays with::
+
+    manage.py dispatch_ledger_events
+    manage.py replay_ledger_events accounts.budget_actuals --since 2025-01-01
+"""
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from pages.archive import purge
+from .models import LedgerEvent, LedgerProjection
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+_projections = {}
+
+
+# ------------------------------------------------------------------
+# Writing events (always inside the transaction of the change)
+# ------------------------------------------------------------------
+def emit(events):
+    """Write ``(name, payload)`` pairs to the outbox; no signals, one INSERT"""
+    LedgerEvent.objects.bulk_create([LedgerEvent(name=name, payload=payload) for name, payload in events])
+
+
+def entry_posted(entries, lines):
+    """``EntryPosted`` for each posted entry; ``lines`` holds the lines of each entry"""
+    emit(entry_posted_events(entries, lines))
+
+
+def entry_posted_events(entries, lines):
+    """The pairs ``entry_posted`` writes, for callers emitting them with their own"""
+    return [(LedgerEvent.ENTRY_POSTED, {
+        'entry': entry.pk,
+        'reference': entry.reference,
+        'date': str(entry.date),
+        'entry_type': entry.entry_type,
+        'amount': str(entry.total_amount),
+        'accounts': sorted({line.account_id for line in entry_lines}),
+    }) for entry, entry_lines in zip(entries, lines)]
+
+
+def entry_reversed(pairs):
+    """``EntryReversed`` for each ``(original, reversing_entry)`` pair"""
+    emit((LedgerEvent.ENTRY_REVERSED, {
+        'entry': original.pk,
+        'reversal': reversal.pk,
+        'date': str(reversal.date),
+    }) for original, reversal in pairs)
+
+
+def receipts_created(receipts):
+    emit(receipt_created_events(receipts))
+
+
+def receipt_created_events(receipts):
+    """The pairs ``receipts_created`` writes"""
+    return [(LedgerEvent.RECEIPT_CREATED, {
+        'receipt': receipt.pk,
+        'receipt_number': receipt.receipt_number,
+        'student': receipt.student_profile_id,
+        'course': receipt.course_id,
+        'enrollment': receipt.enrollment_id,
+        'entry': receipt.journal_entry_id,
+        'date': str(receipt.date),
+        'amount': str(receipt.paid_amount),
+    }) for receipt in receipts]
+
+
+def period_closed(period, closing_entry=None):
+    emit([(LedgerEvent.PERIOD_CLOSED, {
+        'period': period.pk,
+        'end_date': str(period.end_date),
+        'entry': closing_entry.pk if closing_entry else None,
+    })])
+
+
+# ------------------------------------------------------------------
+# Projections
+# ------------------------------------------------------------------
+def projection(name, events=None):
+    """Register ``func(events)`` as projection ``name``; ``events`` limits the event names it gets"""
+    def decorator(func):
+        _projections[name] = (func, set(events) if events else None)
+        return func
+    return decorator
+
+
+def projection_names():
+    return sorted(_projections)
+
+
+def _deliver(name, batch_size):
+    """Deliver pending events to projection ``name``; returns how many"""
+    func, wanted = _projections[name]
+    cursor, _ = LedgerProjection.objects.get_or_create(name=name)
+    delivered = 0
+    while True:
+        batch = list(LedgerEvent.objects.filter(pk__gt=cursor.position).order_by('pk')[:batch_size])
+        if not batch:
+            return delivered
+        events = [event for event in batch if wanted is None or event.name in wanted]
+        try:
+            with transaction.atomic():
+                if events:
+                    func(events)
+                moved = LedgerProjection.objects.filter(pk=cursor.pk, position=cursor.position).update(
+                    position=batch[-1].pk, failures=0, error='', updated_at=timezone.now(),
+                )
+        except Exception:
+            logger.exception("Projection %s failed after event %s", name, cursor.position)
+            LedgerProjection.objects.filter(pk=cursor.pk).update(
+                failures=F('failures') + 1, error=traceback.format_exc(), updated_at=timezone.now(),
+            )
+            return delivered
+        if not moved:
+            # Another dispatcher or a replay moved the cursor: start from there
+            cursor.refresh_from_db()
+            continue
+        cursor.position = batch[-1].pk
+        delivered += len(events)
+
+
+def dispatch(names=None, batch_size=BATCH_SIZE):
+    """Deliver pending events to every projection (or ``names``); returns ``{name: delivered}``"""
+    unknown = set(names or ()) - set(_projections)
+    if unknown:
+        raise ValueError(f"Unknown projection: {', '.join(sorted(unknown))}")
+    return {name: _deliver(name, batch_size) for name in (names or projection_names())}
+
+
+def replay(name, from_event=None, since=None, batch_size=BATCH_SIZE):
+    """Deliver projection ``name`` the events from id ``from_event`` (or dated from ``since``) again"""
+    if name not in _projections:
+        raise ValueError(f"Unknown projection: {name}")
+    if since is not None:
+        from_event = LedgerEvent.objects.filter(created_at__gte=since).aggregate(first=Min('pk'))['first']
+        if from_event is None:
+            return 0
+    position = max(0, (from_event or 1) - 1)
+    LedgerProjection.objects.update_or_create(name=name, defaults={'position': position, 'failures': 0, 'error': ''})
+    return _deliver(name, batch_size)
+
+
+def prune(keep_days):
+    """Delete events older than ``keep_days`` that every projection has seen; returns how many"""
+    if not _projections:
+        return 0
+    positions = dict(LedgerProjection.objects.filter(name__in=list(_projections)).values_list('name', 'position'))
+    seen = LedgerEvent.objects.filter(
+        pk__lte=min(positions.get(name, 0) for name in _projections),
+        created_at__lt=timezone.now() - timedelta(days=keep_days),
+    )
+    return purge(seen)
+
+
+def run_dispatcher(poll=2.0, burst=False, batch_size=BATCH_SIZE):
+    """Dispatcher loop; with ``burst`` return once every projection is up to date"""
+    delivered = 0
+    while True:
+        close_old_connections()
+        counts = dispatch(batch_size=batch_size)
+        delivered += sum(counts.values())
+        if not any(counts.values()):
+            if burst:
+                return delivered
+            time.sleep(poll)
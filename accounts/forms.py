@@ -8,6 +8,7 @@ from .models import (
     Course, Student, StudentEnrollment, EmployeeAdvance, AccountingPeriod, Budget,
     DiscountRule
 )
+from .widgets import AutocompleteSelect
 
 class AccountForm(forms.ModelForm):
     class Meta:
@@ -19,6 +20,7 @@ class AccountForm(forms.ModelForm):
             'name_ar': forms.TextInput(attrs={'placeholder': 'ط§ظ„ط§ط³ظ… ط¨ط§ظ„ط¹ط±ط¨ظٹط©', 'dir': 'rtl'}),
             'code': forms.TextInput(attrs={'placeholder': 'e.g., 1000'}),
             'course_name': forms.TextInput(attrs={'placeholder': 'Course Name (if course account)'}),
+            'parent': AutocompleteSelect('accounts:autocomplete_accounts'),
         }
 
     def __init__(self, *args, **kwargs):
@@ -116,6 +118,7 @@ class StudentEnrollmentForm(forms.ModelForm):
             'discount_percent': forms.NumberInput(attrs={'step': '0.01', 'min': '0', 'max': '100', 'placeholder': '0.00'}),
             'discount_amount': forms.NumberInput(attrs={'step': '0.01', 'min': '0', 'placeholder': '0.00'}),
             'notes': forms.Textarea(attrs={'rows': 3, 'placeholder': 'Additional notes'}),
+            'student': AutocompleteSelect('accounts:autocomplete_students'),
         }
 
     def __init__(self, *args, **kwargs):
@@ -157,6 +160,7 @@ class EmployeeAdvanceForm(forms.ModelForm):
             'amount': forms.NumberInput(attrs={'step': '0.01', 'min': '0.01', 'placeholder': '0.00'}),
             'purpose': forms.TextInput(attrs={'placeholder': 'Purpose of advance'}),
             'repayment_date': forms.DateInput(attrs={'type': 'date'}),
+            'employee': AutocompleteSelect('accounts:autocomplete_employees'),
         }
 
     def __init__(self, *args, **kwargs):
@@ -250,6 +254,7 @@ class BudgetForm(forms.ModelForm):
         widgets = {
             'budgeted_amount': forms.NumberInput(attrs={'step': '0.01', 'min': '0.01', 'placeholder': '0.00'}),
             'notes': forms.Textarea(attrs={'rows': 3, 'placeholder': 'ملاحظات إضافية / Additional notes'}),
+            'account': AutocompleteSelect('accounts:autocomplete_accounts'),
         }
 
     def __init__(self, *args, **kwargs):
@@ -332,6 +337,7 @@ class TransactionForm(forms.ModelForm):
         widgets = {
             'amount': forms.NumberInput(attrs={'step': '0.01', 'min': '0.01'}),
             'description': forms.TextInput(attrs={'placeholder': 'Transaction description'}),
+            'account': AutocompleteSelect('accounts:autocomplete_accounts'),
         }
 
     def __init__(self, *args, **kwargs):
@@ -361,6 +367,7 @@ class StudentReceiptForm(forms.ModelForm):
             'course_name': forms.TextInput(attrs={'placeholder': 'اسم الدورة / Course Name'}),
             'amount': forms.NumberInput(attrs={'step': '0.01', 'min': '0.01', 'placeholder': '0.00'}),
             'notes': forms.Textarea(attrs={'rows': 3, 'placeholder': 'ملاحظات إضافية / Additional notes'}),
+            'student_profile': AutocompleteSelect('accounts:autocomplete_students'),
         }
 
     def __init__(self, *args, **kwargs):
@@ -406,6 +413,8 @@ class ExpenseEntryForm(forms.ModelForm):
             'vendor': forms.TextInput(attrs={'placeholder': 'اسم المورد / Vendor Name'}),
             'receipt_number': forms.TextInput(attrs={'placeholder': 'رقم الإيصال / Receipt Number'}),
             'notes': forms.Textarea(attrs={'rows': 3, 'placeholder': 'ملاحظات إضافية / Additional notes'}),
+            'employee': AutocompleteSelect('accounts:autocomplete_employees'),
+            'teacher': AutocompleteSelect('accounts:autocomplete_teachers'),
         }
 
     def __init__(self, *args, **kwargs):
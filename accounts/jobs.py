@@ -0,0 +1,43 @@
+"""Background job handlers of the accounts app (see pages/jobs.py)."""
+import io
+
+from django.core.management import call_command
+
+from pages.db import reporting
+from pages.exports import export_content
+from pages.jobs import register, save_result_file, track
+from .models import Account
+from .reports import LEDGER_COLUMNS, ledger_rows, ledger_transactions
+from .services import print_receipts_pdf, receipts_for_print
+
+
+@register('accounts.ledger_export')
+def ledger_export(job, account_id, fmt='xlsx', include_archive=False):
+    with reporting():
+        account = Account.objects.get(pk=account_id)
+        total = ledger_transactions(account, include_archive).count()
+        job.set_progress(0, message=f'تصدير دفتر الأستاذ / Exporting ledger {account.code}')
+        rows = track(job, ledger_rows(account, include_archive), total, every=2000)
+        fmt = 'csv' if fmt == 'csv' else 'xlsx'
+        save_result_file(job, f'ledger_{account.code}.{fmt}', export_content(rows, LEDGER_COLUMNS, fmt, 'Ledger'))
+    return {'rows': total}
+
+
+@register('accounts.receipts_batch_pdf')
+def receipts_batch_pdf(job, date_from, date_to, cashier_id=None, course_id=None, unprinted=False):
+    receipts = list(receipts_for_print(date_from, date_to, cashier_id, course_id, unprinted))
+    job.set_progress(10, message=f'طباعة {len(receipts)} إيصال / Printing {len(receipts)} receipts')
+    save_result_file(job, f'receipts_{date_from}_{date_to}.pdf', [print_receipts_pdf(receipts)])
+    return {'receipts': len(receipts)}
+
+
+@register('accounts.rebuild_balances')
+def rebuild_balances(job):
+    return {'changed': Account.rebuild_all_balances()}
+
+
+@register('accounts.reconcile_student_accounts')
+def reconcile_student_accounts(job):
+    out = io.StringIO()
+    call_command('reconcile_student_accounts', stdout=out, stderr=out)
+    return {'output': out.getvalue()}
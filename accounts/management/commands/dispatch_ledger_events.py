@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.events import BATCH_SIZE, dispatch, projection_names, prune, run_dispatcher
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver ledger events (entries posted or reversed, receipts, closed periods) "
+        "from the outbox to the registered projections."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('projections', nargs='*', help="Only these projections (default: all, once each)")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Events per handler call")
+        parser.add_argument('--loop', action='store_true', help="Keep running, polling for new events")
+        parser.add_argument('--poll', type=float, default=2.0, help="Seconds to wait when there is nothing to do")
+        parser.add_argument('--prune-days', type=int, help="Afterwards delete delivered events older than N days")
+        parser.add_argument('--list', action='store_true', help="List the registered projections")
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name in projection_names():
+                self.stdout.write(name)
+            return
+        batch_size = max(1, options['batch_size'])
+
+        if options['loop']:
+            self.stdout.write("Dispatching ledger events...")
+            run_dispatcher(poll=options['poll'], batch_size=batch_size)
+            return
+
+        try:
+            counts = dispatch(options['projections'] or None, batch_size=batch_size)
+        except ValueError as e:
+            raise CommandError(str(e))
+        for name, delivered in counts.items():
+            self.stdout.write(f"{name}: {delivered} events")
+        if options['prune_days'] is not None:
+            self.stdout.write(f"Pruned events: {prune(options['prune_days'])}")
+        self.stdout.write(self.style.SUCCESS("Dispatch done."))
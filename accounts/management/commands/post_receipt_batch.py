@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.services import load_receipt_rows, post_receipt_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Post a batch of student receipts from a JSON or CSV file "
+        "(columns: student, course, amount, method, date) in one transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSON or CSV file with the receipts")
+        parser.add_argument('--user', required=True, help="Username recorded as creator of the receipts")
+        parser.add_argument('--format', choices=['json', 'csv'], help="Defaults to the file extension")
+        parser.add_argument('--strict', action='store_true', help="Post nothing unless every row is valid")
+        parser.add_argument('--dry-run', action='store_true', help="Validate only, do not post")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' not found")
+
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'json')
+        try:
+            with open(path, 'rb') as fh:
+                rows = load_receipt_rows(fh.read(), fmt)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+        results = post_receipt_batch(rows, user, strict=options['strict'], dry_run=options['dry_run'])
+        for r in results:
+            if not r['ok']:
+                self.stdout.write(self.style.ERROR(f"Row {r['row']}: {r['error']}"))
+            elif r.get('posted'):
+                self.stdout.write(f"Row {r['row']}: {r['receipt_number']} / {r['journal_entry']}")
+            else:
+                self.stdout.write(f"Row {r['row']}: OK (not posted)")
+
+        posted = sum(1 for r in results if r.get('posted'))
+        failed = sum(1 for r in results if not r['ok'])
+        self.stdout.write(self.style.SUCCESS(f"Done. Posted: {posted}, failed: {failed}, rows: {len(results)}"))
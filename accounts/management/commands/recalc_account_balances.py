@@ -3,16 +3,8 @@ from accounts.models import Account
 
 
 class Command(BaseCommand):
-    help = "Recalculate all account balances as own net + sum of children (bottom-up)."
+    help = "Recalculate the stored balance of every account from its posted transactions."
 
     def handle(self, *args, **kwargs):
-        def depth(a):
-            d, p = 0, a.parent
-            while p:
-                d += 1
-                p = p.parent
-            return d
-        accs = list(Account.objects.all())
-        for a in sorted(accs, key=depth, reverse=True):
-            a.recalc_with_children()
-        self.stdout.write(self.style.SUCCESS("Balances fully recalculated."))
+        changed = Account.rebuild_all_balances()
+        self.stdout.write(self.style.SUCCESS(f"Balances fully recalculated. Updated: {changed}"))
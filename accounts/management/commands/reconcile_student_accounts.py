@@ -80,8 +80,9 @@ class Command(BaseCommand):
             except Exception as e:
                 self.stderr.write(f"Enrollment {enr.id}: {e}")
 
-        # 3) Create missing journal entries for receipts
-        for r in StudentReceipt.objects.all().select_related('created_by', 'journal_entry'):
+        # 3) Create missing journal entries for receipts (archived ones are already posted)
+        receipts = StudentReceipt.objects.filter(archived_journal_entry_id__isnull=True)
+        for r in receipts.select_related('created_by', 'journal_entry'):
             try:
                 if r.journal_entry_id is None:
                     r.create_accrual_journal_entry(r.created_by)
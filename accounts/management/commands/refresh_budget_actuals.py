@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from accounts.reports import refresh_budget_actuals
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored actual amount of every budget from posted transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rollup', action='store_true', help="Include transactions of child accounts")
+
+    def handle(self, *args, **options):
+        changed = refresh_budget_actuals(rollup=options['rollup'])
+        self.stdout.write(self.style.SUCCESS(f"Budget actuals refreshed. Updated: {changed}"))
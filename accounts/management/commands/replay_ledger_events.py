@@ -0,0 +1,35 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from accounts.events import BATCH_SIZE, replay
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver past ledger events to a projection again (after a bug fix, "
+        "or to rebuild a derived view from scratch)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('projection', help="Projection name (see dispatch_ledger_events --list)")
+        start = parser.add_mutually_exclusive_group()
+        start.add_argument('--from-event', type=int, help="First event id to deliver (default: the oldest)")
+        start.add_argument('--since', help="First day (YYYY-MM-DD) whose events are delivered")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Events per handler call")
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            day = parse_date(options['since'])
+            if day is None:
+                raise CommandError(f"Invalid date: {options['since']}")
+            since = timezone.make_aware(datetime.combine(day, time.min))
+        try:
+            delivered = replay(options['projection'], from_event=options['from_event'], since=since,
+                               batch_size=max(1, options['batch_size']))
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Replayed {delivered} events to {options['projection']}"))
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from accounts.models import JournalEntry
+from accounts.services import reverse_entries
+
+
+class Command(BaseCommand):
+    help = (
+        "Reverse a filtered set of posted journal entries in one transaction "
+        "(e.g. a bad import or payroll run)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('references', nargs='*', help="References of the entries to reverse")
+        parser.add_argument('--user', required=True, help="Username recorded as creator of the reversals")
+        parser.add_argument('--entry-type', help="Only entries of this type (e.g. PAYMENT, EXPENSE)")
+        parser.add_argument('--date-from', help="Only entries dated on or after YYYY-MM-DD")
+        parser.add_argument('--date-to', help="Only entries dated on or before YYYY-MM-DD")
+        parser.add_argument('--created-by', help="Only entries created by this username")
+        parser.add_argument('--description', help="Only entries whose description contains this text")
+        parser.add_argument('--date', help="Date of the reversing entries (default: today)")
+        parser.add_argument('--dry-run', action='store_true', help="List what would be reversed, do not post")
+
+    def _date(self, options, name):
+        value = options[name]
+        if value is None:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f"Invalid --{name.replace('_', '-')}: {value}")
+        return parsed
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' not found")
+
+        entries = JournalEntry.objects.all()
+        filtered = False
+        if options['references']:
+            entries = entries.filter(reference__in=options['references'])
+            filtered = True
+        if options['entry_type']:
+            entries = entries.filter(entry_type=options['entry_type'])
+            filtered = True
+        if options['date_from']:
+            entries = entries.filter(date__gte=self._date(options, 'date_from'))
+            filtered = True
+        if options['date_to']:
+            entries = entries.filter(date__lte=self._date(options, 'date_to'))
+            filtered = True
+        if options['created_by']:
+            entries = entries.filter(created_by__username=options['created_by'])
+            filtered = True
+        if options['description']:
+            entries = entries.filter(description__icontains=options['description'])
+            filtered = True
+        if not filtered:
+            raise CommandError("Give entry references or at least one filter; refusing to reverse every entry")
+
+        try:
+            reversals, skipped = reverse_entries(
+                entries, user, date=self._date(options, 'date'), dry_run=options['dry_run']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for original, reversing_entry in reversals:
+            self.stdout.write(f"{original.reference} -> {reversing_entry.reference or '(not posted)'}")
+        for entry, reason in skipped:
+            self.stdout.write(self.style.WARNING(f"{entry.reference}: skipped ({reason})"))
+
+        verb = "Would reverse" if options['dry_run'] else "Reversed"
+        self.stdout.write(self.style.SUCCESS(f"Done. {verb}: {len(reversals)}, skipped: {len(skipped)}"))
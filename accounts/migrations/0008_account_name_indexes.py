@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:56
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_alter_account_options_alter_accountingperiod_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='account_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(django.db.models.functions.text.Lower('name_ar'), name='account_name_ar_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_account_name_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='journalentry',
+            name='entry_type',
+            field=models.CharField(choices=[('MANUAL', 'يدوي / Manual'), ('ENROLLMENT', 'تسجيل / Enrollment'), ('PAYMENT', 'دفع / Payment'), ('COMPLETION', 'إكمال / Completion'), ('EXPENSE', 'مصروف / Expense'), ('ADJUSTMENT', 'تسوية / Adjustment'), ('CLOSING', 'إقفال / Closing')], default='MANUAL', max_length=20, verbose_name='نوع القيد / Entry Type'),
+        ),
+        migrations.CreateModel(
+            name='AccountBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('debit_total', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='إجمالي المدين / Debit Total')),
+                ('credit_total', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='إجمالي الدائن / Credit Total')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='الرصيد / Balance')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='accounts.account', verbose_name='الحساب / Account')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='accounts.accountingperiod', verbose_name='الفترة / Period')),
+            ],
+            options={
+                'verbose_name': 'لقطة رصيد الحساب / Account Balance Snapshot',
+                'verbose_name_plural': 'لقطات أرصدة الحسابات / Account Balance Snapshots',
+                'unique_together': {('period', 'account')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_accountbalancesnapshot_closing_entry_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(fields=['updated_at'], name='account_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['updated_at'], name='journal_entry_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentreceipt',
+            index=models.Index(fields=['updated_at'], name='receipt_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+LEDGER_VIEW = """
+CREATE VIEW accounts_ledgerline AS
+SELECT t.id, t.journal_entry_id, t.account_id, t.amount, t.is_debit, t.description,
+       j.date, j.reference, j.entry_type, j.is_posted, j.created_at, FALSE AS archived
+  FROM accounts_transaction t
+  JOIN accounts_journalentry j ON j.id = t.journal_entry_id
+UNION ALL
+SELECT t.id, t.journal_entry_id, t.account_id, t.amount, t.is_debit, t.description,
+       j.date, j.reference, j.entry_type, j.is_posted, j.created_at, TRUE AS archived
+  FROM accounts_archivedtransaction t
+  JOIN accounts_archivedjournalentry j ON j.id = t.journal_entry_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0011_journalentry_reversal_of'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='journalentry',
+            name='entry_type',
+            field=models.CharField(choices=[('MANUAL', 'يدوي / Manual'), ('ENROLLMENT', 'تسجيل / Enrollment'), ('PAYMENT', 'دفع / Payment'), ('COMPLETION', 'إكمال / Completion'), ('EXPENSE', 'مصروف / Expense'), ('ADJUSTMENT', 'تسوية / Adjustment'), ('CLOSING', 'إقفال / Closing'), ('CARRY_FORWARD', 'رصيد مرحّل / Carried Forward')], default='MANUAL', max_length=20, verbose_name='نوع القيد / Entry Type'),
+        ),
+        migrations.AddField(
+            model_name='accountingperiod',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الأرشفة / Archived At'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedJournalEntry',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('reference', models.CharField(db_index=True, max_length=50, verbose_name='المرجع / Reference')),
+                ('date', models.DateField(db_index=True, verbose_name='التاريخ / Date')),
+                ('description', models.TextField(verbose_name='الوصف / Description')),
+                ('entry_type', models.CharField(choices=[('MANUAL', 'يدوي / Manual'), ('ENROLLMENT', 'تسجيل / Enrollment'), ('PAYMENT', 'دفع / Payment'), ('COMPLETION', 'إكمال / Completion'), ('EXPENSE', 'مصروف / Expense'), ('ADJUSTMENT', 'تسوية / Adjustment'), ('CLOSING', 'إقفال / Closing'), ('CARRY_FORWARD', 'رصيد مرحّل / Carried Forward')], max_length=20, verbose_name='نوع القيد / Entry Type')),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='المبلغ الإجمالي / Total Amount')),
+                ('is_posted', models.BooleanField(default=True, verbose_name='مُرحل / Posted')),
+                ('posted_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الترحيل / Posted At')),
+                ('reversal_of_id', models.BigIntegerField(blank=True, null=True, verbose_name='عكس للقيد / Reversal Of')),
+                ('documents', models.JSONField(blank=True, default=dict, verbose_name='المستندات المرتبطة / Linked Documents')),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الأرشفة / Archived At')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='أُنشئ بواسطة / Created By')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_entries', to='accounts.accountingperiod', verbose_name='الفترة / Period')),
+                ('posted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='مُرحل بواسطة / Posted By')),
+            ],
+            options={
+                'verbose_name': 'قيد مؤرشف / Archived Journal Entry',
+                'verbose_name_plural': 'قيود مؤرشفة / Archived Journal Entries',
+                'ordering': ['-date', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedTransaction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='المبلغ / Amount')),
+                ('is_debit', models.BooleanField(verbose_name='مدين / Debit')),
+                ('description', models.CharField(blank=True, max_length=500, verbose_name='الوصف / Description')),
+                ('created_at', models.DateTimeField()),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='accounts.account', verbose_name='الحساب / Account')),
+                ('cost_center', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='accounts.costcenter', verbose_name='مركز التكلفة / Cost Center')),
+                ('journal_entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='accounts.archivedjournalentry', verbose_name='قيد اليومية / Journal Entry')),
+            ],
+            options={
+                'verbose_name': 'معاملة مؤرشفة / Archived Transaction',
+                'verbose_name_plural': 'معاملات مؤرشفة / Archived Transactions',
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerLine',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('journal_entry_id', models.BigIntegerField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('is_debit', models.BooleanField()),
+                ('description', models.CharField(max_length=500)),
+                ('date', models.DateField()),
+                ('reference', models.CharField(max_length=50)),
+                ('entry_type', models.CharField(max_length=20)),
+                ('is_posted', models.BooleanField()),
+                ('created_at', models.DateTimeField()),
+                ('archived', models.BooleanField()),
+                ('account', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='accounts.account')),
+            ],
+            options={
+                'db_table': 'accounts_ledgerline',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(LEDGER_VIEW, 'DROP VIEW IF EXISTS accounts_ledgerline'),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_archive_tables'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['date', 'created_at'], name='journal_entry_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentreceipt',
+            index=models.Index(fields=['date', 'created_at'], name='receipt_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expenseentry',
+            index=models.Index(fields=['date', 'created_at'], name='expense_date_idx'),
+        ),
+    ]
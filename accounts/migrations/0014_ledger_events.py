@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(choices=[('EntryPosted', 'ترحيل قيد / Entry posted'), ('EntryReversed', 'عكس قيد / Entry reversed'), ('ReceiptCreated', 'إيصال جديد / Receipt created'), ('PeriodClosed', 'إقفال فترة / Period closed')], max_length=30, verbose_name='الحدث / Event')),
+                ('payload', models.JSONField(default=dict, verbose_name='البيانات / Payload')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'حدث دفتر الأستاذ / Ledger Event',
+                'verbose_name_plural': 'أحداث دفتر الأستاذ / Ledger Events',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerProjection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='الإسقاط / Projection')),
+                ('position', models.BigIntegerField(default=0, verbose_name='آخر حدث مُسلَّم / Last Delivered Event')),
+                ('failures', models.PositiveIntegerField(default=0, verbose_name='مرات الفشل / Failures')),
+                ('error', models.TextField(blank=True, verbose_name='الخطأ / Error')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'إسقاط الأحداث / Ledger Projection',
+                'verbose_name_plural': 'إسقاطات الأحداث / Ledger Projections',
+                'ordering': ['name'],
+            },
+        ),
+    ]
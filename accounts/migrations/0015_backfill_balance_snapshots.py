@@ -0,0 +1,48 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Case, DecimalField, Sum, Value, When
+
+
+def backfill_snapshots(apps, schema_editor):
+    """Snapshots of the periods closed before ``close_period`` wrote them"""
+    AccountingPeriod = apps.get_model('accounts', 'AccountingPeriod')
+    AccountBalanceSnapshot = apps.get_model('accounts', 'AccountBalanceSnapshot')
+    Account = apps.get_model('accounts', 'Account')
+    Transaction = apps.get_model('accounts', 'Transaction')
+
+    types = dict(Account.objects.values_list('pk', 'account_type'))
+    money = DecimalField(max_digits=15, decimal_places=2)
+    periods = AccountingPeriod.objects.filter(is_closed=True, balance_snapshots__isnull=True).order_by('end_date')
+    for period in periods:
+        # Carry-forward entries stand in for archived lines, so the hot table is enough
+        rows = Transaction.objects.filter(
+            journal_entry__is_posted=True, journal_entry__date__lte=period.end_date,
+        ).values('account_id').annotate(
+            debits=Sum(Case(When(is_debit=True, then='amount'), default=Value(0), output_field=money)),
+            credits=Sum(Case(When(is_debit=False, then='amount'), default=Value(0), output_field=money)),
+        ).order_by()
+        snapshots = []
+        for row in rows:
+            debits, credits = row['debits'] or Decimal('0'), row['credits'] or Decimal('0')
+            normal_debit = types[row['account_id']] in ['ASSET', 'EXPENSE']
+            snapshots.append(AccountBalanceSnapshot(
+                period=period,
+                account_id=row['account_id'],
+                debit_total=debits,
+                credit_total=credits,
+                balance=debits - credits if normal_debit else credits - debits,
+            ))
+        AccountBalanceSnapshot.objects.bulk_create(snapshots)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_ledger_events'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
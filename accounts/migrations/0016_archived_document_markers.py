@@ -0,0 +1,57 @@
+from django.db import migrations, models
+
+
+def backfill_markers(apps, schema_editor):
+    """Mark the documents of entries archived before the markers existed"""
+    ArchivedJournalEntry = apps.get_model('accounts', 'ArchivedJournalEntry')
+    fields = {
+        'accounts.studentreceipt': 'archived_journal_entry_id',
+        'accounts.expenseentry': 'archived_journal_entry_id',
+        'accounts.employeeadvance': 'archived_journal_entry_id',
+    }
+    entries = ArchivedJournalEntry.objects.exclude(documents={}).values_list('pk', 'entry_type', 'documents')
+    for entry_id, entry_type, documents in entries.iterator():
+        for label, pks in documents.items():
+            field = fields.get(label)
+            if label == 'accounts.studentenrollment':
+                field = ('archived_completion_journal_entry_id' if entry_type == 'COMPLETION'
+                         else 'archived_enrollment_journal_entry_id')
+            if field:
+                model = apps.get_model(label)
+                model.objects.filter(pk__in=pks, **{f'{field}__isnull': True}).update(**{field: entry_id})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_backfill_balance_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentenrollment',
+            name='archived_enrollment_journal_entry_id',
+            field=models.BigIntegerField(blank=True, editable=False, null=True, verbose_name='قيد التسجيل المؤرشف / Archived Enrollment Entry'),
+        ),
+        migrations.AddField(
+            model_name='studentenrollment',
+            name='archived_completion_journal_entry_id',
+            field=models.BigIntegerField(blank=True, editable=False, null=True, verbose_name='قيد الإكمال المؤرشف / Archived Completion Entry'),
+        ),
+        migrations.AddField(
+            model_name='studentreceipt',
+            name='archived_journal_entry_id',
+            field=models.BigIntegerField(blank=True, editable=False, null=True, verbose_name='القيد المؤرشف / Archived Journal Entry'),
+        ),
+        migrations.AddField(
+            model_name='expenseentry',
+            name='archived_journal_entry_id',
+            field=models.BigIntegerField(blank=True, editable=False, null=True, verbose_name='القيد المؤرشف / Archived Journal Entry'),
+        ),
+        migrations.AddField(
+            model_name='employeeadvance',
+            name='archived_journal_entry_id',
+            field=models.BigIntegerField(blank=True, editable=False, null=True, verbose_name='القيد المؤرشف / Archived Journal Entry'),
+        ),
+        migrations.RunPython(backfill_markers, migrations.RunPython.noop),
+    ]
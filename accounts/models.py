@@ -2,10 +2,15 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.urls import reverse
 from decimal import Decimal
 from django.db.models import Sum, Q
+from django.db.models.functions import Lower
 import uuid
+from collections import defaultdict
+
+from .resolver import account_resolver
 
 
 class NumberSequence(models.Model):
@@ -21,6 +26,35 @@ class NumberSequence(models.Model):
         obj.save()
         return obj.last_value
 
+    @classmethod
+    def allocate_block(cls, key, count):
+        """Reserve `count` consecutive values for a key and return the first one"""
+        return cls.allocate_blocks({key: count})[key]
+
+    @classmethod
+    def allocate_blocks(cls, counts):
+        """Reserve consecutive values for several keys at once.
+
+        `counts` maps key -> number of values wanted; returns key -> first
+        reserved value. The counters are bumped before they are read so the
+        write lock is held for the rest of the surrounding transaction, which
+        costs one UPDATE and one SELECT for existing keys.
+        """
+        from django.db.models import Case, When, F, Value
+
+        whens = [When(key=key, then=F('last_value') + Value(count)) for key, count in counts.items()]
+        cls.objects.filter(key__in=counts).update(
+            last_value=Case(*whens, output_field=models.BigIntegerField())
+        )
+        last_values = dict(cls.objects.filter(key__in=counts).values_list('key', 'last_value'))
+        for key, count in counts.items():
+            if key not in last_values:
+                obj, created = cls.objects.get_or_create(key=key, defaults={'last_value': 0})
+                cls.objects.filter(pk=obj.pk).update(last_value=F('last_value') + count)
+                obj.refresh_from_db(fields=['last_value'])
+                last_values[key] = obj.last_value
+        return {key: last_values[key] - count + 1 for key, count in counts.items()}
+
 
 class Account(models.Model):
     ACCOUNT_TYPE_CHOICES = [
@@ -53,6 +87,13 @@ class Account(models.Model):
         verbose_name = 'الحساب / Account'
         verbose_name_plural = 'الحسابات / Accounts'
         ordering = ['code']
+        indexes = [
+            # Prefix search in the autocomplete endpoints
+            models.Index(Lower('name'), name='account_name_lower_idx'),
+            models.Index(Lower('name_ar'), name='account_name_ar_lower_idx'),
+            # Incremental sync in the API (updated_since + cursor)
+            models.Index(fields=['updated_at'], name='account_updated_at_idx'),
+        ]
 
     def __str__(self):
         return f"{self.code} - {self.display_name}"
@@ -108,81 +149,140 @@ class Account(models.Model):
         
         # Update own balance
         self.balance = self.get_net_balance()
-        self.save(update_fields=['balance'])
+        self.save(update_fields=['balance', 'updated_at'])
+
+    @classmethod
+    def rebuild_all_balances(cls):
+        """Recompute every stored balance from posted transactions.
+
+        One grouped query (see ``accounts.reports.balances_as_of``) instead of
+        an aggregate per account; returns the number of accounts changed.
+        """
+        from .reports import balances_as_of, net_balance
+
+        totals = balances_as_of()
+        zero = (Decimal('0'), Decimal('0'))
+        now = timezone.now()
+        changed = []
+        for account in cls.objects.only('id', 'account_type', 'balance'):
+            balance = net_balance(account.account_type, *totals.get(account.pk, zero))
+            if account.balance != balance:
+                account.balance = balance
+                account.updated_at = now
+                changed.append(account)
+        cls.objects.bulk_update(changed, ['balance', 'updated_at'], batch_size=500)
+        return len(changed)
+
+    @classmethod
+    def apply_transaction_deltas(cls, transactions):
+        """Add the effect of newly posted transactions to stored balances.
+
+        Bulk posting paths use this instead of recalculating each account from
+        its whole history: debits and credits are netted per account and every
+        affected balance is moved in a single UPDATE.
+        """
+        from django.db.models import Case, When, F, Value, DecimalField
+
+        totals = defaultdict(lambda: [Decimal('0'), Decimal('0')])
+        for tx in transactions:
+            totals[tx.account_id][0 if tx.is_debit else 1] += tx.amount
+        if not totals:
+            return 0
+
+        whens = []
+        for account_id, (debits, credits) in totals.items():
+            whens.append(When(pk=account_id, account_type__in=['ASSET', 'EXPENSE'],
+                              then=F('balance') + Value(debits - credits)))
+            whens.append(When(pk=account_id, then=F('balance') + Value(credits - debits)))
+        return cls.objects.filter(pk__in=totals.keys()).update(
+            balance=Case(*whens, output_field=DecimalField(max_digits=15, decimal_places=2)),
+            updated_at=timezone.now(),
+        )
+
+    @classmethod
+    def get_student_ar_parent(cls):
+        """Get or create the parent of all student receivable accounts"""
+        return account_resolver.resolve('1251', {
+            'name': 'Accounts Receivable - Students',
+            'name_ar': 'الذمم المدينة - الطلاب',
+            'account_type': 'ASSET',
+            'is_active': True,
+        })
+
+    @staticmethod
+    def student_ar_code(student):
+        return f"1251-{student.id:03d}"
+
+    @classmethod
+    def student_ar_defaults(cls, student, ar_parent):
+        return {
+            'name': f'ST {student.full_name}',
+            'name_ar': f'طالب - {student.full_name}',
+            'account_type': 'ASSET',
+            'parent': ar_parent,
+            'is_student_account': True,
+            'student_name': student.full_name,
+            'is_active': True,
+        }
 
     @classmethod
     def get_or_create_student_ar_account(cls, student):
         """Create or get student's accounts receivable account"""
         # Ensure AR parent exists
-        ar_parent, _ = cls.objects.get_or_create(
-            code='1251',
-            defaults={
-                'name': 'Accounts Receivable - Students',
-                'name_ar': 'الذمم المدينة - الطلاب',
-                'account_type': 'ASSET',
-                'is_active': True,
-            }
-        )
+        ar_parent = cls.get_student_ar_parent()
         
         # Create student AR account
-        student_code = f"1251-{student.id:03d}"
         account, created = cls.objects.get_or_create(
-            code=student_code,
-            defaults={
-                'name': f'ST {student.full_name}',
-                'name_ar': f'طالب - {student.full_name}',
-                'account_type': 'ASSET',
-                'parent': ar_parent,
-                'is_student_account': True,
-                'student_name': student.full_name,
-                'is_active': True,
-            }
+            code=cls.student_ar_code(student),
+            defaults=cls.student_ar_defaults(student, ar_parent)
         )
         return account
 
+    @classmethod
+    def course_revenue_defaults(cls, course):
+        # Ensure course revenue parent exists
+        revenue_parent_id = account_resolver.get_id('2101', {
+            'name': 'Course Revenues Received (In advance)',
+            'name_ar': 'إيرادات الدورات المقبوضة مقدماً',
+            'account_type': 'LIABILITY',
+            'is_active': True,
+        })
+        return {
+            'name': f'{course.name}',
+            'name_ar': f'دورة - {course.name}',
+            'account_type': 'LIABILITY',
+            'parent_id': revenue_parent_id,
+            'is_course_account': True,
+            'course_name': course.name,
+            'is_active': True,
+        }
+
+    @classmethod
+    def get_course_revenue_account_id(cls, course):
+        """Id of the course revenue account, without a query once cached"""
+        return account_resolver.get_id(f"2101-{course.id:03d}", lambda: cls.course_revenue_defaults(course))
+
     @classmethod
     def get_or_create_course_revenue_account(cls, course):
         """Create or get course revenue account"""
-        # Ensure course revenue parent exists
-        revenue_parent, _ = cls.objects.get_or_create(
-            code='2101',
-            defaults={
-                'name': 'Course Revenues Received (In advance)',
-                'name_ar': 'إيرادات الدورات المقبوضة مقدماً',
-                'account_type': 'LIABILITY',
-                'is_active': True,
-            }
-        )
-        
-        # Create course revenue account
-        course_code = f"2101-{course.id:03d}"
-        account, created = cls.objects.get_or_create(
-            code=course_code,
-            defaults={
-                'name': f'{course.name}',
-                'name_ar': f'دورة - {course.name}',
-                'account_type': 'LIABILITY',
-                'parent': revenue_parent,
-                'is_course_account': True,
-                'course_name': course.name,
-                'is_active': True,
-            }
-        )
-        return account
+        return account_resolver.resolve(f"2101-{course.id:03d}", lambda: cls.course_revenue_defaults(course))
+
+    CASH_ACCOUNT_DEFAULTS = {
+        'name': 'Cash',
+        'name_ar': 'النقدية',
+        'account_type': 'ASSET',
+        'is_active': True,
+    }
+
+    @classmethod
+    def get_cash_account_id(cls):
+        """Id of the main cash account, without a query once cached"""
+        return account_resolver.get_id('1211', cls.CASH_ACCOUNT_DEFAULTS)
 
     @classmethod
     def get_cash_account(cls):
         """Get or create main cash account"""
-        account, created = cls.objects.get_or_create(
-            code='1211',
-            defaults={
-                'name': 'Cash',
-                'name_ar': 'النقدية',
-                'account_type': 'ASSET',
-                'is_active': True,
-            }
-        )
-        return account
+        return account_resolver.resolve('1211', cls.CASH_ACCOUNT_DEFAULTS)
 
 
 class CostCenter(models.Model):
@@ -262,6 +362,8 @@ class JournalEntry(models.Model):
         ('COMPLETION', 'إكمال / Completion'),
         ('EXPENSE', 'مصروف / Expense'),
         ('ADJUSTMENT', 'تسوية / Adjustment'),
+        ('CLOSING', 'إقفال / Closing'),
+        ('CARRY_FORWARD', 'رصيد مرحّل / Carried Forward'),
     ]
 
     reference = models.CharField(max_length=50, unique=True, verbose_name='المرجع / Reference')
@@ -273,6 +375,7 @@ class JournalEntry(models.Model):
     posted_at = models.DateTimeField(null=True, blank=True, verbose_name='تاريخ الترحيل / Posted At')
     posted_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='posted_entries', verbose_name='مُرحل بواسطة / Posted By')
     created_by = models.ForeignKey(User, on_delete=models.PROTECT, verbose_name='أُنشئ بواسطة / Created By')
+    reversal_of = models.ForeignKey('self', on_delete=models.PROTECT, null=True, blank=True, related_name='reversals', verbose_name='عكس للقيد / Reversal Of')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -280,6 +383,18 @@ class JournalEntry(models.Model):
         verbose_name = 'قيد اليومية / Journal Entry'
         verbose_name_plural = 'قيود اليومية / Journal Entries'
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['updated_at'], name='journal_entry_updated_at_idx'),
+            # Date ranges and the default ordering (reports, admin date hierarchy)
+            models.Index(fields=['date', 'created_at'], name='journal_entry_date_idx'),
+        ]
+        constraints = [
+            # An entry is reversed at most once (reverse_entry, services.reverse_entries).
+            # The condition makes it a plain unique index, so SQLite does not
+            # rebuild the table (which the accounts_ledgerline view prevents).
+            models.UniqueConstraint(fields=['reversal_of'], condition=Q(reversal_of__isnull=False),
+                                    name='journal_entry_one_reversal'),
+        ]
 
     def __str__(self):
         return f"{self.reference} - {self.date}"
@@ -295,8 +410,12 @@ class JournalEntry(models.Model):
 
     def post_entry(self, user):
         """Post the journal entry and update account balances"""
+        from django.db import transaction as db_transaction
+        from .events import entry_posted
+
         if self.is_posted:
             raise ValueError("Entry is already posted")
+        AccountingPeriod.ensure_open(self.date)
         
         # Validate that debits equal credits
         total_debits = self.transactions.filter(is_debit=True).aggregate(
@@ -307,41 +426,52 @@ class JournalEntry(models.Model):
         if total_debits != total_credits:
             raise ValueError(f"Debits ({total_debits}) must equal credits ({total_credits})")
         
-        self.is_posted = True
-        self.posted_at = timezone.now()
-        self.posted_by = user
-        self.save()
-        
-        # Update account balances
-        for transaction in self.transactions.all():
-            transaction.account.recalculate_tree_balances()
+        with db_transaction.atomic():
+            self.is_posted = True
+            self.posted_at = timezone.now()
+            self.posted_by = user
+            self.save()
+
+            # Update account balances
+            lines = list(self.transactions.select_related('account'))
+            for transaction in lines:
+                transaction.account.recalculate_tree_balances()
+            entry_posted([self], [lines])
 
     def reverse_entry(self, user, description=None):
         """Create a reversing journal entry"""
+        from django.db import transaction as db_transaction
+        from .events import entry_reversed
+
         if not self.is_posted:
             raise ValueError("Cannot reverse unposted entry")
+        if self.reversals.exists():
+            raise ValueError(f"Entry {self.reference} is already reversed")
         
-        reversing_entry = JournalEntry.objects.create(
-            date=timezone.now().date(),
-            description=description or f"Reversal of {self.reference}",
-            entry_type='ADJUSTMENT',
-            total_amount=self.total_amount,
-            created_by=user
-        )
-        
-        # Create reversing transactions
-        for transaction in self.transactions.all():
-            Transaction.objects.create(
-                journal_entry=reversing_entry,
-                account=transaction.account,
-                amount=transaction.amount,
-                is_debit=not transaction.is_debit,  # Reverse the debit/credit
-                description=f"Reversal: {transaction.description}",
-                cost_center=transaction.cost_center
+        with db_transaction.atomic():
+            reversing_entry = JournalEntry.objects.create(
+                date=timezone.now().date(),
+                description=description or f"Reversal of {self.reference}",
+                entry_type='ADJUSTMENT',
+                total_amount=self.total_amount,
+                created_by=user,
+                reversal_of=self,
             )
-        
-        # Post the reversing entry
-        reversing_entry.post_entry(user)
+
+            # Create reversing transactions
+            for transaction in self.transactions.all():
+                Transaction.objects.create(
+                    journal_entry=reversing_entry,
+                    account=transaction.account,
+                    amount=transaction.amount,
+                    is_debit=not transaction.is_debit,  # Reverse the debit/credit
+                    description=f"Reversal: {transaction.description}",
+                    cost_center=transaction.cost_center
+                )
+
+            # Post the reversing entry
+            reversing_entry.post_entry(user)
+            entry_reversed([(self, reversing_entry)])
         return reversing_entry
 
 
@@ -392,6 +522,9 @@ class StudentEnrollment(models.Model):
     # Journal entry references
     enrollment_journal_entry = models.ForeignKey(JournalEntry, on_delete=models.SET_NULL, null=True, blank=True, related_name='enrollments', verbose_name='قيد التسجيل / Enrollment Entry')
     completion_journal_entry = models.ForeignKey(JournalEntry, on_delete=models.SET_NULL, null=True, blank=True, related_name='completions', verbose_name='قيد الإكمال / Completion Entry')
+    # Ids of the entries above once moved to ArchivedJournalEntry (accounts.archive)
+    archived_enrollment_journal_entry_id = models.BigIntegerField(null=True, blank=True, editable=False, verbose_name='قيد التسجيل المؤرشف / Archived Enrollment Entry')
+    archived_completion_journal_entry_id = models.BigIntegerField(null=True, blank=True, editable=False, verbose_name='قيد الإكمال المؤرشف / Archived Completion Entry')
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -425,10 +558,13 @@ class StudentEnrollment(models.Model):
         """Create the accrual journal entry for enrollment"""
         if self.enrollment_journal_entry:
             return self.enrollment_journal_entry
+        if self.archived_enrollment_journal_entry_id:
+            # Posted in a period that has since been archived
+            return None
         
         # Get accounts
-        student_ar_account = self.student.ar_account
-        course_revenue_account = self.course.revenue_account
+        student_ar_account = self.student.ensure_ar_account()
+        course_revenue_account_id = Account.get_course_revenue_account_id(self.course)
         
         # Create journal entry
         entry = JournalEntry.objects.create(
@@ -450,7 +586,7 @@ class StudentEnrollment(models.Model):
         
         Transaction.objects.create(
             journal_entry=entry,
-            account=course_revenue_account,
+            account_id=course_revenue_account_id,
             amount=self.net_amount,
             is_debit=False,
             description=f"Deferred revenue - {self.course.name}"
@@ -492,6 +628,8 @@ class StudentReceipt(models.Model):
     course = models.ForeignKey(Course, on_delete=models.PROTECT, null=True, blank=True, related_name='receipts', verbose_name='الدورة / Course')
     enrollment = models.ForeignKey(StudentEnrollment, on_delete=models.PROTECT, null=True, blank=True, related_name='payments', verbose_name='التسجيل / Enrollment')
     journal_entry = models.ForeignKey(JournalEntry, on_delete=models.SET_NULL, null=True, blank=True, related_name='receipts', verbose_name='قيد اليومية / Journal Entry')
+    # Id of the entry above once moved to ArchivedJournalEntry (accounts.archive)
+    archived_journal_entry_id = models.BigIntegerField(null=True, blank=True, editable=False, verbose_name='القيد المؤرشف / Archived Journal Entry')
     created_by = models.ForeignKey(User, on_delete=models.PROTECT, verbose_name='أُنشئ بواسطة / Created By')
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -501,6 +639,10 @@ class StudentReceipt(models.Model):
         verbose_name = 'إيصال الطالب / Student Receipt'
         verbose_name_plural = 'إيصالات الطلاب / Student Receipts'
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['updated_at'], name='receipt_updated_at_idx'),
+            models.Index(fields=['date', 'created_at'], name='receipt_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.receipt_number} - {self.student_name}"
@@ -540,12 +682,15 @@ class StudentReceipt(models.Model):
         """Create journal entry for payment receipt"""
         if self.journal_entry:
             return self.journal_entry
+        if self.archived_journal_entry_id:
+            # Posted in a period that has since been archived
+            return None
         
         # Get accounts
-        cash_account = Account.get_cash_account()
+        cash_account_id = Account.get_cash_account_id()
         
         if self.student_profile:
-            student_ar_account = self.student_profile.ar_account
+            student_ar_account = self.student_profile.ensure_ar_account()
         elif self.student:
             # For legacy accounts model students
             student_ar_account = Account.get_or_create_student_ar_account(self.student)
@@ -564,7 +709,7 @@ class StudentReceipt(models.Model):
         # Create transactions
         Transaction.objects.create(
             journal_entry=entry,
-            account=cash_account,
+            account_id=cash_account_id,
             amount=self.paid_amount,
             is_debit=True,
             description=f"Cash received from {self.get_student_name()}"
@@ -621,6 +766,8 @@ class ExpenseEntry(models.Model):
     employee = models.ForeignKey('employ.Employee', on_delete=models.SET_NULL, null=True, blank=True, related_name='expense_entries', verbose_name='الموظف / Employee')
     teacher = models.ForeignKey('employ.Teacher', on_delete=models.SET_NULL, null=True, blank=True, related_name='expense_entries', verbose_name='المعلم / Teacher')
     journal_entry = models.ForeignKey(JournalEntry, on_delete=models.SET_NULL, null=True, blank=True, related_name='expenses', verbose_name='قيد اليومية / Journal Entry')
+    # Id of the entry above once moved to ArchivedJournalEntry (accounts.archive)
+    archived_journal_entry_id = models.BigIntegerField(null=True, blank=True, editable=False, verbose_name='القيد المؤرشف / Archived Journal Entry')
     created_by = models.ForeignKey(User, on_delete=models.PROTECT, verbose_name='أُنشئ بواسطة / Created By')
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -630,6 +777,9 @@ class ExpenseEntry(models.Model):
         verbose_name = 'قيد المصروف / Expense Entry'
         verbose_name_plural = 'قيود المصروفات / Expense Entries'
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['date', 'created_at'], name='expense_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.reference} - {self.description}"
@@ -647,12 +797,15 @@ class ExpenseEntry(models.Model):
         """Create journal entry for expense"""
         if self.journal_entry:
             return self.journal_entry
+        if self.archived_journal_entry_id:
+            # Posted in a period that has since been archived
+            return None
         
         # Get accounts
-        cash_account = Account.get_cash_account()
+        cash_account_id = Account.get_cash_account_id()
         
         # Get or create expense account based on category
-        expense_account = self.get_or_create_expense_account()
+        expense_account_id = self.get_expense_account_id()
         
         # Create journal entry
         entry = JournalEntry.objects.create(
@@ -666,7 +819,7 @@ class ExpenseEntry(models.Model):
         # Create transactions
         Transaction.objects.create(
             journal_entry=entry,
-            account=expense_account,
+            account_id=expense_account_id,
             amount=self.amount,
             is_debit=True,
             description=self.description
@@ -674,7 +827,7 @@ class ExpenseEntry(models.Model):
         
         Transaction.objects.create(
             journal_entry=entry,
-            account=cash_account,
+            account_id=cash_account_id,
             amount=self.amount,
             is_debit=False,
             description=f"Cash payment - {self.description}"
@@ -689,8 +842,7 @@ class ExpenseEntry(models.Model):
         
         return entry
 
-    def get_or_create_expense_account(self):
-        """Get or create appropriate expense account"""
+    def _expense_account_spec(self):
         # Map categories to account codes
         category_accounts = {
             'SALARY': ('5100', 'Employee Salaries', 'رواتب الموظفين'),
@@ -704,17 +856,20 @@ class ExpenseEntry(models.Model):
         }
         
         code, name, name_ar = category_accounts.get(self.category, category_accounts['OTHER'])
-        
-        account, created = Account.objects.get_or_create(
-            code=code,
-            defaults={
-                'name': name,
-                'name_ar': name_ar,
-                'account_type': 'EXPENSE',
-                'is_active': True,
-            }
-        )
-        return account
+        return code, {
+            'name': name,
+            'name_ar': name_ar,
+            'account_type': 'EXPENSE',
+            'is_active': True,
+        }
+
+    def get_expense_account_id(self):
+        """Id of the category's expense account, without a query once cached"""
+        return account_resolver.get_id(*self._expense_account_spec())
+
+    def get_or_create_expense_account(self):
+        """Get or create appropriate expense account"""
+        return account_resolver.resolve(*self._expense_account_spec())
 
 
 class EmployeeAdvance(models.Model):
@@ -728,6 +883,8 @@ class EmployeeAdvance(models.Model):
     repaid_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name='المبلغ المسدد / Repaid Amount')
     reference = models.CharField(max_length=50, unique=True, verbose_name='المرجع / Reference')
     journal_entry = models.ForeignKey(JournalEntry, on_delete=models.SET_NULL, null=True, blank=True, related_name='advances', verbose_name='قيد اليومية / Journal Entry')
+    # Id of the entry above once moved to ArchivedJournalEntry (accounts.archive)
+    archived_journal_entry_id = models.BigIntegerField(null=True, blank=True, editable=False, verbose_name='القيد المؤرشف / Archived Journal Entry')
     created_by = models.ForeignKey(User, on_delete=models.PROTECT, verbose_name='أُنشئ بواسطة / Created By')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -763,10 +920,13 @@ class EmployeeAdvance(models.Model):
         """Create journal entry for employee advance"""
         if self.journal_entry:
             return self.journal_entry
+        if self.archived_journal_entry_id:
+            # Posted in a period that has since been archived
+            return None
         
         # Get accounts
-        cash_account = Account.get_cash_account()
-        advance_account = self.get_or_create_advance_account()
+        cash_account_id = Account.get_cash_account_id()
+        advance_account_id = self.get_advance_account_id()
         
         # Create journal entry
         entry = JournalEntry.objects.create(
@@ -780,7 +940,7 @@ class EmployeeAdvance(models.Model):
         # Create transactions
         Transaction.objects.create(
             journal_entry=entry,
-            account=advance_account,
+            account_id=advance_account_id,
             amount=self.amount,
             is_debit=True,
             description=f"Advance to {self.employee_name}"
@@ -788,7 +948,7 @@ class EmployeeAdvance(models.Model):
         
         Transaction.objects.create(
             journal_entry=entry,
-            account=cash_account,
+            account_id=cash_account_id,
             amount=self.amount,
             is_debit=False,
             description=f"Cash advance payment - {self.employee_name}"
@@ -803,18 +963,20 @@ class EmployeeAdvance(models.Model):
         
         return entry
 
+    ADVANCE_ACCOUNT_DEFAULTS = {
+        'name': 'Employee Advances',
+        'name_ar': 'سلف الموظفين',
+        'account_type': 'ASSET',
+        'is_active': True,
+    }
+
+    def get_advance_account_id(self):
+        """Id of the employee advances account, without a query once cached"""
+        return account_resolver.get_id('1300', self.ADVANCE_ACCOUNT_DEFAULTS)
+
     def get_or_create_advance_account(self):
         """Get or create employee advance account"""
-        account, created = Account.objects.get_or_create(
-            code='1300',
-            defaults={
-                'name': 'Employee Advances',
-                'name_ar': 'سلف الموظفين',
-                'account_type': 'ASSET',
-                'is_active': True,
-            }
-        )
-        return account
+        return account_resolver.resolve('1300', self.ADVANCE_ACCOUNT_DEFAULTS)
 
 
 class AccountingPeriod(models.Model):
@@ -824,6 +986,7 @@ class AccountingPeriod(models.Model):
     is_closed = models.BooleanField(default=False, verbose_name='مقفلة / Closed')
     closed_at = models.DateTimeField(null=True, blank=True, verbose_name='تاريخ الإقفال / Closed At')
     closed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='closed_periods', verbose_name='أُقفل بواسطة / Closed By')
+    archived_at = models.DateTimeField(null=True, blank=True, verbose_name='تاريخ الأرشفة / Archived At')
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -840,6 +1003,122 @@ class AccountingPeriod(models.Model):
         today = timezone.now().date()
         return self.start_date <= today <= self.end_date
 
+    @classmethod
+    def locked_until(cls):
+        """End date of the latest closed period; nothing may be posted on or before it"""
+        return account_resolver.locked_until()
+
+    @classmethod
+    def ensure_open(cls, entry_date):
+        """Raise ValueError if ``entry_date`` falls in (or before) a closed period"""
+        if isinstance(entry_date, str):
+            entry_date = parse_date(entry_date)
+        locked = cls.locked_until()
+        if locked and entry_date and entry_date <= locked:
+            raise ValueError(f"Cannot post entries dated {entry_date}: books are closed through {locked}")
+
+    def close(self, user):
+        """Post the closing entry, freeze balances and mark the period closed"""
+        from .services import close_period
+        return close_period(self, user)
+
+
+class AccountBalanceSnapshot(models.Model):
+    """Cumulative posted totals of an account at the end of a closed period.
+
+    Written by ``close_period`` after the closing entry; reports dated in or
+    after a closed period start from these rows (see ``accounts.reports``).
+    """
+    period = models.ForeignKey(AccountingPeriod, on_delete=models.CASCADE, related_name='balance_snapshots', verbose_name='الفترة / Period')
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='balance_snapshots', verbose_name='الحساب / Account')
+    debit_total = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='إجمالي المدين / Debit Total')
+    credit_total = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='إجمالي الدائن / Credit Total')
+    balance = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name='الرصيد / Balance')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'لقطة رصيد الحساب / Account Balance Snapshot'
+        verbose_name_plural = 'لقطات أرصدة الحسابات / Account Balance Snapshots'
+        unique_together = ['period', 'account']
+
+    def __str__(self):
+        return f"{self.period} - {self.account.code}: {self.balance}"
+
+
+class ArchivedJournalEntry(models.Model):
+    """Posted journal entry of a closed period, moved out of ``JournalEntry``.
+
+    Keeps the original primary key.  ``documents`` records the receipts,
+    expenses, etc. that pointed at the entry (``{'app.model': [pk, ...]}``),
+    since their foreign keys are cleared when it leaves the hot table
+    (see ``accounts.archive``).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    period = models.ForeignKey(AccountingPeriod, on_delete=models.PROTECT, related_name='archived_entries', verbose_name='الفترة / Period')
+    reference = models.CharField(max_length=50, db_index=True, verbose_name='المرجع / Reference')
+    date = models.DateField(db_index=True, verbose_name='التاريخ / Date')
+    description = models.TextField(verbose_name='الوصف / Description')
+    entry_type = models.CharField(max_length=20, choices=JournalEntry.ENTRY_TYPE_CHOICES, verbose_name='نوع القيد / Entry Type')
+    total_amount = models.DecimalField(max_digits=15, decimal_places=2, verbose_name='المبلغ الإجمالي / Total Amount')
+    is_posted = models.BooleanField(default=True, verbose_name='مُرحل / Posted')
+    posted_at = models.DateTimeField(null=True, blank=True, verbose_name='تاريخ الترحيل / Posted At')
+    posted_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name='مُرحل بواسطة / Posted By')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name='أُنشئ بواسطة / Created By')
+    reversal_of_id = models.BigIntegerField(null=True, blank=True, verbose_name='عكس للقيد / Reversal Of')
+    documents = models.JSONField(default=dict, blank=True, verbose_name='المستندات المرتبطة / Linked Documents')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الأرشفة / Archived At')
+
+    class Meta:
+        verbose_name = 'قيد مؤرشف / Archived Journal Entry'
+        verbose_name_plural = 'قيود مؤرشفة / Archived Journal Entries'
+        ordering = ['-date', '-created_at']
+
+    def __str__(self):
+        return f"{self.reference} - {self.date}"
+
+
+class ArchivedTransaction(models.Model):
+    """Line of an ``ArchivedJournalEntry``, with its original primary key"""
+    id = models.BigIntegerField(primary_key=True)
+    journal_entry = models.ForeignKey(ArchivedJournalEntry, on_delete=models.CASCADE, related_name='transactions', verbose_name='قيد اليومية / Journal Entry')
+    account = models.ForeignKey(Account, on_delete=models.PROTECT, related_name='+', verbose_name='الحساب / Account')
+    amount = models.DecimalField(max_digits=15, decimal_places=2, verbose_name='المبلغ / Amount')
+    is_debit = models.BooleanField(verbose_name='مدين / Debit')
+    description = models.CharField(max_length=500, blank=True, verbose_name='الوصف / Description')
+    cost_center = models.ForeignKey(CostCenter, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name='مركز التكلفة / Cost Center')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'معاملة مؤرشفة / Archived Transaction'
+        verbose_name_plural = 'معاملات مؤرشفة / Archived Transactions'
+
+
+class LedgerLine(models.Model):
+    """Read-only SQL view: every transaction line, hot and archived.
+
+    Historical reports read it when their dates reach into an archived
+    period.  It contains both the archived detail and the carried-forward
+    entries that replace it, so readers exclude ``CARRY_FORWARD`` entries.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    journal_entry_id = models.BigIntegerField()
+    account = models.ForeignKey(Account, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    is_debit = models.BooleanField()
+    description = models.CharField(max_length=500)
+    date = models.DateField()
+    reference = models.CharField(max_length=50)
+    entry_type = models.CharField(max_length=20)
+    is_posted = models.BooleanField()
+    created_at = models.DateTimeField()
+    archived = models.BooleanField()
+
+    class Meta:
+        managed = False
+        db_table = 'accounts_ledgerline'
+
 
 class Budget(models.Model):
     account = models.ForeignKey(Account, on_delete=models.CASCADE, verbose_name='الحساب / Account')
@@ -934,32 +1213,84 @@ class StudentWithdrawal(models.Model):
         return f"Withdrawal: {self.enrollment.student.full_name} from {self.enrollment.course.name}"
 
 
+class LedgerEvent(models.Model):
+    """Outbox row written in the same transaction as a ledger change (see accounts/events.py)"""
+    ENTRY_POSTED = 'EntryPosted'
+    ENTRY_REVERSED = 'EntryReversed'
+    RECEIPT_CREATED = 'ReceiptCreated'
+    PERIOD_CLOSED = 'PeriodClosed'
+    NAME_CHOICES = [
+        (ENTRY_POSTED, 'ترحيل قيد / Entry posted'),
+        (ENTRY_REVERSED, 'عكس قيد / Entry reversed'),
+        (RECEIPT_CREATED, 'إيصال جديد / Receipt created'),
+        (PERIOD_CLOSED, 'إقفال فترة / Period closed'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    name = models.CharField(max_length=30, choices=NAME_CHOICES, verbose_name='الحدث / Event')
+    payload = models.JSONField(default=dict, verbose_name='البيانات / Payload')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'حدث دفتر الأستاذ / Ledger Event'
+        verbose_name_plural = 'أحداث دفتر الأستاذ / Ledger Events'
+
+    def __str__(self):
+        return f"#{self.pk} {self.name}"
+
+
+class LedgerProjection(models.Model):
+    """Delivery cursor of one projection handler over ``LedgerEvent``"""
+    name = models.CharField(max_length=100, unique=True, verbose_name='الإسقاط / Projection')
+    position = models.BigIntegerField(default=0, verbose_name='آخر حدث مُسلَّم / Last Delivered Event')
+    failures = models.PositiveIntegerField(default=0, verbose_name='مرات الفشل / Failures')
+    error = models.TextField(blank=True, verbose_name='الخطأ / Error')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'إسقاط الأحداث / Ledger Projection'
+        verbose_name_plural = 'إسقاطات الأحداث / Ledger Projections'
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+
 # Helper functions for account creation
+def _employee_salary_spec(employee):
+    return f"5100-{employee.pk:04d}", lambda: {
+        'name': f'Salary - {employee.full_name}',
+        'name_ar': f'راتب - {employee.full_name}',
+        'account_type': 'EXPENSE',
+        'is_active': True,
+    }
+
+
+def _teacher_salary_spec(teacher):
+    return f"5110-{teacher.pk:04d}", lambda: {
+        'name': f'Teacher Salary - {teacher.full_name}',
+        'name_ar': f'راتب مدرس - {teacher.full_name}',
+        'account_type': 'EXPENSE',
+        'is_active': True,
+    }
+
+
 def get_or_create_employee_salary_account(employee):
     """Create salary account for employee"""
-    code = f"5100-{employee.pk:04d}"
-    account, created = Account.objects.get_or_create(
-        code=code,
-        defaults={
-            'name': f'Salary - {employee.full_name}',
-            'name_ar': f'راتب - {employee.full_name}',
-            'account_type': 'EXPENSE',
-            'is_active': True,
-        }
-    )
-    return account
+    return account_resolver.resolve(*_employee_salary_spec(employee))
+
+
+def get_employee_salary_account_id(employee):
+    """Id of the employee's salary account, without a query once cached"""
+    return account_resolver.get_id(*_employee_salary_spec(employee))
 
 
 def get_or_create_teacher_salary_account(teacher):
     """Create salary account for teacher"""
-    code = f"5110-{teacher.pk:04d}"
-    account, created = Account.objects.get_or_create(
-        code=code,
-        defaults={
-            'name': f'Teacher Salary - {teacher.full_name}',
-            'name_ar': f'راتب مدرس - {teacher.full_name}',
-            'account_type': 'EXPENSE',
-            'is_active': True,
-        }
-    )
-    return account
\ No newline at end of file
+    return account_resolver.resolve(*_teacher_salary_spec(teacher))
+
+
+def get_teacher_salary_account_id(teacher):
+    """Id of the teacher's salary account, without a query once cached"""
+    return account_resolver.get_id(*_teacher_salary_spec(teacher))
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""Course prices and discount rules for the front desk forms, as one bundle.
+
+The bundle holds every active course with its price and every active
+discount rule.  It is cached under a key derived from the row count and
+latest ``updated_at`` of both tables, so a change made through any worker
+process gives a new key everywhere, even with a per-process cache;
+``version`` is a hash of the content.  Pages embed it with ``{% pricing_catalog_script %}``
+(``accounts.templatetags.pricing``) or fetch ``accounts:pricing_catalog``,
+and compute net amounts in the browser (the rule of
+``StudentEnrollment.net_amount``) instead of asking the server on every
+selection change.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+
+from .models import Course, DiscountRule
+
+CATALOG_TTL = 60 * 60
+_CATALOG_KEY = 'accounts:pricing:catalog'
+
+
+def _build():
+    courses = [{
+        'id': course.pk,
+        'name': course.name,
+        'name_ar': course.name_ar,
+        'price': course.price,
+    } for course in Course.objects.filter(is_active=True).order_by('name', 'pk')]
+    discounts = [{
+        'id': rule.pk,
+        'reason': rule.reason,
+        'reason_ar': rule.reason_ar,
+        'percent': rule.discount_percent,
+        'amount': rule.discount_amount,
+        'description': rule.description,
+    } for rule in DiscountRule.objects.filter(is_active=True).order_by('reason')]
+    body = json.dumps({'courses': courses, 'discounts': discounts}, cls=DjangoJSONEncoder,
+                      ensure_ascii=False, sort_keys=True)
+    version = hashlib.sha1(body.encode('utf-8')).hexdigest()[:12]
+    return {'version': version, 'courses': courses, 'discounts': discounts}
+
+
+def _data_version():
+    """Fingerprint of the course and discount rule tables: changes on every save or delete"""
+    courses = Course.objects.aggregate(count=Count('id'), modified=Max('updated_at'))
+    discounts = DiscountRule.objects.aggregate(count=Count('id'), modified=Max('updated_at'))
+    token = '|'.join(str(v) for v in (
+        courses['count'], courses['modified'], discounts['count'], discounts['modified'],
+    ))
+    return hashlib.sha1(token.encode('utf-8')).hexdigest()[:12]
+
+
+def catalog():
+    """``{'version', 'courses': [...], 'discounts': [...]}``, from the cache when possible"""
+    key = f'{_CATALOG_KEY}:{_data_version()}'
+    bundle = cache.get(key)
+    if bundle is None:
+        bundle = _build()
+        cache.set(key, bundle, CATALOG_TTL)
+    return bundle
+
+
+def find_discount(reason):
+    """Active discount rule of the bundle with this ``reason``, or None"""
+    for rule in catalog()['discounts']:
+        if rule['reason'] == reason:
+            return rule
+    return None
+
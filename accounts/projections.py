@@ -0,0 +1,28 @@
+"""Projection handlers of the accounts app (see accounts/events.py)."""
+from datetime import date
+
+from .events import projection
+from .models import AccountingPeriod, Budget, LedgerEvent
+from .reports import refresh_budget_actuals
+
+
+@projection('accounts.budget_actuals', events=[LedgerEvent.ENTRY_POSTED])
+def budget_actuals(events):
+    """Keep ``Budget.actual_amount`` of open periods current as entries are posted"""
+    touched = {}
+    for event in events:
+        day = date.fromisoformat(event.payload['date'])
+        touched.setdefault(day, set()).update(event.payload['accounts'])
+
+    periods = AccountingPeriod.objects.filter(
+        is_closed=False, start_date__lte=max(touched), end_date__gte=min(touched),
+    )
+    budgets = []
+    for period in periods:
+        accounts = set().union(*(ids for day, ids in touched.items()
+                                 if period.start_date <= day <= period.end_date))
+        if accounts:
+            budgets.extend(Budget.objects.filter(period=period, account_id__in=accounts)
+                           .select_related('account', 'period'))
+    # Recomputed from the ledger, so a batch delivered twice changes nothing
+    refresh_budget_actuals(budgets)
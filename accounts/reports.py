@@ -0,0 +1,286 @@
+"""Account balances for the financial reports and budget actuals.
+
+Balances are built from the snapshot of the latest closed period that ends
+on or before the report date, plus one grouped query over the posted
+transactions after it, instead of summing each account's whole history.
+The income statement instead sums the movements between two dates,
+closing entries excluded (``movements_between``).
+Budget actuals for any number of budgets likewise come from one grouped
+query.
+
+Dates inside archived periods (see ``accounts.archive``) are served from
+the ``LedgerLine`` view of hot and archived transactions instead.
+
+``ledger_version`` and ``student_statement_version`` are cheap fingerprints of
+the data behind the reports, used for conditional GET (see
+``accounts.conditional``).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Case, Count, DecimalField, Exists, IntegerField, Max, OuterRef, Q, Sum, Value, When
+from django.utils import timezone
+
+from pages.exports import Column, MONEY_FORMAT
+
+from .models import (
+    Account, AccountBalanceSnapshot, AccountingPeriod, Budget, JournalEntry, LedgerLine, StudentReceipt, Transaction,
+)
+
+# Entry types left out when reading the LedgerLine view: the archived detail is there
+ARCHIVE_SUMMARIES = ['CARRY_FORWARD']
+
+
+def net_balance(account_type, debits, credits):
+    """Signed balance for the account's normal side"""
+    if account_type in ['ASSET', 'EXPENSE']:
+        return debits - credits
+    return credits - debits
+
+
+def balances_as_of(as_of=None):
+    """Return ``{account_id: (debit_total, credit_total)}`` of posted transactions up to ``as_of``.
+
+    ``as_of=None`` means everything posted so far.
+    """
+    closed = list(AccountingPeriod.objects.filter(is_closed=True).annotate(
+        has_snapshots=Exists(AccountBalanceSnapshot.objects.filter(period=OuterRef('pk'))),
+    ).only('pk', 'end_date', 'archived_at'))
+    # Periods closed without snapshots (before they existed) fall back to an earlier one, or the full history
+    period = max((p for p in closed if p.has_snapshots and (as_of is None or p.end_date <= as_of)),
+                 key=lambda p: p.end_date, default=None)
+    archived = [p.end_date for p in closed if p.archived_at]
+
+    totals = defaultdict(lambda: [Decimal('0'), Decimal('0')])
+    if as_of is not None and archived and as_of < max(archived):
+        tail, date = LedgerLine.objects.filter(is_posted=True).exclude(entry_type__in=ARCHIVE_SUMMARIES), 'date'
+    else:
+        tail, date = Transaction.objects.filter(journal_entry__is_posted=True), 'journal_entry__date'
+    if period is not None:
+        for account_id, debits, credits in AccountBalanceSnapshot.objects.filter(period=period).values_list(
+            'account_id', 'debit_total', 'credit_total'
+        ):
+            totals[account_id] = [debits, credits]
+        tail = tail.filter(**{f'{date}__gt': period.end_date})
+    if as_of is not None:
+        tail = tail.filter(**{f'{date}__lte': as_of})
+
+    money = DecimalField(max_digits=15, decimal_places=2)
+    rows = tail.values('account_id').annotate(
+        debits=Sum(Case(When(is_debit=True, then='amount'), default=Value(0), output_field=money)),
+        credits=Sum(Case(When(is_debit=False, then='amount'), default=Value(0), output_field=money)),
+    )
+    for row in rows:
+        entry = totals[row['account_id']]
+        entry[0] += row['debits'] or Decimal('0')
+        entry[1] += row['credits'] or Decimal('0')
+    return {account_id: tuple(value) for account_id, value in totals.items()}
+
+
+def movements_between(start=None, end=None):
+    """Return ``{account_id: (debits, credits)}`` of posted transactions dated from ``start`` to ``end``.
+
+    Closing entries are left out, so revenue and expense accounts show what
+    was earned and spent in the range even after its period was closed.
+    ``None`` leaves that side of the range open.
+    """
+    archived = list(AccountingPeriod.objects.filter(archived_at__isnull=False).values_list('end_date', flat=True))
+    if archived and (start is None or start <= max(archived)):
+        lines, date = LedgerLine.objects.filter(is_posted=True).exclude(entry_type__in=ARCHIVE_SUMMARIES), 'date'
+        entry_type = 'entry_type'
+    else:
+        lines, date = Transaction.objects.filter(journal_entry__is_posted=True), 'journal_entry__date'
+        entry_type = 'journal_entry__entry_type'
+    lines = lines.exclude(**{entry_type: 'CLOSING'})
+    if start is not None:
+        lines = lines.filter(**{f'{date}__gte': start})
+    if end is not None:
+        lines = lines.filter(**{f'{date}__lte': end})
+
+    money = DecimalField(max_digits=15, decimal_places=2)
+    rows = lines.values('account_id').annotate(
+        debits=Sum(Case(When(is_debit=True, then='amount'), default=Value(0), output_field=money)),
+        credits=Sum(Case(When(is_debit=False, then='amount'), default=Value(0), output_field=money)),
+    )
+    return {
+        row['account_id']: (row['debits'] or Decimal('0'), row['credits'] or Decimal('0'))
+        for row in rows
+    }
+
+
+def income_statement_start(end=None):
+    """Default start of an income statement ending on ``end``: its accounting period, else January 1st"""
+    end = end or timezone.localdate()
+    period = AccountingPeriod.objects.filter(start_date__lte=end, end_date__gte=end).order_by('-start_date').first()
+    return period.start_date if period else end.replace(month=1, day=1)
+
+
+def report_accounts(account_types, as_of=None, balances=None):
+    """Active accounts of ``account_types`` ordered by code, with report figures.
+
+    Each account gets ``report_debits``, ``report_credits`` and
+    ``report_balance`` attributes for the given date.
+    """
+    if balances is None:
+        balances = balances_as_of(as_of)
+    accounts = list(Account.objects.filter(account_type__in=account_types, is_active=True).order_by('code'))
+    zero = (Decimal('0'), Decimal('0'))
+    for account in accounts:
+        account.report_debits, account.report_credits = balances.get(account.pk, zero)
+        account.report_balance = net_balance(account.account_type, account.report_debits, account.report_credits)
+    return accounts
+
+
+def _descendants(account_ids):
+    """``{account_id: [account_id, *descendant ids]}`` from one query over the tree"""
+    children = defaultdict(list)
+    for pk, parent_id in Account.objects.values_list('pk', 'parent_id'):
+        if parent_id:
+            children[parent_id].append(pk)
+    subtrees = {}
+    for account_id in account_ids:
+        ids, stack = [], [account_id]
+        while stack:
+            current = stack.pop()
+            ids.append(current)
+            stack.extend(children[current])
+        subtrees[account_id] = ids
+    return subtrees
+
+
+def budget_actuals(budgets, rollup=False):
+    """Actual amounts of ``budgets`` as ``{budget_id: amount}``.
+
+    The actual is the net movement on the account's normal side of posted
+    transactions dated inside the budget period, closing entries excluded.
+    All budgets are served by one query grouped by account and period;
+    with ``rollup`` the movements of the account's descendants are included.
+    Periods are assumed not to overlap.
+    """
+    budgets = list(budgets)
+    if not budgets:
+        return {}
+    periods = {b.period_id: b.period for b in budgets}
+    subtrees = _descendants({b.account_id for b in budgets}) if rollup else {
+        b.account_id: [b.account_id] for b in budgets
+    }
+    account_ids = {pk for ids in subtrees.values() for pk in ids}
+
+    if any(period.archived_at for period in periods.values()):
+        lines, entry = LedgerLine.objects.all(), ''
+    else:
+        lines, entry = Transaction.objects.all(), 'journal_entry__'
+    in_periods = Q()
+    for period in periods.values():
+        in_periods |= Q(**{f'{entry}date__range': (period.start_date, period.end_date)})
+    money = DecimalField(max_digits=15, decimal_places=2)
+    rows = lines.filter(
+        in_periods, account_id__in=account_ids, **{f'{entry}is_posted': True},
+    ).exclude(**{f'{entry}entry_type__in': ['CLOSING', *ARCHIVE_SUMMARIES]}).annotate(
+        period_id=Case(
+            *[When(**{f'{entry}date__range': (p.start_date, p.end_date)}, then=Value(p.pk)) for p in periods.values()],
+            output_field=IntegerField(),
+        ),
+    ).values('account_id', 'period_id').annotate(
+        debits=Sum(Case(When(is_debit=True, then='amount'), default=Value(0), output_field=money)),
+        credits=Sum(Case(When(is_debit=False, then='amount'), default=Value(0), output_field=money)),
+    )
+    movements = {(r['account_id'], r['period_id']): (r['debits'] or Decimal('0'), r['credits'] or Decimal('0')) for r in rows}
+
+    zero = (Decimal('0'), Decimal('0'))
+    actuals = {}
+    for budget in budgets:
+        debits = credits = Decimal('0')
+        for account_id in subtrees[budget.account_id]:
+            dr, cr = movements.get((account_id, budget.period_id), zero)
+            debits += dr
+            credits += cr
+        actuals[budget.pk] = net_balance(budget.account.account_type, debits, credits)
+    return actuals
+
+
+def refresh_budget_actuals(budgets=None, rollup=False):
+    """Store current actuals on ``budgets`` (all by default); returns the number changed"""
+    if budgets is None:
+        budgets = Budget.objects.select_related('account', 'period')
+    budgets = list(budgets)
+    actuals = budget_actuals(budgets, rollup=rollup)
+    changed = [b for b in budgets if b.actual_amount != actuals[b.pk]]
+    for budget in changed:
+        budget.actual_amount = actuals[budget.pk]
+    Budget.objects.bulk_update(changed, ['actual_amount'], batch_size=500)
+    return len(changed)
+
+
+def _latest(*moments):
+    moments = [m for m in moments if m is not None]
+    return max(moments) if moments else None
+
+
+def ledger_version():
+    """``(token, last_modified)`` that changes whenever a financial report may.
+
+    Covers new, edited, posted and deleted journal entries, account changes
+    (stored balances bump ``updated_at``) and closing/reopening periods.
+    """
+    entries = JournalEntry.objects.aggregate(count=Count('id'), last_id=Max('id'), modified=Max('updated_at'))
+    accounts = Account.objects.aggregate(count=Count('id'), modified=Max('updated_at'))
+    closed = AccountingPeriod.objects.filter(is_closed=True).aggregate(count=Count('id'), last=Max('end_date'))
+    token = '|'.join(str(v) for v in (
+        entries['count'], entries['last_id'], entries['modified'],
+        accounts['count'], accounts['modified'], closed['count'], closed['last'],
+    ))
+    return token, _latest(entries['modified'], accounts['modified'])
+
+
+def student_statement_version(student):
+    """``(token, last_modified)`` of what a student's statement shows"""
+    lines = Transaction.objects.filter(account_id=student.account_id).aggregate(
+        count=Count('id'), last_id=Max('id'), modified=Max('journal_entry__updated_at'),
+    ) if student.account_id else {'count': 0, 'last_id': None, 'modified': None}
+    receipts = StudentReceipt.objects.filter(student_profile=student).aggregate(
+        count=Count('id'), modified=Max('updated_at'),
+    )
+    token = '|'.join(str(v) for v in (
+        student.updated_at, student.account_id, lines['count'], lines['last_id'], lines['modified'],
+        receipts['count'], receipts['modified'],
+    ))
+    return token, _latest(student.updated_at, lines['modified'], receipts['modified'])
+
+
+LEDGER_COLUMNS = [
+    Column('Date', 'date', width=12, number_format='yyyy-mm-dd'),
+    Column('Reference', 'reference', width=14),
+    Column('Description', 'description', width=40),
+    Column('Debit', 'debit', width=14, number_format=MONEY_FORMAT),
+    Column('Credit', 'credit', width=14, number_format=MONEY_FORMAT),
+    Column('RunningBalance', 'running_balance', width=16, number_format=MONEY_FORMAT),
+]
+
+
+def ledger_transactions(account, include_archive=False):
+    """Lines of ``account`` in date order; with ``include_archive`` from ``LedgerLine``"""
+    if include_archive:
+        return LedgerLine.objects.filter(account=account).exclude(
+            entry_type__in=ARCHIVE_SUMMARIES,
+        ).order_by('date', 'created_at')
+    return Transaction.objects.filter(account=account).select_related('journal_entry').order_by(
+        'journal_entry__date', 'journal_entry__created_at'
+    )
+
+
+def ledger_rows(account, include_archive=False):
+    """Ledger export rows of ``account`` with a running balance (see ``LEDGER_COLUMNS``)"""
+    debit_normal = account.account_type in ['ASSET', 'EXPENSE']
+    running = Decimal('0.00')
+    for t in ledger_transactions(account, include_archive).iterator(chunk_size=2000):
+        running += t.amount if t.is_debit == debit_normal else -t.amount
+        entry = t if include_archive else t.journal_entry
+        yield {
+            'date': entry.date,
+            'reference': entry.reference,
+            'description': t.description,
+            'debit': t.amount if t.is_debit else Decimal('0'),
+            'credit': t.amount if not t.is_debit else Decimal('0'),
+            'running_balance': running,
+        }
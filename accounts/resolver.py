@@ -0,0 +1,129 @@
+"""In-process cache of account code -> id for system and per-course accounts,
+and of the end of the last closed accounting period.
+
+Posting code looks up the same handful of accounts (cash, course revenue,
+expense categories, advances, salaries) over and over, each time through a
+``get_or_create`` round trip.  ``account_resolver`` keeps the ids in process
+memory so the common case costs no query at all.
+
+The cache is kept honest by the ``Account`` post_save/post_delete signals
+(see ``accounts.signals``): saved rows are (re)registered once their
+transaction commits, deleted rows are dropped straight away.  Ids are never
+cached from inside a transaction that may still roll back.
+
+``locked_until`` (behind ``AccountingPeriod.ensure_open``) is dropped when an
+``AccountingPeriod`` is saved or deleted in this process; periods closed by
+another process are seen after at most ``PERIOD_TTL`` seconds.
+"""
+import threading
+import time
+
+from django.db import DatabaseError, transaction
+from django.db.models import Max
+
+PERIOD_TTL = 60
+
+
+class AccountResolver:
+    def __init__(self):
+        self._ids = {}
+        self._locked_until = None     # (end_date, monotonic time read)
+        self._lock = threading.Lock()
+
+    def get_id(self, code, defaults=None):
+        """Return the id of the account ``code``, creating it if needed.
+
+        ``defaults`` may be a dict or a callable returning one; it is only
+        evaluated when the account has to be created.
+        """
+        account_id = self._ids.get(code)
+        if account_id is not None:
+            return account_id
+        return self._fetch(code, defaults).pk
+
+    def resolve(self, code, defaults=None):
+        """Return the ``Account`` instance for ``code`` (one query on a hit)."""
+        from .models import Account
+
+        account_id = self._ids.get(code)
+        if account_id is not None:
+            try:
+                return Account.objects.get(pk=account_id)
+            except Account.DoesNotExist:
+                self.forget(code)
+        return self._fetch(code, defaults)
+
+    def _fetch(self, code, defaults):
+        from .models import Account
+
+        account = Account.objects.filter(code=code).first()
+        if account is None:
+            if callable(defaults):
+                defaults = defaults()
+            account, _ = Account.objects.get_or_create(code=code, defaults=defaults or {})
+        self.remember(account.code, account.pk)
+        return account
+
+    def remember(self, code, account_id):
+        """Cache ``code`` once the current transaction (if any) commits."""
+        def store():
+            with self._lock:
+                self._ids[code] = account_id
+        transaction.on_commit(store)
+
+    def forget(self, code=None, account_id=None):
+        with self._lock:
+            if code is not None:
+                self._ids.pop(code, None)
+            if account_id is not None:
+                for key in [k for k, v in self._ids.items() if v == account_id]:
+                    del self._ids[key]
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+            self._locked_until = None
+
+    def locked_until(self):
+        """End date of the latest closed period (``None`` when none is closed)"""
+        from .models import AccountingPeriod
+
+        cached = self._locked_until
+        if cached is not None and time.monotonic() - cached[1] < PERIOD_TTL:
+            return cached[0]
+        read_at = time.monotonic()
+        end = AccountingPeriod.objects.filter(is_closed=True).aggregate(end=Max('end_date'))['end']
+
+        def store():
+            with self._lock:
+                self._locked_until = (end, read_at)
+        transaction.on_commit(store)
+        return end
+
+    def forget_periods(self):
+        """Drop ``locked_until`` now and again once the current transaction commits"""
+        def drop():
+            with self._lock:
+                self._locked_until = None
+        drop()
+        transaction.on_commit(drop)
+
+    def warm(self):
+        """Load every system and per-course account id in one query.
+
+        Per-student receivable accounts are left out; they are many and
+        each one is only posted to now and then.
+        """
+        from .models import Account
+
+        try:
+            rows = list(Account.objects.filter(is_student_account=False).values_list('code', 'id'))
+        except DatabaseError:
+            # Tables not migrated yet
+            return 0
+        with self._lock:
+            self._ids.update(rows)
+        return len(rows)
+
+
+account_resolver = AccountResolver()
@@ -0,0 +1,79 @@
+"""Read-only serializers for the sync API (see ``accounts.api_views``)."""
+from rest_framework import serializers
+
+from attendance.models import Attendance
+from students.models import Student as StudentProfile
+from .models import Account, JournalEntry, StudentReceipt, Transaction
+
+
+class SparseFieldsMixin:
+    """Accept ``fields=[...]`` and drop every other field from the output"""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class AccountSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Account
+        fields = [
+            'id', 'code', 'name', 'name_ar', 'account_type', 'parent', 'is_active',
+            'balance', 'is_course_account', 'is_student_account', 'updated_at',
+        ]
+
+
+class TransactionLineSerializer(serializers.ModelSerializer):
+    account_code = serializers.CharField(source='account.code')
+
+    class Meta:
+        model = Transaction
+        fields = ['id', 'account', 'account_code', 'amount', 'is_debit', 'description', 'cost_center']
+
+
+class JournalEntrySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    lines = TransactionLineSerializer(source='transactions', many=True)
+
+    class Meta:
+        model = JournalEntry
+        fields = [
+            'id', 'reference', 'date', 'description', 'entry_type', 'total_amount',
+            'is_posted', 'posted_at', 'reversal_of', 'updated_at', 'lines',
+        ]
+
+
+class StudentReceiptSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = StudentReceipt
+        fields = [
+            'id', 'receipt_number', 'date', 'student_profile', 'student_name', 'course',
+            'course_name', 'amount', 'paid_amount', 'discount_percent', 'discount_amount',
+            'payment_method', 'enrollment', 'journal_entry', 'is_printed', 'updated_at',
+        ]
+
+
+class StudentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    ar_account = serializers.PrimaryKeyRelatedField(source='account', read_only=True)
+    # Stored balance of the receivable account, no per-row aggregate
+    ar_balance = serializers.DecimalField(
+        source='account.balance', max_digits=15, decimal_places=2, read_only=True, allow_null=True,
+    )
+    changed_at = serializers.DateTimeField(read_only=True)
+
+    class Meta:
+        model = StudentProfile
+        fields = [
+            'id', 'full_name', 'student_number', 'phone', 'branch', 'is_active',
+            'ar_account', 'ar_balance', 'updated_at', 'changed_at',
+        ]
+
+
+class AttendanceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    student_name = serializers.CharField(source='student.full_name')
+
+    class Meta:
+        model = Attendance
+        fields = ['id', 'student', 'student_name', 'classroom', 'date', 'status', 'notes', 'updated_at']
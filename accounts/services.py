@@ -0,0 +1,759 @@
+"""Posting services for the accounts app.
+
+The model methods (``create_accrual_enrollment_entry``, ``post_entry`` ...)
+handle one document at a time, write in autocommit and recalculate balances
+from the full transaction history.  The functions here do the same
+bookkeeping inside one database transaction, using bulk inserts and
+``Account.apply_transaction_deltas`` for the balances.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import events
+from .models import (
+    Account, AccountBalanceSnapshot, AccountingPeriod, JournalEntry, NumberSequence,
+    StudentEnrollment, StudentReceipt, Transaction
+)
+from .resolver import account_resolver
+
+
+def bulk_post_entries(entries, lines, user, emit_events=True):
+    """Insert and post many journal entries at once.
+
+    ``entries`` is a list of unsaved ``JournalEntry`` objects and ``lines`` a
+    parallel list holding the unsaved ``Transaction`` objects of each entry.
+    Entries without a reference get one from a single reserved block, entries
+    and lines are bulk inserted already posted, and balances move once per
+    affected account.  Entries dated in a closed period are refused.
+    With ``emit_events=False`` the caller writes the ``EntryPosted`` events
+    (``events.entry_posted_events``), usually in one insert with its own.
+    Must be called inside ``transaction.atomic()``.
+    """
+    if not entries:
+        return []
+
+    for entry, entry_lines in zip(entries, lines):
+        total_debits = sum((t.amount for t in entry_lines if t.is_debit), Decimal('0'))
+        total_credits = sum((t.amount for t in entry_lines if not t.is_debit), Decimal('0'))
+        if total_debits != total_credits:
+            raise ValueError(f"Debits ({total_debits}) must equal credits ({total_credits})")
+    AccountingPeriod.ensure_open(min(entry.date for entry in entries))
+
+    now = timezone.now()
+    unnumbered = [entry for entry in entries if not entry.reference]
+    if unnumbered:
+        first = NumberSequence.allocate_block('journal_entry', len(unnumbered))
+        for offset, entry in enumerate(unnumbered):
+            entry.reference = f"JE-{first + offset:06d}"
+    for entry in entries:
+        entry.is_posted = True
+        entry.posted_at = now
+        entry.posted_by = user
+        if not entry.created_by_id:
+            entry.created_by = user
+
+    entries = JournalEntry.objects.bulk_create(entries)
+    if any(entry.pk is None for entry in entries):
+        # Backends without RETURNING support: read the ids back by reference
+        ids = dict(JournalEntry.objects.filter(
+            reference__in=[e.reference for e in entries]
+        ).values_list('reference', 'pk'))
+        for entry in entries:
+            entry.pk = ids[entry.reference]
+
+    all_lines = []
+    for entry, entry_lines in zip(entries, lines):
+        for line in entry_lines:
+            line.journal_entry = entry
+            all_lines.append(line)
+    Transaction.objects.bulk_create(all_lines)
+
+    Account.apply_transaction_deltas(all_lines)
+    if emit_events:
+        events.entry_posted(entries, lines)
+    return entries
+
+
+def build_enrollment_entry(enrollment, ar_account_id, revenue_account_id, user):
+    """Unsaved accrual entry and lines for an enrollment (see create_accrual_enrollment_entry)"""
+    student, course = enrollment.student, enrollment.course
+    net = enrollment.net_amount
+    entry = JournalEntry(
+        date=enrollment.enrollment_date,
+        description=f"Student enrollment: {student.full_name} in {course.name}",
+        entry_type='ENROLLMENT',
+        total_amount=net,
+        created_by=user,
+    )
+    lines = [
+        Transaction(
+            account_id=ar_account_id,
+            amount=net,
+            is_debit=True,
+            description=f"Enrollment receivable - {student.full_name}",
+        ),
+        Transaction(
+            account_id=revenue_account_id,
+            amount=net,
+            is_debit=False,
+            description=f"Deferred revenue - {course.name}",
+        ),
+    ]
+    return entry, lines
+
+
+def build_receipt_entry(receipt, cash_account_id, ar_account_id, user):
+    """Unsaved payment entry and lines for a receipt (see create_accrual_journal_entry)"""
+    student_name = receipt.get_student_name()
+    course_name = receipt.get_course_name()
+    entry = JournalEntry(
+        date=receipt.date,
+        description=f"Payment receipt: {student_name} - {course_name}",
+        entry_type='PAYMENT',
+        total_amount=receipt.paid_amount,
+        created_by=user,
+    )
+    lines = [
+        Transaction(
+            account_id=cash_account_id,
+            amount=receipt.paid_amount,
+            is_debit=True,
+            description=f"Cash received from {student_name}",
+        ),
+        Transaction(
+            account_id=ar_account_id,
+            amount=receipt.paid_amount,
+            is_debit=False,
+            description=f"Payment received - {course_name}",
+        ),
+    ]
+    return entry, lines
+
+
+def with_enrollment_balances(enrollments):
+    """Annotate an enrollment queryset with its figures, computed in SQL.
+
+    Adds ``total_paid``, ``net_due`` and ``remaining_due``: the same values
+    as the ``amount_paid``, ``net_amount`` and ``balance_due`` properties,
+    which run one ``payments`` aggregate per access.
+    """
+    from django.db.models import DecimalField, F, Sum, Value
+    from django.db.models.functions import Coalesce, Greatest
+
+    money = DecimalField(max_digits=12, decimal_places=2)
+    zero = Value(Decimal('0'), output_field=money)
+    # Multiply by 0.01 rather than divide by 100: SQLite divides whole-number decimals as integers
+    net = Greatest(
+        F('total_amount') - F('total_amount') * F('discount_percent') * Value(Decimal('0.01'), output_field=money)
+        - F('discount_amount'),
+        zero, output_field=money,
+    )
+    return enrollments.annotate(
+        total_paid=Coalesce(Sum('payments__paid_amount'), zero, output_field=money),
+        net_due=net,
+    ).annotate(
+        remaining_due=Greatest(F('net_due') - F('total_paid'), zero, output_field=money),
+    )
+
+
+def ensure_student_ar_accounts(students):
+    """Make sure every student profile is linked to an AR account.
+
+    Returns ``{student_id: account_id}``.  Missing accounts are created and
+    linked with bulk queries instead of calling ``Student.ensure_ar_account`` (which
+    saves the student) once per student.
+    """
+    from students.models import Student as SProfile
+
+    mapping = {s.pk: s.account_id for s in students if s.account_id}
+    missing = [s for s in students if not s.account_id]
+    if not missing:
+        return mapping
+
+    ar_parent = Account.get_student_ar_parent()
+    by_code = {Account.student_ar_code(s): s for s in missing}
+    existing = dict(Account.objects.filter(code__in=by_code).values_list('code', 'pk'))
+    created = Account.objects.bulk_create([
+        Account(code=code, **Account.student_ar_defaults(s, ar_parent))
+        for code, s in by_code.items() if code not in existing
+    ])
+    if all(a.pk for a in created):
+        existing.update((a.code, a.pk) for a in created)
+    else:
+        existing = dict(Account.objects.filter(code__in=by_code).values_list('code', 'pk'))
+
+    for code, student in by_code.items():
+        student.account_id = existing[code]
+        mapping[student.pk] = student.account_id
+    SProfile.objects.bulk_update(missing, ['account'])
+    return mapping
+
+
+def enroll_students(course, students, user, enrollment_date=None, payment_method='CASH'):
+    """Enroll a group of students in a course in one atomic operation.
+
+    Does what ``register_course`` and ``create_accrual_enrollment_entry`` do
+    for a single student: each student's default discounts are applied and
+    the net amount is accrued (Dr student AR / Cr course deferred revenue).
+    Students already enrolled in the course are skipped, and no entry is
+    created for a fully discounted enrollment.
+
+    Returns ``(enrollments, skipped_students)``.
+    """
+    enrollment_date = enrollment_date or timezone.now().date()
+    students = list(students)
+
+    with transaction.atomic():
+        enrolled_ids = set(StudentEnrollment.objects.filter(
+            course=course, student__in=students
+        ).values_list('student_id', flat=True))
+        skipped = [s for s in students if s.pk in enrolled_ids]
+        students = [s for s in students if s.pk not in enrolled_ids]
+        if not students:
+            return [], skipped
+
+        ar_accounts = ensure_student_ar_accounts(students)
+        revenue_account_id = Account.get_course_revenue_account_id(course)
+
+        enrollments = StudentEnrollment.objects.bulk_create([
+            StudentEnrollment(
+                student=student,
+                course=course,
+                enrollment_date=enrollment_date,
+                total_amount=course.price,
+                discount_percent=student.discount_percent or Decimal('0'),
+                discount_amount=student.discount_amount or Decimal('0'),
+                payment_method=payment_method,
+            )
+            for student in students
+        ])
+        if any(e.pk is None for e in enrollments):
+            ids = dict(StudentEnrollment.objects.filter(
+                course=course, student__in=students
+            ).values_list('student_id', 'pk'))
+            for enrollment in enrollments:
+                enrollment.pk = ids[enrollment.student_id]
+
+        payable = [e for e in enrollments if e.net_amount > 0]
+        entries, lines = [], []
+        for enrollment in payable:
+            entry, entry_lines = build_enrollment_entry(
+                enrollment, ar_accounts[enrollment.student_id], revenue_account_id, user
+            )
+            entries.append(entry)
+            lines.append(entry_lines)
+
+        entries = bulk_post_entries(entries, lines, user)
+        for enrollment, entry in zip(payable, entries):
+            enrollment.enrollment_journal_entry = entry
+        StudentEnrollment.objects.bulk_update(payable, ['enrollment_journal_entry'])
+
+    return enrollments, skipped
+
+
+def post_student_receipt(receipt, user):
+    """Save a new receipt and post all of its accounting as one unit of work.
+
+    Replaces the chain of separate writes done by ``StudentReceiptCreateView``
+    (AR account property, enrollment ``get_or_create``, enrollment accrual,
+    receipt save, payment entry, posting, receipt re-save).  Accounts are
+    resolved up front, the receipt and journal numbers are reserved together,
+    the entries are inserted already posted and the balances are moved once
+    at the end.  Any error rolls the whole receipt back.
+    """
+    student = receipt.student_profile
+    course = receipt.course
+
+    with transaction.atomic():
+        if student is not None:
+            ar_account_id = ensure_student_ar_accounts([student])[student.pk]
+        elif receipt.student_id:
+            # For legacy accounts model students
+            ar_account_id = Account.get_or_create_student_ar_account(receipt.student).pk
+        else:
+            raise ValueError("No student associated with receipt")
+        cash_account_id = Account.get_cash_account_id()
+
+        entries, lines = [], []
+        new_enrollment = None
+        if student is not None and course is not None and receipt.enrollment_id is None:
+            enrollment = StudentEnrollment.objects.filter(student=student, course=course).first()
+            if enrollment is None:
+                enrollment = new_enrollment = StudentEnrollment(
+                    student=student,
+                    course=course,
+                    enrollment_date=receipt.date,
+                    total_amount=course.price,
+                    discount_percent=student.discount_percent or Decimal('0'),
+                    discount_amount=student.discount_amount or Decimal('0'),
+                    payment_method=receipt.payment_method,
+                )
+                if enrollment.net_amount > 0:
+                    entry, entry_lines = build_enrollment_entry(
+                        enrollment, ar_account_id, Account.get_course_revenue_account_id(course), user
+                    )
+                    entries.append(entry)
+                    lines.append(entry_lines)
+            receipt.enrollment = enrollment
+
+        entry, entry_lines = build_receipt_entry(receipt, cash_account_id, ar_account_id, user)
+        entries.append(entry)
+        lines.append(entry_lines)
+
+        counts = {'journal_entry': len(entries)}
+        if not receipt.receipt_number:
+            counts['student_receipt'] = 1
+        first = NumberSequence.allocate_blocks(counts)
+        for offset, entry in enumerate(entries):
+            entry.reference = f"JE-{first['journal_entry'] + offset:06d}"
+        if not receipt.receipt_number:
+            receipt.receipt_number = f"SR-{first['student_receipt']:06d}"
+
+        entries = bulk_post_entries(entries, lines, user, emit_events=False)
+
+        if new_enrollment is not None:
+            if len(entries) > 1:
+                new_enrollment.enrollment_journal_entry = entries[0]
+            new_enrollment.save()
+            receipt.enrollment = new_enrollment
+        receipt.journal_entry = entries[-1]
+        if not receipt.created_by_id:
+            receipt.created_by = user
+        receipt.save()
+        events.emit(events.entry_posted_events(entries, lines) + events.receipt_created_events([receipt]))
+
+    return receipt
+
+
+RECEIPT_BATCH_FIELDS = ['student', 'course', 'amount', 'method', 'date']
+
+
+def load_receipt_rows(content, fmt):
+    """Parse a receipt batch given as JSON or CSV text into a list of dicts.
+
+    JSON may be a list of objects or ``{"receipts": [...]}``; CSV needs a
+    header row using the names in ``RECEIPT_BATCH_FIELDS``.
+    """
+    import csv
+    import io
+    import json
+
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    if fmt == 'csv':
+        reader = csv.DictReader(io.StringIO(content))
+        return [{k.strip(): (v or '').strip() for k, v in row.items() if k} for row in reader]
+    data = json.loads(content)
+    if isinstance(data, dict):
+        data = data.get('receipts', [])
+    if not isinstance(data, list):
+        raise ValueError("Expected a list of receipts")
+    return data
+
+
+def _clean_receipt_row(raw, today):
+    """Convert one raw batch row; returns (values, error)"""
+    from datetime import date as date_cls
+    from decimal import InvalidOperation
+
+    from django.utils.dateparse import parse_date
+
+    if not isinstance(raw, dict):
+        return None, 'INVALID_ROW'
+    try:
+        student_id = int(raw.get('student'))
+        course_id = int(raw.get('course'))
+    except (TypeError, ValueError):
+        return None, 'STUDENT_AND_COURSE_REQUIRED'
+    try:
+        amount = Decimal(str(raw.get('amount'))).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        return None, 'BAD_NUMBER_FORMAT'
+    if not amount.is_finite():
+        return None, 'BAD_NUMBER_FORMAT'
+    if amount <= 0:
+        return None, 'AMOUNT_MUST_BE_POSITIVE'
+    method = (raw.get('method') or 'CASH').upper()
+    if method not in dict(StudentReceipt.PAYMENT_METHOD_CHOICES):
+        return None, 'BAD_PAYMENT_METHOD'
+    value = raw.get('date')
+    if not value:
+        receipt_date = today
+    elif isinstance(value, date_cls):
+        receipt_date = value
+    else:
+        receipt_date = parse_date(str(value))
+        if receipt_date is None:
+            return None, 'BAD_DATE'
+    return {
+        'student_id': student_id,
+        'course_id': course_id,
+        'amount': amount,
+        'method': method,
+        'date': receipt_date,
+    }, None
+
+
+def post_receipt_batch(rows, user, strict=False, dry_run=False):
+    """Validate and post a batch of student receipts in one transaction.
+
+    Every row must name a student profile and a course the student has an
+    open enrollment in and be dated after the last closed period, and its
+    amount may not exceed what is still due on that enrollment (taking earlier rows of the same batch into account).
+    Valid rows are turned into receipts, payment entries and their lines
+    with bulk inserts, using the usual SR-/JE- numbering.  With ``strict``
+    nothing is posted unless every row is valid; ``dry_run`` only validates.
+    The enrollments are locked while they are validated and posted, so two
+    batches cannot both spend the same balance.
+
+    Returns one result dict per input row, in order.
+    """
+    from students.models import Student as SProfile
+
+    today = timezone.now().date()
+    results, cleaned = [], []
+    for index, raw in enumerate(rows, start=1):
+        values, error = _clean_receipt_row(raw, today)
+        results.append({'row': index, 'ok': error is None, 'error': error})
+        cleaned.append(values)
+
+    valid = [v for v in cleaned if v]
+    with transaction.atomic():
+        students = SProfile.objects.in_bulk({v['student_id'] for v in valid})
+        open_enrollments = StudentEnrollment.objects.filter(
+            student_id__in=students, course_id__in={v['course_id'] for v in valid}, is_completed=False
+        )
+        # Lock the enrollments first so concurrent batches validate against committed payments
+        locked = list(open_enrollments.select_for_update().values_list('pk', flat=True))
+        enrollments = {
+            (e.student_id, e.course_id): e
+            for e in with_enrollment_balances(
+                StudentEnrollment.objects.filter(pk__in=locked).select_related('course')
+            )
+        }
+
+        remaining = {}
+        accepted = []
+        for result, values in zip(results, cleaned):
+            if values is None:
+                continue
+            try:
+                AccountingPeriod.ensure_open(values['date'])
+            except ValueError:
+                result.update(ok=False, error='PERIOD_CLOSED')
+                continue
+            student = students.get(values['student_id'])
+            enrollment = enrollments.get((values['student_id'], values['course_id']))
+            if student is None:
+                result.update(ok=False, error='STUDENT_NOT_FOUND')
+                continue
+            if enrollment is None:
+                result.update(ok=False, error='NO_ENROLLMENT_FOUND')
+                continue
+            key = (enrollment.student_id, enrollment.course_id)
+            due = remaining.get(key, max(
+                Decimal('0'), enrollment.net_amount - enrollment.total_paid,
+            ).quantize(Decimal('0.01')))
+            if values['amount'] > due:
+                result.update(ok=False, error='AMOUNT_EXCEEDS_BALANCE', balance_due=str(due))
+                continue
+            remaining[key] = due - values['amount']
+            result['balance_after'] = str(remaining[key])
+            accepted.append((result, values, student, enrollment))
+
+        if dry_run or not accepted or (strict and len(accepted) != len(results)):
+            for result, *_ in accepted:
+                result['posted'] = False
+            return results
+
+        ar_accounts = ensure_student_ar_accounts(list({s.pk: s for _, _, s, _ in accepted}.values()))
+        cash_account_id = Account.get_cash_account_id()
+        first = NumberSequence.allocate_blocks({
+            'journal_entry': len(accepted),
+            'student_receipt': len(accepted),
+        })
+
+        receipts, entries, lines = [], [], []
+        for offset, (result, values, student, enrollment) in enumerate(accepted):
+            receipt = StudentReceipt(
+                receipt_number=f"SR-{first['student_receipt'] + offset:06d}",
+                date=values['date'],
+                student_profile=student,
+                student_name=student.full_name,
+                course=enrollment.course,
+                course_name=enrollment.course.name,
+                amount=enrollment.total_amount,
+                paid_amount=values['amount'],
+                discount_percent=enrollment.discount_percent,
+                discount_amount=enrollment.discount_amount,
+                payment_method=values['method'],
+                enrollment=enrollment,
+                created_by=user,
+            )
+            entry, entry_lines = build_receipt_entry(receipt, cash_account_id, ar_accounts[student.pk], user)
+            entry.reference = f"JE-{first['journal_entry'] + offset:06d}"
+            receipts.append(receipt)
+            entries.append(entry)
+            lines.append(entry_lines)
+
+        entries = bulk_post_entries(entries, lines, user, emit_events=False)
+        for receipt, entry in zip(receipts, entries):
+            receipt.journal_entry = entry
+        receipts = StudentReceipt.objects.bulk_create(receipts)
+        events.emit(events.entry_posted_events(entries, lines) + events.receipt_created_events(receipts))
+
+    for (result, *_), receipt, entry in zip(accepted, receipts, entries):
+        result.update(posted=True, receipt_id=receipt.pk, receipt_number=receipt.receipt_number,
+                      journal_entry=entry.reference)
+    return results
+
+
+def reverse_entries(entries, user, date=None, dry_run=False):
+    """Reverse a set of posted journal entries in one transaction.
+
+    Does what ``JournalEntry.reverse_entry`` does for each entry of the
+    ``entries`` queryset: a posted ADJUSTMENT entry with every line mirrored,
+    linked through ``reversal_of``.  Unposted entries, entries already
+    reversed and entries without lines are skipped.  The lines of all
+    entries are read in one query and the reversals go through
+    ``bulk_post_entries``.
+
+    Returns ``(reversals, skipped)``; ``reversals`` is a list of
+    ``(original, reversing_entry)`` pairs (``reversing_entry`` is unsaved
+    with ``dry_run``) and ``skipped`` a list of ``(entry, reason)``.
+    """
+    from django.db.models import Count
+
+    date = date or timezone.now().date()
+    AccountingPeriod.ensure_open(date)
+    with transaction.atomic():
+        originals, skipped = [], []
+        for entry in entries.annotate(reversal_count=Count('reversals')).order_by('date', 'id'):
+            if not entry.is_posted:
+                skipped.append((entry, 'NOT_POSTED'))
+            elif entry.reversal_count:
+                skipped.append((entry, 'ALREADY_REVERSED'))
+            else:
+                originals.append(entry)
+
+        lines_by_entry = {}
+        for line in Transaction.objects.filter(journal_entry__in=originals).order_by('id'):
+            lines_by_entry.setdefault(line.journal_entry_id, []).append(line)
+
+        reversals, new_entries, new_lines = [], [], []
+        for entry in originals:
+            lines = lines_by_entry.get(entry.pk)
+            if not lines:
+                skipped.append((entry, 'NO_LINES'))
+                continue
+            reversing_entry = JournalEntry(
+                date=date,
+                description=f"Reversal of {entry.reference}",
+                entry_type='ADJUSTMENT',
+                total_amount=entry.total_amount,
+                created_by=user,
+                reversal_of=entry,
+            )
+            reversals.append((entry, reversing_entry))
+            new_entries.append(reversing_entry)
+            new_lines.append([
+                Transaction(
+                    account_id=line.account_id,
+                    amount=line.amount,
+                    is_debit=not line.is_debit,
+                    description=f"Reversal: {line.description}",
+                    cost_center_id=line.cost_center_id,
+                )
+                for line in lines
+            ])
+
+        if not dry_run:
+            bulk_post_entries(new_entries, new_lines, user)
+            events.entry_reversed(reversals)
+    return reversals, skipped
+
+
+def get_retained_earnings_account_id():
+    """Equity account that receives the net result when a period is closed"""
+    def defaults():
+        return {
+            'name': 'Retained Earnings',
+            'name_ar': 'الأرباح المحتجزة',
+            'account_type': 'EQUITY',
+            'parent_id': Account.objects.filter(code='3000').values_list('pk', flat=True).first(),
+            'is_active': True,
+        }
+    return account_resolver.get_id('3200', defaults)
+
+
+def close_period(period, user):
+    """Close an accounting period.
+
+    Revenue and expense balances at the period end are moved to retained
+    earnings with one CLOSING entry dated ``period.end_date``; the resulting
+    cumulative totals of every account are stored as
+    ``AccountBalanceSnapshot`` rows, and the period is marked closed, which
+    stops any further posting dated on or before its end.
+
+    Periods must be closed in date order.  Returns the closing entry, or
+    ``None`` when there was nothing to close.
+    """
+    from .reports import balances_as_of, net_balance, refresh_budget_actuals
+
+    with transaction.atomic():
+        period = AccountingPeriod.objects.select_for_update().get(pk=period.pk)
+        if period.is_closed:
+            raise ValueError("Period is already closed")
+        if AccountingPeriod.objects.filter(is_closed=True, end_date__gte=period.end_date).exists():
+            raise ValueError("A later period is already closed")
+
+        balances = balances_as_of(period.end_date)
+        types = dict(Account.objects.filter(pk__in=balances).values_list('pk', 'account_type'))
+
+        lines = []
+        net_income = Decimal('0')
+        for account_id, (debits, credits) in sorted(balances.items()):
+            account_type = types[account_id]
+            if account_type not in ('REVENUE', 'EXPENSE'):
+                continue
+            balance = net_balance(account_type, debits, credits)
+            if not balance:
+                continue
+            net_income += balance if account_type == 'REVENUE' else -balance
+            # Revenue is zeroed with a debit, expense with a credit
+            is_debit = (account_type == 'REVENUE') == (balance > 0)
+            lines.append(Transaction(
+                account_id=account_id,
+                amount=abs(balance),
+                is_debit=is_debit,
+                description=f"Closing - {period.name}",
+            ))
+
+        entry = None
+        if lines:
+            if net_income:
+                lines.append(Transaction(
+                    account_id=get_retained_earnings_account_id(),
+                    amount=abs(net_income),
+                    is_debit=net_income < 0,
+                    description=f"Net result - {period.name}",
+                ))
+            entry = JournalEntry(
+                date=period.end_date,
+                description=f"Closing entry: {period.name}",
+                entry_type='CLOSING',
+                total_amount=sum((t.amount for t in lines if t.is_debit), Decimal('0')),
+            )
+            bulk_post_entries([entry], [lines], user)
+            balances = balances_as_of(period.end_date)
+            types = dict(Account.objects.filter(pk__in=balances).values_list('pk', 'account_type'))
+
+        # A period closed before, then reopened, still has its old snapshots
+        AccountBalanceSnapshot.objects.filter(period=period).delete()
+        AccountBalanceSnapshot.objects.bulk_create([
+            AccountBalanceSnapshot(
+                period=period,
+                account_id=account_id,
+                debit_total=debits,
+                credit_total=credits,
+                balance=net_balance(types[account_id], debits, credits),
+            )
+            for account_id, (debits, credits) in balances.items()
+        ])
+
+        # Freeze the period's budget actuals as they stand at close
+        refresh_budget_actuals(period.budget_set.select_related('account', 'period'))
+
+        period.is_closed = True
+        period.closed_at = timezone.now()
+        period.closed_by = user
+        period.save()
+        events.period_closed(period, entry)
+
+    return entry
+
+
+def receipt_print_figures(receipts):
+    """Figures shown on printed receipts, as ``{receipt_id: {...}}``.
+
+    ``paid_total`` is what the student had paid for the course up to and
+    including the receipt's date.  It comes from one window query (running
+    ``SUM`` per student and course) for all receipts instead of one
+    aggregate per receipt.  Receipts need ``student_profile`` and ``course``
+    selected.
+    """
+    from django.db.models import F, Sum, Window
+
+    receipts = list(receipts)
+    keyed = [r for r in receipts if r.student_profile_id and r.course_id]
+    paid_to_date = {}
+    if keyed:
+        paid_to_date = dict(StudentReceipt.objects.filter(
+            student_profile_id__in={r.student_profile_id for r in keyed},
+            course_id__in={r.course_id for r in keyed},
+            date__lte=max(r.date for r in keyed),
+        ).annotate(paid_to_date=Window(
+            Sum('paid_amount'),
+            partition_by=[F('student_profile_id'), F('course_id')],
+            # The default RANGE frame includes receipts of the same date
+            order_by=F('date').asc(),
+        )).order_by().values_list('pk', 'paid_to_date'))
+
+    figures = {}
+    for receipt in receipts:
+        course_price = receipt.course.price or Decimal('0') if receipt.course else receipt.amount or Decimal('0')
+        if receipt.student_profile_id and receipt.course_id:
+            # Use student's default discounts
+            discount_percent = receipt.student_profile.discount_percent or Decimal('0')
+            discount_amount = receipt.student_profile.discount_amount or Decimal('0')
+            after_percent = course_price - (course_price * discount_percent / Decimal('100'))
+            net_due = max(Decimal('0'), after_percent - discount_amount)
+            paid_total = paid_to_date.get(receipt.pk) or Decimal('0')
+        else:
+            # Fallback for legacy receipts
+            net_due = receipt.net_amount or receipt.amount or Decimal('0')
+            paid_total = receipt.paid_amount or Decimal('0')
+            discount_percent = receipt.discount_percent or Decimal('0')
+            discount_amount = receipt.discount_amount or Decimal('0')
+        figures[receipt.pk] = {
+            'course_price': course_price,
+            'net_due': net_due,
+            'paid_total': paid_total,
+            'remaining': max(Decimal('0'), net_due - paid_total),
+            'discount_percent': discount_percent,
+            'discount_amount': discount_amount,
+        }
+    return figures
+
+
+def receipts_for_print(date_from, date_to, cashier_id=None, course_id=None, unprinted=False):
+    """Receipts of a date range (optionally one cashier / course) in print order"""
+    receipts = StudentReceipt.objects.filter(date__range=(date_from, date_to)).select_related(
+        'student_profile', 'course', 'created_by',
+    )
+    if cashier_id:
+        receipts = receipts.filter(created_by_id=cashier_id)
+    if course_id:
+        receipts = receipts.filter(course_id=course_id)
+    if unprinted:
+        receipts = receipts.filter(is_printed=False)
+    return receipts.order_by('date', 'id')
+
+
+def print_receipts_pdf(receipts, mark_printed=True):
+    """One PDF with a page per receipt; with ``mark_printed`` marks the receipts printed in one UPDATE"""
+    from pages.pdf import render_pdf
+
+    receipts = list(receipts)
+    figures = receipt_print_figures(receipts)
+    pdf = render_pdf('accounts/student_receipts_batch_pdf.html', {
+        'receipts': [(receipt, figures[receipt.pk]) for receipt in receipts],
+        'now': timezone.now(),
+    })
+    if mark_printed:
+        StudentReceipt.objects.filter(pk__in=[r.pk for r in receipts], is_printed=False).update(
+            is_printed=True, updated_at=timezone.now(),
+        )
+    return pdf
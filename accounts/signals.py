@@ -0,0 +1,36 @@
+from django.core.signals import request_started
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .models import Account, AccountingPeriod
+from .resolver import account_resolver
+
+
+@receiver(post_save, sender=Account)
+def remember_account(sender, instance, **kwargs):
+    # The code may have changed: drop whatever pointed at this row first
+    account_resolver.forget(account_id=instance.pk)
+    if not instance.is_student_account:
+        account_resolver.remember(instance.code, instance.pk)
+
+
+@receiver(post_delete, sender=Account)
+def forget_account(sender, instance, **kwargs):
+    account_resolver.forget(code=instance.code, account_id=instance.pk)
+
+
+@receiver(post_save, sender=AccountingPeriod)
+@receiver(post_delete, sender=AccountingPeriod)
+def forget_locked_until(sender, **kwargs):
+    account_resolver.forget_periods()
+
+
+@receiver(post_migrate)
+def reset_resolver(sender, **kwargs):
+    account_resolver.clear()
+
+
+def warm_resolver(sender, **kwargs):
+    """Fill the resolver on the first request, then stop listening."""
+    request_started.disconnect(warm_resolver, dispatch_uid='accounts.warm_resolver')
+    account_resolver.warm()
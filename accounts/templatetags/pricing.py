@@ -0,0 +1,15 @@
+from django import template
+from django.utils.html import json_script
+
+from accounts.pricing import catalog
+
+register = template.Library()
+
+
+@register.simple_tag
+def pricing_catalog_script(element_id='pricing-catalog'):
+    """
+    Embed the course price / discount rule bundle (see accounts/pricing.py) as JSON.
+    Usage: {% pricing_catalog_script %} then JSON.parse(document.getElementById('pricing-catalog').textContent)
+    """
+    return json_script(catalog(), element_id)
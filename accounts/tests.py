@@ -0,0 +1,476 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts import events
+from accounts.models import (
+    Account, AccountBalanceSnapshot, AccountingPeriod, ArchivedJournalEntry, Budget, Course, JournalEntry, LedgerEvent,
+    LedgerProjection, StudentEnrollment, StudentReceipt, Transaction,
+)
+from accounts.archive import archive_period
+from accounts.reports import balances_as_of, budget_actuals, movements_between, net_balance
+from accounts.resolver import account_resolver
+from accounts.services import (
+    bulk_post_entries, enroll_students, post_receipt_batch, post_student_receipt, reverse_entries,
+    with_enrollment_balances,
+)
+from classroom.models import Classroom, Classroomenrollment
+from employ.models import Employee
+from students.models import Student
+
+
+class LedgerTestCase(TestCase):
+    # Saving any model checks the activity log table (pages.signals)
+    databases = {'default', 'activity'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='cashier', password='x')
+        cls.course = Course.objects.create(name='Math', price=Decimal('100'))
+
+    def setUp(self):
+        # The resolver caches account ids per process; each test rolls its accounts back
+        account_resolver.clear()
+
+    def assertBalancesMatchHistory(self):
+        """Stored balances equal the balances recomputed from every posted line"""
+        drifted = {
+            account.code: (account.balance, account.get_net_balance())
+            for account in Account.objects.all()
+            if account.balance != account.get_net_balance()
+        }
+        self.assertEqual(drifted, {})
+
+
+class EnrollStudentsTests(LedgerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.classroom = Classroom.objects.create(name='A', class_type='course')
+        self.students = [
+            Student.objects.create(full_name=f'S{i}', discount_percent=Decimal('10') if i % 2 else 0)
+            for i in range(6)
+        ]
+        for student in self.students:
+            Classroomenrollment.objects.create(classroom=self.classroom, student=student)
+
+    def test_bulk_enrollment_matches_per_entry_posting(self):
+        enrollments, skipped = enroll_students(self.course, self.students, self.user)
+
+        self.assertEqual((len(enrollments), skipped), (6, []))
+        self.assertEqual(JournalEntry.objects.filter(entry_type='ENROLLMENT', is_posted=True).count(), 6)
+        self.assertBalancesMatchHistory()
+        for enrollment in StudentEnrollment.objects.select_related('student__account', 'enrollment_journal_entry'):
+            self.assertEqual(enrollment.student.account.balance, enrollment.net_amount)
+            self.assertEqual(enrollment.enrollment_journal_entry.total_amount, enrollment.net_amount)
+
+    def test_already_enrolled_students_are_skipped(self):
+        enroll_students(self.course, self.students[:2], self.user)
+
+        enrollments, skipped = enroll_students(self.course, self.students, self.user)
+
+        self.assertEqual(len(enrollments), 4)
+        self.assertEqual(skipped, self.students[:2])
+        self.assertBalancesMatchHistory()
+
+    def test_apply_transaction_deltas_moves_balances_like_posting(self):
+        cash = Account.get_cash_account()
+        revenue = Account.objects.create(code='4100', name='Fees', account_type='REVENUE')
+        entry = JournalEntry.objects.create(
+            date='2026-01-05', description='x', total_amount=Decimal('75'), created_by=self.user,
+        )
+        lines = [
+            Transaction.objects.create(journal_entry=entry, account=cash, amount=Decimal('75'), is_debit=True),
+            Transaction.objects.create(journal_entry=entry, account=revenue, amount=Decimal('75'), is_debit=False),
+        ]
+        JournalEntry.objects.filter(pk=entry.pk).update(is_posted=True)
+
+        self.assertEqual(Account.apply_transaction_deltas(lines), 2)
+
+        cash.refresh_from_db()
+        revenue.refresh_from_db()
+        self.assertEqual((cash.balance, revenue.balance), (Decimal('75'), Decimal('75')))
+        self.assertBalancesMatchHistory()
+
+
+class PostStudentReceiptTests(LedgerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = Student.objects.create(full_name='Ali', discount_percent=Decimal('10'))
+        Account.get_cash_account()
+
+    def receipt(self, amount, date='2026-01-02'):
+        return StudentReceipt(
+            date=date, student_name='Ali', student_profile=self.student, course=self.course,
+            paid_amount=Decimal(amount), created_by=self.user,
+        )
+
+    def test_first_receipt_accrues_the_enrollment(self):
+        receipt = post_student_receipt(self.receipt('40'), self.user)
+
+        enrollment = receipt.enrollment
+        self.assertEqual(enrollment.enrollment_journal_entry.total_amount, Decimal('90'))
+        self.assertTrue(receipt.journal_entry.is_posted)
+        self.assertEqual(enrollment.balance_due, Decimal('50'))
+        self.assertBalancesMatchHistory()
+
+    def test_warm_path_query_count(self):
+        # Commit callbacks fill the resolver (cash account id, open-period check)
+        with self.captureOnCommitCallbacks(execute=True):
+            post_student_receipt(self.receipt('40'), self.user)
+        student = Student.objects.get(pk=self.student.pk)
+        receipt = StudentReceipt(
+            date='2026-01-03', student_name='Ali', student_profile=student, course=self.course,
+            paid_amount=Decimal('20'), created_by=self.user,
+        )
+
+        # Savepoint, enrollment, number block (2), entry, lines, balances, receipt,
+        # EntryPosted + ReceiptCreated, release
+        with self.assertNumQueries(10):
+            post_student_receipt(receipt, self.user)
+
+        self.assertEqual(receipt.enrollment.balance_due, Decimal('30'))
+        self.assertBalancesMatchHistory()
+
+
+class ReceiptBatchTests(LedgerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.students = [Student.objects.create(full_name=f'S{i}') for i in range(2)]
+        enroll_students(self.course, self.students, self.user)
+
+    def row(self, student, amount):
+        return {'student': student.pk, 'course': self.course.pk, 'amount': amount, 'date': '2026-01-05'}
+
+    def test_overpayment_is_rejected_across_rows_of_the_batch(self):
+        first, second = self.students
+        results = post_receipt_batch([
+            self.row(first, '60'), self.row(first, '50'), self.row(second, '100'), self.row(first, '40'),
+        ], self.user)
+
+        self.assertEqual([r['ok'] for r in results], [True, False, True, True])
+        self.assertEqual(results[1]['error'], 'AMOUNT_EXCEEDS_BALANCE')
+        self.assertEqual(results[1]['balance_due'], '40.00')
+        self.assertEqual(results[3]['balance_after'], '0.00')
+        self.assertEqual(StudentReceipt.objects.count(), 3)
+        self.assertBalancesMatchHistory()
+
+    def test_strict_and_dry_run_post_nothing(self):
+        rows = [self.row(self.students[0], '30'), self.row(self.students[1], '130')]
+
+        strict = post_receipt_batch(rows, self.user, strict=True)
+        dry_run = post_receipt_batch(rows[:1], self.user, dry_run=True)
+
+        self.assertEqual([r['ok'] for r in strict], [True, False])
+        self.assertEqual([r.get('posted') for r in strict + dry_run], [False, None, False])
+        self.assertFalse(StudentReceipt.objects.exists())
+
+    def test_non_finite_amounts_and_closed_periods_are_row_errors(self):
+        AccountingPeriod.objects.create(name='2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31),
+                                        is_closed=True)
+        first, second = self.students
+        closed = dict(self.row(second, '10'), date='2025-12-31')
+
+        results = post_receipt_batch([
+            self.row(first, 'NaN'), self.row(first, '-Infinity'), closed, self.row(second, '10'),
+        ], self.user)
+
+        self.assertEqual([r['error'] for r in results],
+                         ['BAD_NUMBER_FORMAT', 'BAD_NUMBER_FORMAT', 'PERIOD_CLOSED', None])
+        self.assertEqual(StudentReceipt.objects.get().date, date(2026, 1, 5))
+
+    def test_view_reports_invalid_payload(self):
+        self.client.force_login(self.user)
+
+        response = self.client.post(reverse('accounts:student_receipt_batch'), data='{',
+                                    content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'INVALID_PAYLOAD')
+
+
+class AutocompleteTests(LedgerTestCase):
+    def test_employees_match_any_name_prefix_ignoring_case(self):
+        for first, last, username in [('Ahmad', 'Zaki', 'az'), ('Sara', 'ali', 'sara'), ('Omar', 'Khan', 'alpha')]:
+            user = User.objects.create_user(username, first_name=first, last_name=last)
+            Employee.objects.create(user=user, position='admin', phone_number='1', salary=Decimal('1'))
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('accounts:autocomplete_employees'), {'q': 'A'})
+
+        self.assertEqual([r['text'] for r in response.json()['results']], ['Ahmad Zaki', 'Omar Khan', 'Sara ali'])
+
+
+class PostedEntriesTestCase(LedgerTestCase):
+    """1000 of fees received and 300 of rent paid in 2025"""
+
+    def setUp(self):
+        super().setUp()
+        self.cash = Account.get_cash_account()
+        self.revenue = Account.objects.create(code='4100', name='Fees', account_type='REVENUE')
+        self.expense = Account.objects.create(code='5200', name='Rent', account_type='EXPENSE')
+        self.post('2025-03-01', self.cash, self.revenue, '1000')
+        self.post('2025-06-01', self.expense, self.cash, '300')
+
+    def post(self, day, debit, credit, amount):
+        entry = JournalEntry(date=day, description='x', total_amount=Decimal(amount))
+        with transaction.atomic():
+            return bulk_post_entries([entry], [[
+                Transaction(account=debit, amount=Decimal(amount), is_debit=True),
+                Transaction(account=credit, amount=Decimal(amount), is_debit=False),
+            ]], self.user)[0]
+
+
+class ClosePeriodTests(PostedEntriesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.period = AccountingPeriod.objects.create(name='2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+
+    def test_balances_are_the_same_before_and_after_close(self):
+        before = balances_as_of(date(2026, 2, 1))
+
+        entry = self.period.close(self.user)
+
+        self.assertEqual(entry.entry_type, 'CLOSING')
+        self.assertEqual(AccountBalanceSnapshot.objects.filter(period=self.period).count(), 4)
+        after = balances_as_of(date(2026, 2, 1))
+        self.assertEqual(after[self.cash.pk], before[self.cash.pk])
+        # The closing entry zeroes revenue and expense into retained earnings
+        self.assertEqual(net_balance('REVENUE', *after[self.revenue.pk]), 0)
+        self.assertEqual(net_balance('EXPENSE', *after[self.expense.pk]), 0)
+        self.assertEqual(net_balance('REVENUE', *balances_as_of(date(2025, 6, 30))[self.revenue.pk]), 1000)
+
+    def test_tail_after_the_snapshot_is_added(self):
+        self.period.close(self.user)
+        self.post('2026-02-01', self.cash, self.revenue, '50')
+
+        balances = balances_as_of(date(2026, 3, 1))
+
+        self.assertEqual(net_balance('ASSET', *balances[self.cash.pk]), 750)
+        self.assertEqual(net_balance('REVENUE', *balances[self.revenue.pk]), 50)
+        with self.assertRaises(ValueError):
+            self.post('2025-12-01', self.expense, self.cash, '5')
+
+    def test_closing_drops_the_cached_open_period_check(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            AccountingPeriod.ensure_open(date(2025, 12, 1))
+        with self.assertNumQueries(0):
+            AccountingPeriod.ensure_open(date(2025, 12, 1))
+
+        self.period.close(self.user)
+
+        with self.assertRaises(ValueError):
+            AccountingPeriod.ensure_open(date(2025, 12, 1))
+
+    def test_period_closed_without_snapshots_uses_the_full_history(self):
+        # Ticked closed in the admin before is_closed became read-only, or closed before snapshots existed
+        AccountingPeriod.objects.filter(pk=self.period.pk).update(is_closed=True)
+
+        balances = balances_as_of(date(2026, 1, 31))
+
+        self.assertEqual(net_balance('ASSET', *balances[self.cash.pk]), 700)
+        self.assertEqual(net_balance('REVENUE', *balances[self.revenue.pk]), 1000)
+
+    def test_reopened_period_can_be_closed_again(self):
+        self.period.close(self.user)
+        AccountingPeriod.objects.filter(pk=self.period.pk).update(is_closed=False)
+        self.period.refresh_from_db()
+
+        self.period.close(self.user)
+
+        self.assertEqual(AccountBalanceSnapshot.objects.filter(period=self.period).count(), 4)
+
+    # The reports alias is a second connection to the test database: read through default instead
+    @override_settings(DATABASE_ROUTERS=['pages.db.ActivityLogRouter'])
+    def test_income_statement_leaves_out_the_closing_entry(self):
+        self.period.close(self.user)
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('accounts:income_statement'), {'as_of': '2025-12-31'})
+
+        self.assertEqual(response.context['start_date'], date(2025, 1, 1))
+        self.assertEqual(response.context['total_revenue'], Decimal('1000'))
+        self.assertEqual(response.context['total_expenses'], Decimal('300'))
+        movements = movements_between(date(2025, 4, 1), date(2025, 12, 31))
+        self.assertNotIn(self.revenue.pk, movements)
+        self.assertEqual(movements[self.expense.pk], (Decimal('300'), Decimal('0')))
+
+    def test_is_closed_is_read_only_in_the_admin(self):
+        from django.contrib.admin.sites import site
+
+        admin = site._registry[AccountingPeriod]
+
+        self.assertIn('is_closed', admin.get_readonly_fields(None, self.period))
+
+
+class EnrollmentBalanceTests(LedgerTestCase):
+    def test_annotations_match_the_properties_for_fractional_discounts(self):
+        student = Student.objects.create(full_name='Ali')
+        for price, percent, amount in [('999', '15', '0'), ('1000', '12.5', '3.30'), ('100', '33', '0'), ('750', '7', '10')]:
+            course = Course.objects.create(name=f'C{price}', price=Decimal(price))
+            StudentEnrollment.objects.create(
+                student=student, course=course, enrollment_date='2026-01-01', total_amount=Decimal(price),
+                discount_percent=Decimal(percent), discount_amount=Decimal(amount),
+            )
+        enrollment = StudentEnrollment.objects.get(course__name='C999')
+        StudentReceipt.objects.create(
+            date='2026-01-02', student_name='Ali', student_profile=student, course=enrollment.course,
+            enrollment=enrollment, paid_amount=Decimal('100.10'), created_by=self.user,
+        )
+
+        cent = Decimal('0.01')
+        for enrollment in with_enrollment_balances(StudentEnrollment.objects.all()):
+            self.assertEqual(enrollment.net_due.quantize(cent), enrollment.net_amount.quantize(cent))
+            self.assertEqual(enrollment.total_paid, enrollment.amount_paid)
+            self.assertEqual(enrollment.remaining_due.quantize(cent), enrollment.balance_due.quantize(cent))
+        self.assertEqual(
+            with_enrollment_balances(StudentEnrollment.objects.filter(course__name='C999')).get().net_due,
+            Decimal('849.15'),
+        )
+
+
+class ReverseEntriesTests(PostedEntriesTestCase):
+    def test_entries_are_reversed_once(self):
+        entries = JournalEntry.objects.filter(entry_type='MANUAL')
+
+        reversals, skipped = reverse_entries(entries, self.user, date=date(2026, 1, 10))
+        again, skipped_again = reverse_entries(entries, self.user, date=date(2026, 1, 11))
+
+        self.assertEqual((len(reversals), skipped), (2, []))
+        self.assertEqual(again, [])
+        self.assertEqual({reason for _, reason in skipped_again}, {'ALREADY_REVERSED'})
+        self.assertEqual(JournalEntry.objects.filter(reversal_of__isnull=False).count(), 2)
+        with self.assertRaises(ValueError):
+            entries.first().reverse_entry(self.user)
+        balances = balances_as_of()
+        self.assertEqual(net_balance('ASSET', *balances[self.cash.pk]), 0)
+        self.assertBalancesMatchHistory()
+
+    def test_database_refuses_a_second_reversal(self):
+        entry = JournalEntry.objects.filter(entry_type='MANUAL').first()
+        entry.reverse_entry(self.user)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            JournalEntry.objects.create(date=date(2026, 1, 10), description='x', total_amount=entry.total_amount,
+                                        created_by=self.user, reversal_of=entry)
+
+    def test_dry_run_posts_nothing(self):
+        reversals, _ = reverse_entries(JournalEntry.objects.all(), self.user, dry_run=True)
+
+        self.assertEqual(len(reversals), 2)
+        self.assertIsNone(reversals[0][1].pk)
+        self.assertFalse(JournalEntry.objects.filter(reversal_of__isnull=False).exists())
+
+
+class ArchivePeriodTests(PostedEntriesTestCase):
+    def test_reports_are_unchanged_by_archiving(self):
+        self.post('2025-09-01', self.cash, self.revenue, '40')
+        period = AccountingPeriod.objects.create(name='2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+        period.close(self.user)
+        period.refresh_from_db()
+        self.post('2026-02-01', self.expense, self.cash, '25')
+        budget = Budget.objects.create(account=self.revenue, period=period, budgeted_amount=Decimal('900'))
+        dates = [date(2025, 3, 31), date(2025, 8, 1), date(2025, 12, 31), date(2026, 3, 1), None]
+        before = {day: balances_as_of(day) for day in dates}
+        actuals = budget_actuals([budget])
+        movements = movements_between(date(2025, 1, 1), date(2025, 12, 31))
+
+        entries, lines = archive_period(period, self.user, chunk_size=1)
+
+        self.assertEqual((entries, lines), (4, 9))
+        self.assertFalse(Transaction.objects.filter(journal_entry__date__lt=date(2025, 12, 31)).exists())
+        period.refresh_from_db()
+        self.assertIsNotNone(period.archived_at)
+        budget.refresh_from_db()
+        for day in dates:
+            self.assertEqual(balances_as_of(day), before[day], day)
+        self.assertEqual(budget_actuals([budget]), actuals)
+        self.assertEqual(movements_between(date(2025, 1, 1), date(2025, 12, 31)), movements)
+        self.assertBalancesMatchHistory()
+
+    def test_reconcile_does_not_repost_archived_receipts(self):
+        student = Student.objects.create(full_name='Ali')
+        receipt = post_student_receipt(StudentReceipt(
+            date='2025-05-01', student_name='Ali', student_profile=student, course=self.course,
+            paid_amount=Decimal('40'), created_by=self.user,
+        ), self.user)
+        entry_id = receipt.journal_entry_id
+        period = AccountingPeriod.objects.create(name='2025', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+        period.close(self.user)
+        period.refresh_from_db()
+        archive_period(period, self.user)
+        entries = JournalEntry.objects.count()
+
+        out = StringIO()
+        call_command('reconcile_student_accounts', stdout=out, stderr=StringIO())
+
+        receipt.refresh_from_db()
+        self.assertEqual((receipt.journal_entry_id, receipt.archived_journal_entry_id), (None, entry_id))
+        self.assertEqual(receipt.enrollment.archived_enrollment_journal_entry_id,
+                         ArchivedJournalEntry.objects.get(entry_type='ENROLLMENT').pk)
+        self.assertIsNone(receipt.create_accrual_journal_entry(self.user))
+        self.assertIsNone(receipt.enrollment.create_accrual_enrollment_entry(self.user))
+        self.assertEqual(JournalEntry.objects.count(), entries)
+        self.assertIn('Receipts failed: 0', out.getvalue())
+        self.assertBalancesMatchHistory()
+
+
+class LedgerEventTests(PostedEntriesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.delivered = []
+        self.fail = False
+
+        @events.projection('tests.collect', events=[LedgerEvent.ENTRY_POSTED])
+        def collect(batch):
+            if self.fail:
+                raise RuntimeError('projection down')
+            self.delivered.extend(event.pk for event in batch)
+        self.addCleanup(events._projections.pop, 'tests.collect')
+
+    def cursor(self):
+        return LedgerProjection.objects.get(name='tests.collect')
+
+    def test_posting_writes_events_with_the_entries(self):
+        payloads = list(LedgerEvent.objects.filter(name=LedgerEvent.ENTRY_POSTED).values_list('payload', flat=True))
+
+        self.assertEqual([p['amount'] for p in payloads], ['1000', '300'])
+        self.assertEqual(payloads[0]['accounts'], sorted([self.cash.pk, self.revenue.pk]))
+
+    def test_dispatch_moves_the_cursor_and_is_idempotent(self):
+        last = LedgerEvent.objects.latest('pk').pk
+
+        self.assertEqual(events.dispatch(['tests.collect'], batch_size=1), {'tests.collect': 2})
+        self.assertEqual(events.dispatch(['tests.collect']), {'tests.collect': 0})
+
+        self.assertEqual(len(self.delivered), 2)
+        self.assertEqual(self.cursor().position, last)
+        self.post('2025-07-01', self.cash, self.revenue, '5')
+        self.assertEqual(events.dispatch(['tests.collect']), {'tests.collect': 1})
+        self.assertEqual(self.cursor().position, LedgerEvent.objects.latest('pk').pk)
+
+    def test_failed_batch_is_delivered_again(self):
+        self.fail = True
+
+        self.assertEqual(events.dispatch(['tests.collect']), {'tests.collect': 0})
+
+        cursor = self.cursor()
+        self.assertEqual((cursor.position, cursor.failures), (0, 1))
+        self.assertIn('projection down', cursor.error)
+        self.fail = False
+        self.assertEqual(events.dispatch(['tests.collect']), {'tests.collect': 2})
+        self.assertEqual((self.cursor().failures, self.cursor().error), (0, ''))
+
+    def test_replay_delivers_seen_events_again(self):
+        events.dispatch(['tests.collect'])
+        first = LedgerEvent.objects.earliest('pk').pk
+
+        self.assertEqual(events.replay('tests.collect', from_event=first), 2)
+        self.assertEqual(len(self.delivered), 4)
+        with self.assertRaises(ValueError):
+            events.dispatch(['tests.unknown'])
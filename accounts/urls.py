@@ -1,13 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import api_views, views
 
 app_name = 'accounts'
 
 # API Router
 router = DefaultRouter()
-# router.register(r'courses', api_views.CourseViewSet, basename='course')
-# router.register(r'receipts', api_views.StudentReceiptViewSet, basename='receipt')
+router.register(r'accounts', api_views.AccountViewSet, basename='api-account')
+router.register(r'journal-entries', api_views.JournalEntryViewSet, basename='api-journal-entry')
+router.register(r'receipts', api_views.StudentReceiptViewSet, basename='api-receipt')
+router.register(r'students', api_views.StudentViewSet, basename='api-student')
+router.register(r'attendance', api_views.AttendanceViewSet, basename='api-attendance')
 
 urlpatterns = [
     # API URLs
@@ -45,6 +48,8 @@ urlpatterns = [
     
     # Student Receipts
     path('receipts/create/', views.StudentReceiptCreateView.as_view(), name='student_receipt_create'),
+    path('receipts/batch/', views.StudentReceiptBatchView.as_view(), name='student_receipt_batch'),
+    path('receipts/print/', views.StudentReceiptBatchPrintView.as_view(), name='student_receipt_batch_print'),
     path('receipts/<int:pk>/', views.StudentReceiptDetailView.as_view(), name='student_receipt_detail'),
     path('receipts/<int:pk>/print/', views.student_receipt_print, name='student_receipt_print'),
     
@@ -95,6 +100,7 @@ urlpatterns = [
     path('cost-centers/<int:pk>/update/', views.CostCenterUpdateView.as_view(), name='cost_center_update'),
     
     # AJAX endpoints
+    path('ajax/pricing/', views.pricing_catalog, name='pricing_catalog'),
     path('ajax/course/<int:pk>/price/', views.ajax_course_price, name='ajax_course_price'),
     
     # Discount Rules
@@ -106,5 +112,11 @@ urlpatterns = [
     
     # AJAX endpoints for discounts
     path('ajax/discount-rule/<str:reason>/', views.ajax_discount_rule, name='ajax_discount_rule'),
+
+    # Autocomplete endpoints for lazy select widgets
+    path('ajax/autocomplete/accounts/', views.autocomplete_accounts, name='autocomplete_accounts'),
+    path('ajax/autocomplete/students/', views.autocomplete_students, name='autocomplete_students'),
+    path('ajax/autocomplete/employees/', views.autocomplete_employees, name='autocomplete_employees'),
+    path('ajax/autocomplete/teachers/', views.autocomplete_teachers, name='autocomplete_teachers'),
 ]
 
@@ -4,6 +4,7 @@ from django.views.generic import (
 )
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
+from django.core.exceptions import ValidationError
 from django.urls import reverse_lazy, reverse
 from django.db.models import Sum, Q, Count
 from django.http import JsonResponse, HttpResponse, Http404
@@ -11,6 +12,7 @@ from datetime import datetime, date
 from decimal import Decimal
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
 from django.views.decorators.http import require_GET
 from django.utils.decorators import method_decorator
 
@@ -25,6 +27,19 @@ from .forms import (
     EmployeeAdvanceForm, DiscountRuleForm
 )
 
+from .conditional import report_condition
+from .reports import (
+    LEDGER_COLUMNS, balances_as_of, budget_actuals, income_statement_start, ledger_rows, movements_between,
+    report_accounts,
+)
+from .services import (
+    load_receipt_rows, post_receipt_batch, post_student_receipt, print_receipts_pdf, receipt_print_figures,
+    receipts_for_print,
+)
+
+from pages.db import reports_db
+from pages.exports import Column, MONEY_FORMAT, export_format, export_response
+from pages.jobs import enqueue, job_response
 from students.models import Student as SProfile
 from employ.models import Employee, Teacher
 
@@ -388,22 +403,40 @@ class ReportsView(LoginRequiredMixin, TemplateView):
     template_name = 'accounts/reports.html'
 
 
+def _report_date(request, name='as_of'):
+    """Optional ``?as_of=YYYY-MM-DD`` (or ``?<name>=``) of the financial reports"""
+    from django.utils.dateparse import parse_date
+    try:
+        return parse_date(request.GET.get(name) or '')
+    except ValueError:
+        return None
+
+
+def _income_statement_range(request):
+    """``(start, end)`` of the income statement: ``?start=`` defaults to the start of the period of ``?as_of=``"""
+    end = _report_date(request) or timezone.localdate()
+    return _report_date(request, 'start') or income_statement_start(end), end
+
+
+@method_decorator(reports_db, name='get')
+@method_decorator(report_condition, name='get')
 class TrialBalanceView(LoginRequiredMixin, TemplateView):
     template_name = 'accounts/trial_balance.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        as_of = _report_date(self.request)
         
         # Get all accounts with transactions
-        accounts = Account.objects.filter(is_active=True).order_by('code')
+        accounts = report_accounts([t for t, _ in Account.ACCOUNT_TYPE_CHOICES], as_of)
         trial_balance_data = []
         total_debits = Decimal('0.00')
         total_credits = Decimal('0.00')
         
         for account in accounts:
-            debit_balance = account.get_debit_balance()
-            credit_balance = account.get_credit_balance()
-            net_balance = account.get_net_balance()
+            debit_balance = account.report_debits
+            credit_balance = account.report_credits
+            net_balance = account.report_balance
             
             if debit_balance > 0 or credit_balance > 0:
                 if net_balance > 0:
@@ -431,6 +464,8 @@ class TrialBalanceView(LoginRequiredMixin, TemplateView):
                 total_credits += credit_amount
         
         context.update({
+            'as_of': as_of,
+            'report_date': as_of or timezone.now().date(),
             'trial_balance_data': trial_balance_data,
             'total_debits': total_debits,
             'total_credits': total_credits,
@@ -440,25 +475,29 @@ class TrialBalanceView(LoginRequiredMixin, TemplateView):
         return context
 
 
+@method_decorator(reports_db, name='get')
+@method_decorator(report_condition, name='get')
 class IncomeStatementView(LoginRequiredMixin, TemplateView):
     template_name = 'accounts/income_statement.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        as_of = _report_date(self.request)
+        start, end = _income_statement_range(self.request)
         
-        # Get revenue and expense accounts
-        revenue_accounts = Account.objects.filter(
-            account_type='REVENUE', is_active=True
-        ).order_by('code')
-        expense_accounts = Account.objects.filter(
-            account_type='EXPENSE', is_active=True
-        ).order_by('code')
+        # Get revenue and expense movements of the range, closing entries excluded
+        balances = movements_between(start, end)
+        revenue_accounts = report_accounts(['REVENUE'], balances=balances)
+        expense_accounts = report_accounts(['EXPENSE'], balances=balances)
         
-        total_revenue = sum(acc.get_net_balance() for acc in revenue_accounts)
-        total_expenses = sum(acc.get_net_balance() for acc in expense_accounts)
+        total_revenue = sum(acc.report_balance for acc in revenue_accounts)
+        total_expenses = sum(acc.report_balance for acc in expense_accounts)
         net_income = total_revenue - total_expenses
         
         context.update({
+            'as_of': as_of,
+            'start_date': start,
+            'report_date': end,
             'revenue_accounts': revenue_accounts,
             'expense_accounts': expense_accounts,
             'total_revenue': total_revenue,
@@ -469,28 +508,28 @@ class IncomeStatementView(LoginRequiredMixin, TemplateView):
         return context
 
 
+@method_decorator(reports_db, name='get')
+@method_decorator(report_condition, name='get')
 class BalanceSheetView(LoginRequiredMixin, TemplateView):
     template_name = 'accounts/balance_sheet.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        as_of = _report_date(self.request)
         
         # Get balance sheet accounts
-        asset_accounts = Account.objects.filter(
-            account_type='ASSET', is_active=True
-        ).order_by('code')
-        liability_accounts = Account.objects.filter(
-            account_type='LIABILITY', is_active=True
-        ).order_by('code')
-        equity_accounts = Account.objects.filter(
-            account_type='EQUITY', is_active=True
-        ).order_by('code')
+        balances = balances_as_of(as_of)
+        asset_accounts = report_accounts(['ASSET'], balances=balances)
+        liability_accounts = report_accounts(['LIABILITY'], balances=balances)
+        equity_accounts = report_accounts(['EQUITY'], balances=balances)
         
-        total_assets = sum(acc.get_net_balance() for acc in asset_accounts)
-        total_liabilities = sum(acc.get_net_balance() for acc in liability_accounts)
-        total_equity = sum(acc.get_net_balance() for acc in equity_accounts)
+        total_assets = sum(acc.report_balance for acc in asset_accounts)
+        total_liabilities = sum(acc.report_balance for acc in liability_accounts)
+        total_equity = sum(acc.report_balance for acc in equity_accounts)
         
         context.update({
+            'as_of': as_of,
+            'report_date': as_of or timezone.now().date(),
             'asset_accounts': asset_accounts,
             'liability_accounts': liability_accounts,
             'equity_accounts': equity_accounts,
@@ -502,6 +541,7 @@ class BalanceSheetView(LoginRequiredMixin, TemplateView):
         return context
 
 
+@method_decorator(reports_db, name='get')
 class LedgerView(LoginRequiredMixin, TemplateView):
     template_name = 'accounts/ledger.html'
     
@@ -549,54 +589,22 @@ class StudentReceiptCreateView(LoginRequiredMixin, CreateView):
     
     def form_valid(self, form):
         form.instance.created_by = self.request.user
-        
-        # CRITICAL: Ensure student has AR account before creating receipt
-        if form.instance.student_profile:
-            try:
-                ar_account = form.instance.student_profile.ar_account
-                print(f"Student AR Account ready: {ar_account.code}")
-            except Exception as e:
-                messages.error(self.request, f'خطأ في إنشاء حساب الطالب: {str(e)}')
-                return self.form_invalid(form)
-        
-        # Handle enrollment for accrual accounting
-        if form.instance.student_profile and form.instance.course:
-            enrollment, created = StudentEnrollment.objects.get_or_create(
-                student=form.instance.student_profile,
-                course=form.instance.course,
-                defaults={
-                    'enrollment_date': form.instance.date,
-                    'total_amount': form.instance.course.price,
-                    'discount_percent': form.instance.student_profile.discount_percent or Decimal('0'),
-                    'discount_amount': form.instance.student_profile.discount_amount or Decimal('0'),
-                    'payment_method': form.instance.payment_method
-                }
-            )
-            form.instance.enrollment = enrollment
-            
-            # Create enrollment entry if new
-            if created:
-                try:
-                    enrollment.create_accrual_enrollment_entry(self.request.user)
-                    print(f"Created enrollment entry for {enrollment}")
-                except Exception as e:
-                    messages.warning(self.request, f'تحذير: لم يتم إنشاء قيد التسجيل: {str(e)}')
-        
-        response = super().form_valid(form)
-        
-        # Create accrual accounting journal entry
+        if form.instance.paid_amount is None:
+            form.instance.paid_amount = form.instance.net_amount
+
+        # Receipt, enrollment (if new) and all journal entries are written
+        # in one transaction; nothing is kept if any step fails.
         try:
-            self.object.create_accrual_journal_entry(self.request.user)
-            messages.success(
-                self.request, 
-                f'تم إنشاء إيصال الطالب والقيود المحاسبية بنجاح / Student receipt and accounting entries created successfully'
-            )
-            print(f"Successfully created journal entry for receipt {self.object.receipt_number}")
+            self.object = post_student_receipt(form.instance, self.request.user)
         except Exception as e:
-            print(f"Error creating journal entry: {e}")
             messages.error(self.request, f'خطأ في إنشاء القيد المحاسبي / Error creating journal entry: {str(e)}')
-        
-        return response
+            return self.form_invalid(form)
+
+        messages.success(
+            self.request, 
+            'تم إنشاء إيصال الطالب والقيود المحاسبية بنجاح / Student receipt and accounting entries created successfully'
+        )
+        return redirect(self.get_success_url())
     
     def get_success_url(self):
         return reverse_lazy('accounts:student_receipt_detail', kwargs={'pk': self.object.pk})
@@ -669,6 +677,11 @@ class ReceiptsExpensesView(LoginRequiredMixin, TemplateView):
             'net_today': today_receipts_total - today_expenses_total,
             'receipt_form': StudentReceiptForm(),
             'expense_form': ExpenseEntryForm(),
+            'today': today,
+            'print_courses': Course.objects.filter(is_active=True).order_by('name'),
+            'print_cashiers': User.objects.filter(
+                pk__in=StudentReceipt.objects.values('created_by_id')
+            ).order_by('username'),
         })
         
         return context
@@ -878,6 +891,7 @@ class EmployeeFinancialProfileView(LoginRequiredMixin, TemplateView):
         return context
 
 
+@method_decorator(reports_db, name='get')
 class OutstandingCoursesView(LoginRequiredMixin, TemplateView):
     template_name = 'accounts/outstanding_courses.html'
     
@@ -933,6 +947,7 @@ class OutstandingCoursesView(LoginRequiredMixin, TemplateView):
         return context
 
 
+@method_decorator(reports_db, name='get')
 class OutstandingCourseStudentsView(LoginRequiredMixin, TemplateView):
     template_name = 'accounts/outstanding_course_students.html'
     
@@ -993,8 +1008,14 @@ class BudgetListView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
+        # Live actuals for every listed budget (not saved)
+        budgets = list(context['budgets'])
+        actuals = budget_actuals(budgets, rollup=self.request.GET.get('rollup') == '1')
+        for budget in budgets:
+            budget.actual_amount = actuals[budget.pk]
+        context['budgets'] = context['object_list'] = budgets
+        
         # Calculate budget summary
-        budgets = self.get_queryset()
         total_budgeted = sum(b.budgeted_amount for b in budgets)
         total_actual = sum(b.actual_amount for b in budgets)
         total_variance = total_actual - total_budgeted
@@ -1035,25 +1056,22 @@ class BudgetDetailView(LoginRequiredMixin, DetailView):
     template_name = 'accounts/budget_detail.html'
     context_object_name = 'budget'
     
+    def get_queryset(self):
+        return Budget.objects.select_related('account', 'period')
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        budget = self.get_object()
+        budget = self.object
         
-        # Calculate actual amount from transactions
-        actual_amount = Transaction.objects.filter(
-            account=budget.account,
-            journal_entry__date__range=[budget.period.start_date, budget.period.end_date],
-            journal_entry__is_posted=True
-        ).aggregate(
-            total=Sum('amount')
-        )['total'] or Decimal('0.00')
-        
-        # Update actual amount
-        budget.actual_amount = actual_amount
-        budget.variance = budget.calculate_variance()
-        budget.save()
+        # Live actual amount, shown without writing the budget row
+        rollup = self.request.GET.get('rollup') == '1'
+        budget.actual_amount = budget_actuals([budget], rollup=rollup)[budget.pk]
         
         context['budget'] = budget
+        context['remaining_amount'] = budget.budgeted_amount - budget.actual_amount
+        context['usage_percentage'] = (
+            int(budget.actual_amount * 100 / budget.budgeted_amount) if budget.budgeted_amount else 0
+        )
         return context
 
 
@@ -1104,11 +1122,11 @@ class ClosePeriodView(LoginRequiredMixin, View):
         if period.is_closed:
             messages.error(request, 'الفترة مقفلة بالفعل / Period is already closed')
         else:
-            period.is_closed = True
-            period.closed_at = timezone.now()
-            period.closed_by = request.user
-            period.save()
-            messages.success(request, 'تم إقفال الفترة المحاسبية بنجاح / Accounting period closed successfully')
+            try:
+                period.close(request.user)
+                messages.success(request, 'تم إقفال الفترة المحاسبية بنجاح / Accounting period closed successfully')
+            except ValueError as e:
+                messages.error(request, f'تعذر إقفال الفترة / Could not close period: {e}')
         
         return redirect('accounts:period_list')
 
@@ -1187,69 +1205,198 @@ class DiscountRuleDeleteView(LoginRequiredMixin, DeleteView):
 
 
 # AJAX Views
+@login_required
+@require_GET
+def pricing_catalog(request):
+    """Course prices and discount rules in one JSON bundle (see accounts/pricing.py).
+
+    ``?v=<version>`` URLs never change, so they are cached for a year;
+    the bare URL is revalidated with its ETag on every use.
+    """
+    from .pricing import catalog
+
+    bundle = catalog()
+    etag = f'"{bundle["version"]}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponse(status=304)
+    else:
+        response = JsonResponse(bundle, json_dumps_params={'ensure_ascii': False})
+    response['ETag'] = etag
+    if request.GET.get('v') == bundle['version']:
+        response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 @require_GET
 def ajax_course_price(request, pk):
+    from .pricing import catalog
+
+    for course in catalog()['courses']:
+        if course['id'] == pk:
+            return JsonResponse({'price': float(course['price'])})
     course = get_object_or_404(Course, pk=pk)
     return JsonResponse({'price': float(course.price)})
 
 
 @require_GET
 def ajax_discount_rule(request, reason):
-    try:
-        discount_rule = DiscountRule.objects.get(reason=reason, is_active=True)
+    from .pricing import find_discount
+
+    discount_rule = find_discount(reason)
+    if discount_rule is not None:
         return JsonResponse({
             'success': True,
-            'discount_percent': float(discount_rule.discount_percent),
-            'discount_amount': float(discount_rule.discount_amount),
-            'description': discount_rule.description
-        })
-    except DiscountRule.DoesNotExist:
-        return JsonResponse({
-            'success': False,
-            'error': 'Discount rule not found'
+            'discount_percent': float(discount_rule['percent']),
+            'discount_amount': float(discount_rule['amount']),
+            'description': discount_rule['description']
         })
+    return JsonResponse({
+        'success': False,
+        'error': 'Discount rule not found'
+    })
+
+
+AUTOCOMPLETE_LIMIT = 20
+
+
+def _prefix_filter(queryset, q, *fields):
+    """Filter ``queryset`` to rows where any of ``fields`` starts with ``q``.
+
+    Written as a range on ``Lower(field)`` rather than ``istartswith`` so the
+    lookup can use the matching ``Lower`` expression indexes.
+    """
+    from django.db.models.functions import Lower
+
+    q = q.lower()
+    condition = Q()
+    for field in fields:
+        alias = f"{field.replace('__', '_')}_lower"
+        queryset = queryset.annotate(**{alias: Lower(field)})
+        condition |= Q(**{f'{alias}__gte': q, f'{alias}__lt': q + '\uffff'})
+    return queryset.filter(condition)
+
+
+def _autocomplete_response(items):
+    return JsonResponse({'results': [{'id': pk, 'text': text} for pk, text in items]})
+
+
+@login_required
+@require_GET
+def autocomplete_accounts(request):
+    """Active accounts whose code or name starts with ``q``."""
+    q = request.GET.get('q', '').strip()
+    if not q:
+        return _autocomplete_response([])
+    accounts = Account.objects.filter(is_active=True)
+    by_code = accounts.filter(code__gte=q, code__lt=q + '\uffff')
+    by_name = _prefix_filter(accounts, q, 'name', 'name_ar')
+    rows = list(by_code.order_by('code')[:AUTOCOMPLETE_LIMIT])
+    if len(rows) < AUTOCOMPLETE_LIMIT:
+        seen = {a.pk for a in rows}
+        rows += [a for a in by_name.order_by('code')[:AUTOCOMPLETE_LIMIT] if a.pk not in seen]
+    return _autocomplete_response((a.pk, str(a)) for a in rows[:AUTOCOMPLETE_LIMIT])
+
+
+@login_required
+@require_GET
+def autocomplete_students(request):
+    """Active student profiles whose name or student number starts with ``q``."""
+    q = request.GET.get('q', '').strip()
+    if not q:
+        return _autocomplete_response([])
+    students = _prefix_filter(SProfile.objects.filter(is_active=True), q, 'full_name', 'student_number')
+    rows = students.order_by('full_name').values_list('pk', 'full_name')[:AUTOCOMPLETE_LIMIT]
+    return _autocomplete_response(rows)
+
+
+@login_required
+@require_GET
+def autocomplete_employees(request):
+    """Employees whose first name, last name or username starts with ``q``."""
+    q = request.GET.get('q', '').strip()
+    if not q:
+        return _autocomplete_response([])
+    employees = _prefix_filter(
+        Employee.objects.select_related('user'), q, 'user__first_name', 'user__last_name', 'user__username'
+    ).order_by('user__first_name', 'user__last_name', 'user__username')[:AUTOCOMPLETE_LIMIT]
+    return _autocomplete_response((e.pk, e.full_name) for e in employees)
+
+
+@login_required
+@require_GET
+def autocomplete_teachers(request):
+    """Teachers whose name starts with ``q``."""
+    q = request.GET.get('q', '').strip()
+    if not q:
+        return _autocomplete_response([])
+    teachers = _prefix_filter(Teacher.objects.all(), q, 'full_name')
+    rows = teachers.order_by('full_name').values_list('pk', 'full_name')[:AUTOCOMPLETE_LIMIT]
+    return _autocomplete_response(rows)
 
 
 @login_required
 def student_receipt_print(request, pk):
-    receipt = get_object_or_404(StudentReceipt, pk=pk)
-    
-    # Calculate totals for print view
-    course_price = receipt.course.price or Decimal('0') if receipt.course else receipt.amount or Decimal('0')
-    
-    # Calculate net due and paid total
-    if receipt.student_profile and receipt.course:
-        # Use student's default discounts
-        discount_percent = receipt.student_profile.discount_percent or Decimal('0')
-        discount_amount = receipt.student_profile.discount_amount or Decimal('0')
-        
-        after_percent = course_price - (course_price * discount_percent / Decimal('100'))
-        net_due = max(Decimal('0'), after_percent - discount_amount)
-        
-        # Calculate paid total including this receipt
-        paid_total = StudentReceipt.objects.filter(
-            student_profile=receipt.student_profile,
-            course=receipt.course,
-            date__lte=receipt.date
-        ).aggregate(total=Sum('paid_amount'))['total'] or Decimal('0')
-    else:
-        # Fallback for legacy receipts
-        net_due = receipt.net_amount or receipt.amount or Decimal('0')
-        paid_total = receipt.paid_amount or Decimal('0')
-        discount_percent = receipt.discount_percent or Decimal('0')
-        discount_amount = receipt.discount_amount or Decimal('0')
-    
-    remaining = max(Decimal('0'), net_due - paid_total)
-    
-    return render(request, 'accounts/student_receipt_print.html', {
-        'receipt': receipt, 
-        'course_price': course_price,
-        'net_due': net_due,
-        'paid_total': paid_total, 
-        'remaining': remaining,
-        'discount_percent': discount_percent,
-        'discount_amount': discount_amount
-    })
+    receipt = get_object_or_404(
+        StudentReceipt.objects.select_related('student_profile', 'course', 'created_by'), pk=pk
+    )
+    figures = receipt_print_figures([receipt])[receipt.pk]
+    return render(request, 'accounts/student_receipt_print.html', {'receipt': receipt, **figures})
+
+
+class StudentReceiptBatchPrintView(LoginRequiredMixin, View):
+    """All receipts of a date range (cashier / course optional) as one PDF.
+
+    ``date_from``, ``date_to``, ``cashier``, ``course`` and ``unprinted=1``
+    select the receipts; dates default to today.  GET only previews the PDF;
+    POST prints it and marks the receipts printed, and with ``background=1``
+    builds it in a background job.
+    """
+
+    def get(self, request):
+        return self._print(request, request.GET, mark_printed=False)
+
+    def post(self, request):
+        return self._print(request, request.POST, mark_printed=True)
+
+    def _print(self, request, params, mark_printed):
+        from django.utils.dateparse import parse_date
+
+        today = timezone.now().date()
+        try:
+            date_from = parse_date(params.get('date_from') or '') or today
+            date_to = parse_date(params.get('date_to') or '') or date_from
+        except ValueError:
+            messages.error(request, 'تاريخ غير صحيح / Invalid date')
+            return redirect('accounts:receipts_expenses')
+        filters = {
+            'date_from': date_from,
+            'date_to': date_to,
+            'cashier_id': params.get('cashier') if (params.get('cashier') or '').isdigit() else None,
+            'course_id': params.get('course') if (params.get('course') or '').isdigit() else None,
+            'unprinted': params.get('unprinted') == '1',
+        }
+
+        receipts = receipts_for_print(**filters)
+        if not receipts.exists():
+            messages.warning(request, 'لا توجد إيصالات للطباعة / No receipts to print')
+            return redirect('accounts:receipts_expenses')
+
+        if mark_printed and params.get('background'):
+            job = enqueue('accounts.receipts_batch_pdf', user=request.user, **{
+                **filters, 'date_from': date_from.isoformat(), 'date_to': date_to.isoformat(),
+            })
+            return job_response(request, job)
+
+        try:
+            pdf = print_receipts_pdf(receipts, mark_printed=mark_printed)
+        except ValueError as e:
+            messages.error(request, f'خطأ في إنشاء الملف / PDF error: {e}')
+            return redirect('accounts:receipts_expenses')
+        response = HttpResponse(pdf, content_type='application/pdf')
+        response['Content-Disposition'] = f'inline; filename=receipts_{date_from}_{date_to}.pdf'
+        return response
 
 
 # Additional actions and exports
@@ -1287,75 +1434,106 @@ class EnrollmentWithdrawView(LoginRequiredMixin, View):
         return redirect(reverse_lazy('students:student_profile', kwargs={'pk': student.id}))
 
 
+class StudentReceiptBatchView(LoginRequiredMixin, View):
+    """POST /accounts/receipts/batch/ with a JSON list of receipts or a CSV upload.
+
+    Rows carry ``student``, ``course``, ``amount``, ``method`` and ``date``.
+    Add ``strict`` to post nothing unless every row is valid, ``dry_run`` to
+    validate only.  Responds with one result per row.
+    """
+    def post(self, request):
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                fmt = 'csv' if upload.name.lower().endswith('.csv') else 'json'
+                rows = load_receipt_rows(upload.read(), fmt)
+            else:
+                fmt = 'csv' if request.content_type == 'text/csv' else 'json'
+                rows = load_receipt_rows(request.body, fmt)
+        except ValueError as e:
+            return JsonResponse({'ok': False, 'error': 'INVALID_PAYLOAD', 'detail': str(e)}, status=400)
+
+        flags = request.GET.copy()
+        flags.update(request.POST)
+        strict = flags.get('strict') in ('1', 'true', 'on')
+        dry_run = flags.get('dry_run') in ('1', 'true', 'on')
+        try:
+            results = post_receipt_batch(rows, request.user, strict=strict, dry_run=dry_run)
+        except (ValidationError, ValueError) as e:
+            return JsonResponse({'ok': False, 'error': str(e)}, status=400)
+
+        return JsonResponse({
+            'ok': all(r['ok'] for r in results),
+            'posted': sum(1 for r in results if r.get('posted')),
+            'failed': sum(1 for r in results if not r['ok']),
+            'results': results,
+        })
+
+
+def _account_columns(amount_header='Amount'):
+    return [
+        Column('Code', 'code', width=14),
+        Column('Name', 'display_name', width=40),
+        Column('Type', 'account_type', width=12),
+        Column(amount_header, 'report_balance', width=16, number_format=MONEY_FORMAT),
+    ]
+
+
+@method_decorator(reports_db, name='get')
 class TrialBalanceExportExcelView(LoginRequiredMixin, View):
     def get(self, request):
-        accounts = Account.objects.filter(is_active=True).order_by('code')
-        rows = []
-        for a in accounts:
-            net = a.get_net_balance()
-            rows.append({'Code': a.code, 'Name': a.display_name, 'Type': a.account_type, 'Net': float(net)})
-        import pandas as pd
-        df = pd.DataFrame(rows)
-        resp = HttpResponse(content_type='application/vnd.ms-excel')
-        resp['Content-Disposition'] = 'attachment; filename="trial_balance.xlsx"'
-        df.to_excel(resp, index=False, sheet_name='TrialBalance')
-        return resp
+        accounts = report_accounts([t for t, _ in Account.ACCOUNT_TYPE_CHOICES], _report_date(request))
+        return export_response(accounts, _account_columns('Net'), 'trial_balance',
+                               fmt=export_format(request), sheet_title='TrialBalance')
+
+
+def _sectioned(sections):
+    for section, accounts in sections:
+        for account in accounts:
+            account.section = section
+            yield account
 
 
+@method_decorator(reports_db, name='get')
 class IncomeStatementExportExcelView(LoginRequiredMixin, View):
     def get(self, request):
-        rev = Account.objects.filter(account_type='REVENUE', is_active=True).order_by('code')
-        exp = Account.objects.filter(account_type='EXPENSE', is_active=True).order_by('code')
-        rows = [{'Section': 'Revenue', 'Code': a.code, 'Name': a.display_name, 'Amount': float(a.get_net_balance())} for a in rev]
-        rows += [{'Section': 'Expense', 'Code': a.code, 'Name': a.display_name, 'Amount': float(a.get_net_balance())} for a in exp]
-        import pandas as pd
-        df = pd.DataFrame(rows)
-        resp = HttpResponse(content_type='application/vnd.ms-excel')
-        resp['Content-Disposition'] = 'attachment; filename="income_statement.xlsx"'
-        df.to_excel(resp, index=False, sheet_name='IncomeStatement')
-        return resp
+        balances = movements_between(*_income_statement_range(request))
+        rows = _sectioned([
+            ('Revenue', report_accounts(['REVENUE'], balances=balances)),
+            ('Expense', report_accounts(['EXPENSE'], balances=balances)),
+        ])
+        columns = [Column('Section', 'section', width=14)] + _account_columns()
+        return export_response(rows, columns, 'income_statement',
+                               fmt=export_format(request), sheet_title='IncomeStatement')
 
 
+@method_decorator(reports_db, name='get')
 class BalanceSheetExportExcelView(LoginRequiredMixin, View):
     def get(self, request):
-        assets = Account.objects.filter(account_type='ASSET', is_active=True).order_by('code')
-        liab = Account.objects.filter(account_type='LIABILITY', is_active=True).order_by('code')
-        eq = Account.objects.filter(account_type='EQUITY', is_active=True).order_by('code')
-        rows = []
-        for a in assets: rows.append({'Section':'Assets','Code':a.code,'Name':a.display_name,'Amount':float(a.get_net_balance())})
-        for a in liab: rows.append({'Section':'Liabilities','Code':a.code,'Name':a.display_name,'Amount':float(a.get_net_balance())})
-        for a in eq: rows.append({'Section':'Equity','Code':a.code,'Name':a.display_name,'Amount':float(a.get_net_balance())})
-        import pandas as pd
-        df = pd.DataFrame(rows)
-        resp = HttpResponse(content_type='application/vnd.ms-excel')
-        resp['Content-Disposition'] = 'attachment; filename="balance_sheet.xlsx"'
-        df.to_excel(resp, index=False, sheet_name='BalanceSheet')
-        return resp
-
-
+        balances = balances_as_of(_report_date(request))
+        rows = _sectioned([
+            ('Assets', report_accounts(['ASSET'], balances=balances)),
+            ('Liabilities', report_accounts(['LIABILITY'], balances=balances)),
+            ('Equity', report_accounts(['EQUITY'], balances=balances)),
+        ])
+        columns = [Column('Section', 'section', width=14)] + _account_columns()
+        return export_response(rows, columns, 'balance_sheet',
+                               fmt=export_format(request), sheet_title='BalanceSheet')
+
+
+@method_decorator(reports_db, name='get')
 class LedgerExportExcelView(LoginRequiredMixin, View):
     def get(self, request, account_id):
         account = get_object_or_404(Account, id=account_id)
-        tx = Transaction.objects.filter(account=account).select_related('journal_entry').order_by('journal_entry__date', 'journal_entry__created_at')
-        rows = []
-        rb = Decimal('0.00')
-        for t in tx:
-            amt = t.amount if (t.is_debit and account.account_type in ['ASSET','EXPENSE']) or ((not t.is_debit) and account.account_type in ['LIABILITY','EQUITY','REVENUE']) else -t.amount
-            rb += amt
-            rows.append({
-                'Date': t.journal_entry.date.isoformat(),
-                'Reference': t.journal_entry.reference,
-                'Description': t.description,
-                'Debit': float(t.amount if t.is_debit else 0),
-                'Credit': float(t.amount if not t.is_debit else 0),
-                'RunningBalance': float(rb),
-            })
-        import pandas as pd
-        df = pd.DataFrame(rows)
-        resp = HttpResponse(content_type='application/vnd.ms-excel')
-        resp['Content-Disposition'] = f'attachment; filename="ledger_{account.code}.xlsx"'
-        df.to_excel(resp, index=False, sheet_name='Ledger')
-        return resp
+        fmt = export_format(request)
+        # ?archive=1: the full history, archived periods in detail
+        include_archive = request.GET.get('archive') == '1'
+        if request.GET.get('background'):
+            job = enqueue('accounts.ledger_export', user=request.user, account_id=account.pk, fmt=fmt,
+                          include_archive=include_archive)
+            return job_response(request, job)
+        return export_response(ledger_rows(account, include_archive), LEDGER_COLUMNS, f'ledger_{account.code}',
+                               fmt=fmt, sheet_title='Ledger')
 
 
 
@@ -1464,7 +1642,7 @@ class EnrollmentWithdrawView(LoginRequiredMixin, View):
             # دائن: ذمم الطالب (عكس)
             Transaction.objects.create(
                 journal_entry=entry,
-                account=enrollment.student.ar_account,
+                account=enrollment.student.ensure_ar_account(),
                 amount=enrollment.net_amount,
                 is_debit=False,
                 description=f"عكس ذمم مدينة للطالب"
@@ -0,0 +1,37 @@
+from django import forms
+from django.urls import reverse
+
+
+class AutocompleteSelect(forms.Select):
+    """Select for a ModelChoiceField that only renders the chosen option.
+
+    The remaining options are fetched while typing from the JSON endpoint
+    named by ``url`` (see ``static/js/autocomplete.js``).  The field keeps
+    its queryset, so submitted ids are still validated server side.
+    """
+
+    def __init__(self, url, attrs=None):
+        self.url = url
+        super().__init__(attrs)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = reverse(self.url)
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        iterator = self.choices
+        choices = []
+        if getattr(iterator, 'field', None) is not None:
+            if iterator.field.empty_label is not None:
+                choices.append(('', iterator.field.empty_label))
+            selected = [v for v in value if str(v).isdigit()]
+            if selected:
+                choices.extend(iterator.choice(obj) for obj in iterator.queryset.filter(pk__in=selected))
+        else:
+            choices = list(iterator)
+        self.choices = choices
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = iterator
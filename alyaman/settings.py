@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     "sslserver",
     # Third-party apps
     "mptt",
+    "rest_framework",
     "crispy_forms",
     "crispy_bootstrap4",
 ]
@@ -91,8 +92,25 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-    }
+    },
+    # Heavy reports read through this alias (see pages/db.py): the same file
+    # opened read-only; on a server database point it at a read replica.
+    "reports": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": (BASE_DIR / "db.sqlite3").as_uri() + "?mode=ro",
+        "TEST": {"MIRROR": "default"},
+    },
+    # The activity log, in its own file so logging never waits on the
+    # ledger's write lock (see pages/db.py)
+    "activity": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "activity.sqlite3",
+    },
 }
+DATABASE_ROUTERS = ["pages.db.ActivityLogRouter", "pages.db.ReportsRouter"]
+# Switch the SQLite files to WAL mode on connect so report readers do not
+# block writers (pages.db.enable_sqlite_wal); turn on in deployments only
+SQLITE_WAL = False
 
 # ==============================
 # Password validators
@@ -130,6 +148,21 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap4"
 CRISPY_TEMPLATE_PACK = "bootstrap4"
 
+# ==============================
+# REST API (read-only, /accounts/api/)
+# ==============================
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "rest_framework.authentication.SessionAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+    ],
+    "DEFAULT_PERMISSION_CLASSES": [
+        "rest_framework.permissions.IsAuthenticated",
+    ],
+    # Decimals as strings so balances keep their exact value
+    "COERCE_DECIMAL_TO_STRING": True,
+}
+
 # ==============================
 # Auth redirects
 # ==============================
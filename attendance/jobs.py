@@ -0,0 +1,9 @@
+"""Background job handlers of the attendance app (see pages/jobs.py)."""
+from pages.jobs import register
+from .rollups import rebuild_rollups
+
+
+@register('attendance.rebuild_rollups')
+def rebuild_attendance_rollups(job):
+    students, teachers = rebuild_rollups()
+    return {'student_months': students, 'teacher_months': teachers}
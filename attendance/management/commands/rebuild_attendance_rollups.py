@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from attendance.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the monthly student and teacher attendance rollups from the daily records."
+
+    def handle(self, *args, **options):
+        students, teachers = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollups rebuilt. Student months: {students}, teacher months: {teachers}"
+        ))
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    Attendance = apps.get_model('attendance', 'Attendance')
+    TeacherAttendance = apps.get_model('attendance', 'TeacherAttendance')
+    StudentAttendanceMonth = apps.get_model('attendance', 'StudentAttendanceMonth')
+    TeacherAttendanceMonth = apps.get_model('attendance', 'TeacherAttendanceMonth')
+
+    def counts(statuses):
+        return {status: Count('id', filter=Q(status=status)) for status in statuses}
+
+    StudentAttendanceMonth.objects.bulk_create([
+        StudentAttendanceMonth(**row) for row in Attendance.objects.annotate(
+            month=TruncMonth('date'),
+        ).values('student_id', 'classroom_id', 'month').annotate(
+            **counts(('present', 'absent', 'late')),
+        ).order_by()
+    ], batch_size=1000)
+    TeacherAttendanceMonth.objects.bulk_create([
+        TeacherAttendanceMonth(**{**row, 'sessions': row['sessions'] or 0}) for row in TeacherAttendance.objects.annotate(
+            month=TruncMonth('date'),
+        ).values('teacher_id', 'month').annotate(
+            sessions=Sum('session_count', filter=Q(status='present')),
+            **counts(('present', 'absent', 'late', 'permission')),
+        ).order_by()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_student_name_id_idx'),
+        ('employ', '0002_teacher_name_index'),
+        ('classroom', '0001_initial'),
+        ('attendance', '0002_attendance_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherAttendanceMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='أول يوم في الشهر', verbose_name='الشهر')),
+                ('present', models.PositiveIntegerField(default=0, verbose_name='حاضر')),
+                ('absent', models.PositiveIntegerField(default=0, verbose_name='غائب')),
+                ('late', models.PositiveIntegerField(default=0, verbose_name='متأخر')),
+                ('permission', models.PositiveIntegerField(default=0, verbose_name='إذن')),
+                ('sessions', models.PositiveIntegerField(default=0, verbose_name='عدد الجلسات')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='آخر تعديل')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_months', to='employ.teacher', verbose_name='المدرس')),
+            ],
+            options={
+                'verbose_name': 'حضور شهري لمدرس',
+                'verbose_name_plural': 'الحضور الشهري للمدرسين',
+                'indexes': [models.Index(fields=['month'], name='teacher_att_month_idx')],
+                'unique_together': {('teacher', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentAttendanceMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='أول يوم في الشهر', verbose_name='الشهر')),
+                ('present', models.PositiveIntegerField(default=0, verbose_name='حاضر')),
+                ('absent', models.PositiveIntegerField(default=0, verbose_name='غائب')),
+                ('late', models.PositiveIntegerField(default=0, verbose_name='متأخر')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='آخر تعديل')),
+                ('classroom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_months', to='classroom.classroom', verbose_name='الشعبة')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_months', to='students.student', verbose_name='الطالب')),
+            ],
+            options={
+                'verbose_name': 'حضور شهري لطالب',
+                'verbose_name_plural': 'الحضور الشهري للطلاب',
+                'indexes': [models.Index(fields=['classroom', 'month'], name='att_month_classroom_idx'), models.Index(fields=['month'], name='att_month_month_idx')],
+                'unique_together': {('student', 'classroom', 'month')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
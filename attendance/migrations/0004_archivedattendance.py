@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_student_name_id_idx'),
+        ('classroom', '0001_initial'),
+        ('attendance', '0003_monthly_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAttendance',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField(db_index=True, verbose_name='التاريخ')),
+                ('status', models.CharField(choices=[('present', 'حاضر'), ('absent', 'غائب'), ('late', 'متأخر')], max_length=10, verbose_name='الحالة')),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='ملاحظات')),
+                ('updated_at', models.DateTimeField(verbose_name='آخر تعديل')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الأرشفة')),
+                ('classroom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='classroom.classroom', verbose_name='الشعبة')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='students.student', verbose_name='الطالب')),
+            ],
+            options={
+                'verbose_name': 'حضور مؤرشف',
+                'verbose_name_plural': 'سجل الحضور المؤرشف',
+            },
+        ),
+    ]
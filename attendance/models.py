@@ -15,14 +15,34 @@ class Attendance(models.Model):
     date = models.DateField(default=timezone.now, verbose_name='التاريخ')
     status = models.CharField(max_length=10, choices=Status.choices, default='absent', verbose_name='الحالة')
     notes = models.TextField(blank=True, null=True, verbose_name='ملاحظات')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='آخر تعديل')
     
     class Meta:
         verbose_name = 'حضور'
         verbose_name_plural = 'سجل الحضور'
         unique_together = ('student', 'date')  # منع تكرار تسجيل نفس الطالب في نفس اليوم
+        indexes = [
+            models.Index(fields=['updated_at'], name='attendance_updated_at_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.full_name} - {self.date} - {self.get_status_display()}"
+
+
+class ArchivedAttendance(models.Model):
+    """سجل حضور قديم نُقل من جدول Attendance (بنفس المعرّف)؛ الإحصاءات الشهرية لا تتغير"""
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='+', verbose_name='الطالب')
+    classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE, related_name='+', verbose_name='الشعبة')
+    date = models.DateField(db_index=True, verbose_name='التاريخ')
+    status = models.CharField(max_length=10, choices=Attendance.Status.choices, verbose_name='الحالة')
+    notes = models.TextField(blank=True, null=True, verbose_name='ملاحظات')
+    updated_at = models.DateTimeField(verbose_name='آخر تعديل')
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الأرشفة')
+
+    class Meta:
+        verbose_name = 'حضور مؤرشف'
+        verbose_name_plural = 'سجل الحضور المؤرشف'
     
     
     
@@ -45,4 +65,68 @@ class TeacherAttendance(models.Model):
         unique_together = ('teacher', 'date')  # منع تكرار تسجيل نفس المدرس في نفس اليوم
     
     def __str__(self):
-        return f"{self.teacher.full_name} - {self.date} - {self.get_status_display()}"    
\ No newline at end of file
+        return f"{self.teacher.full_name} - {self.date} - {self.get_status_display()}"    
+
+class StudentAttendanceMonth(models.Model):
+    """Attendance counts of one student in one classroom for one month.
+
+    Maintained by ``attendance.rollups`` whenever ``Attendance`` changes, so
+    reports never scan the daily records.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendance_months', verbose_name='الطالب')
+    classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE, related_name='attendance_months', verbose_name='الشعبة')
+    month = models.DateField(verbose_name='الشهر', help_text='أول يوم في الشهر')
+    present = models.PositiveIntegerField(default=0, verbose_name='حاضر')
+    absent = models.PositiveIntegerField(default=0, verbose_name='غائب')
+    late = models.PositiveIntegerField(default=0, verbose_name='متأخر')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='آخر تعديل')
+
+    class Meta:
+        verbose_name = 'حضور شهري لطالب'
+        verbose_name_plural = 'الحضور الشهري للطلاب'
+        unique_together = ('student', 'classroom', 'month')
+        indexes = [
+            models.Index(fields=['classroom', 'month'], name='att_month_classroom_idx'),
+            models.Index(fields=['month'], name='att_month_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.full_name} - {self.month:%Y-%m}"
+
+    @property
+    def total(self):
+        return self.present + self.absent + self.late
+
+    @property
+    def absence_rate(self):
+        return self.absent / self.total if self.total else 0
+
+
+class TeacherAttendanceMonth(models.Model):
+    """Attendance counts and sessions of one teacher for one month.
+
+    ``sessions`` only counts days marked present, the sessions that are paid.
+    """
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='attendance_months', verbose_name='المدرس')
+    month = models.DateField(verbose_name='الشهر', help_text='أول يوم في الشهر')
+    present = models.PositiveIntegerField(default=0, verbose_name='حاضر')
+    absent = models.PositiveIntegerField(default=0, verbose_name='غائب')
+    late = models.PositiveIntegerField(default=0, verbose_name='متأخر')
+    permission = models.PositiveIntegerField(default=0, verbose_name='إذن')
+    sessions = models.PositiveIntegerField(default=0, verbose_name='عدد الجلسات')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='آخر تعديل')
+
+    class Meta:
+        verbose_name = 'حضور شهري لمدرس'
+        verbose_name_plural = 'الحضور الشهري للمدرسين'
+        unique_together = ('teacher', 'month')
+        indexes = [
+            models.Index(fields=['month'], name='teacher_att_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.teacher.full_name} - {self.month:%Y-%m}"
+
+    @property
+    def total(self):
+        return self.present + self.absent + self.late + self.permission
@@ -0,0 +1,255 @@
+"""Monthly attendance rollups and the analytics read from them.
+
+``StudentAttendanceMonth`` and ``TeacherAttendanceMonth`` hold one row of
+counts per student/classroom/month and per teacher/month.  Saving or
+deleting an ``Attendance`` / ``TeacherAttendance`` record recounts only the
+month it belongs to (and the month it moved out of, if its date or
+classroom changed).  ``rebuild_rollups`` recomputes everything, e.g. after
+bulk imports that bypass signals.
+
+Student counts include the records moved to ``ArchivedAttendance``
+(``manage.py archive_history``), so recounting or rebuilding an archived
+month keeps its figures.  Teacher records are never archived.
+"""
+import datetime
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.functions import Cast, TruncMonth
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils.dateparse import parse_date
+
+from .models import (
+    ArchivedAttendance, Attendance, StudentAttendanceMonth, TeacherAttendance, TeacherAttendanceMonth,
+)
+
+STUDENT_STATUSES = ('present', 'absent', 'late')
+TEACHER_STATUSES = ('present', 'absent', 'late', 'permission')
+
+
+def month_start(value):
+    """First day of the month of a date, datetime or 'YYYY-MM-DD' string"""
+    if isinstance(value, str):
+        value = parse_date(value[:10])
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+
+def next_month(month):
+    return (month + datetime.timedelta(days=32)).replace(day=1)
+
+
+def _status_counts(statuses):
+    return {status: Count('id', filter=Q(status=status)) for status in statuses}
+
+
+def refresh_student_month(student_id, classroom_id, month):
+    """Recount one student's month in one classroom from the daily records, archived ones included"""
+    counts = dict.fromkeys(STUDENT_STATUSES, 0)
+    for model in (Attendance, ArchivedAttendance):
+        totals = model.objects.filter(
+            student_id=student_id, classroom_id=classroom_id,
+            date__gte=month, date__lt=next_month(month),
+        ).aggregate(**_status_counts(STUDENT_STATUSES))
+        for status in STUDENT_STATUSES:
+            counts[status] += totals[status]
+    if not any(counts.values()):
+        StudentAttendanceMonth.objects.filter(student_id=student_id, classroom_id=classroom_id, month=month).delete()
+        return None
+    rollup, _ = StudentAttendanceMonth.objects.update_or_create(
+        student_id=student_id, classroom_id=classroom_id, month=month, defaults=counts,
+    )
+    return rollup
+
+
+def refresh_teacher_month(teacher_id, month):
+    """Recount one teacher's month from the daily records"""
+    counts = TeacherAttendance.objects.filter(
+        teacher_id=teacher_id, date__gte=month, date__lt=next_month(month),
+    ).aggregate(
+        sessions=Sum('session_count', filter=Q(status='present')),
+        **_status_counts(TEACHER_STATUSES),
+    )
+    counts['sessions'] = counts['sessions'] or 0
+    if not any(counts.values()):
+        TeacherAttendanceMonth.objects.filter(teacher_id=teacher_id, month=month).delete()
+        return None
+    rollup, _ = TeacherAttendanceMonth.objects.update_or_create(
+        teacher_id=teacher_id, month=month, defaults=counts,
+    )
+    return rollup
+
+
+def rebuild_rollups():
+    """Recompute every rollup row with three grouped queries; returns the row counts"""
+    with transaction.atomic():
+        StudentAttendanceMonth.objects.all().delete()
+        TeacherAttendanceMonth.objects.all().delete()
+        students = {}
+        for model in (Attendance, ArchivedAttendance):
+            for row in model.objects.annotate(
+                month=TruncMonth('date'),
+            ).values('student_id', 'classroom_id', 'month').annotate(
+                **_status_counts(STUDENT_STATUSES),
+            ).order_by():
+                key = (row['student_id'], row['classroom_id'], row['month'])
+                counts = students.setdefault(key, dict.fromkeys(STUDENT_STATUSES, 0))
+                for status in STUDENT_STATUSES:
+                    counts[status] += row[status]
+        student_rows = StudentAttendanceMonth.objects.bulk_create([
+            StudentAttendanceMonth(student_id=student_id, classroom_id=classroom_id, month=month, **counts)
+            for (student_id, classroom_id, month), counts in students.items()
+        ], batch_size=1000)
+        teacher_rows = TeacherAttendanceMonth.objects.bulk_create([
+            TeacherAttendanceMonth(**{**row, 'sessions': row['sessions'] or 0}) for row in TeacherAttendance.objects.annotate(
+                month=TruncMonth('date'),
+            ).values('teacher_id', 'month').annotate(
+                sessions=Sum('session_count', filter=Q(status='present')),
+                **_status_counts(TEACHER_STATUSES),
+            ).order_by()
+        ], batch_size=1000)
+    return len(student_rows), len(teacher_rows)
+
+
+# ---------------------------------------------------------------- signals
+
+def _student_key(record):
+    return record.student_id, record.classroom_id, month_start(record.date)
+
+
+def _teacher_key(record):
+    return record.teacher_id, month_start(record.date)
+
+
+@receiver(pre_save, sender=Attendance, dispatch_uid='attendance_rollup_pre_save')
+def _remember_student_key(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    old = Attendance.objects.filter(pk=instance.pk).values('student_id', 'classroom_id', 'date').first()
+    if old:
+        instance._rollup_old_key = (old['student_id'], old['classroom_id'], month_start(old['date']))
+
+
+@receiver(post_save, sender=Attendance, dispatch_uid='attendance_rollup_post_save')
+def _update_student_rollup(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    key = _student_key(instance)
+    refresh_student_month(*key)
+    old_key = getattr(instance, '_rollup_old_key', None)
+    if old_key and old_key != key:
+        refresh_student_month(*old_key)
+
+
+@receiver(post_delete, sender=Attendance, dispatch_uid='attendance_rollup_post_delete')
+def _delete_student_rollup(sender, instance, **kwargs):
+    refresh_student_month(*_student_key(instance))
+
+
+@receiver(pre_save, sender=TeacherAttendance, dispatch_uid='teacher_attendance_rollup_pre_save')
+def _remember_teacher_key(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    old = TeacherAttendance.objects.filter(pk=instance.pk).values('teacher_id', 'date').first()
+    if old:
+        instance._rollup_old_key = (old['teacher_id'], month_start(old['date']))
+
+
+@receiver(post_save, sender=TeacherAttendance, dispatch_uid='teacher_attendance_rollup_post_save')
+def _update_teacher_rollup(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    key = _teacher_key(instance)
+    refresh_teacher_month(*key)
+    old_key = getattr(instance, '_rollup_old_key', None)
+    if old_key and old_key != key:
+        refresh_teacher_month(*old_key)
+
+
+@receiver(post_delete, sender=TeacherAttendance, dispatch_uid='teacher_attendance_rollup_post_delete')
+def _delete_teacher_rollup(sender, instance, **kwargs):
+    refresh_teacher_month(*_teacher_key(instance))
+
+
+# ---------------------------------------------------------------- analytics
+
+def _rate(absent, total):
+    return round(100.0 * absent / total, 1) if total else 0.0
+
+
+def classroom_trends(first_month, last_month, classroom_id=None):
+    """Monthly absence rate of each classroom.
+
+    Returns ``(months, rows)``; each row is ``{'classroom', 'months': [...],
+    'rate'}`` with one ``{'month', 'present', 'absent', 'late', 'total',
+    'rate'}`` per month (None when nothing was recorded).
+    """
+    months = []
+    month = first_month
+    while month <= last_month:
+        months.append(month)
+        month = next_month(month)
+
+    rollups = StudentAttendanceMonth.objects.filter(month__gte=first_month, month__lte=last_month)
+    if classroom_id:
+        rollups = rollups.filter(classroom_id=classroom_id)
+    grouped = rollups.values('classroom_id', 'classroom__name', 'month').annotate(
+        present_sum=Sum('present'), absent_sum=Sum('absent'), late_sum=Sum('late'),
+    ).order_by('classroom__name', 'month')
+
+    by_classroom = {}
+    for row in grouped:
+        classroom = by_classroom.setdefault(row['classroom_id'], {
+            'classroom': {'id': row['classroom_id'], 'name': row['classroom__name']},
+            'cells': {}, 'absent': 0, 'total': 0,
+        })
+        total = row['present_sum'] + row['absent_sum'] + row['late_sum']
+        classroom['cells'][row['month']] = {
+            'month': row['month'], 'present': row['present_sum'], 'absent': row['absent_sum'],
+            'late': row['late_sum'], 'total': total, 'rate': _rate(row['absent_sum'], total),
+        }
+        classroom['absent'] += row['absent_sum']
+        classroom['total'] += total
+
+    rows = [{
+        'classroom': classroom['classroom'],
+        'months': [classroom['cells'].get(month) for month in months],
+        'rate': _rate(classroom['absent'], classroom['total']),
+    } for classroom in by_classroom.values()]
+    return months, rows
+
+
+def chronic_absentees(first_month, last_month, threshold=20, classroom_id=None):
+    """Students whose absence rate over the months exceeds ``threshold`` percent"""
+    rollups = StudentAttendanceMonth.objects.filter(month__gte=first_month, month__lte=last_month)
+    if classroom_id:
+        rollups = rollups.filter(classroom_id=classroom_id)
+    return list(rollups.values(
+        'student_id', 'student__full_name', 'classroom_id', 'classroom__name',
+    ).annotate(
+        absent_sum=Sum('absent'),
+        late_sum=Sum('late'),
+        total=Sum(F('present') + F('absent') + F('late')),
+    ).annotate(
+        rate=Cast(F('absent_sum'), FloatField()) * 100.0 / F('total'),
+    ).filter(total__gt=0, rate__gt=threshold).order_by('-rate', 'student__full_name'))
+
+
+def teacher_summary(first_month, last_month):
+    """Per-teacher totals over the months, including paid sessions"""
+    return list(TeacherAttendanceMonth.objects.filter(
+        month__gte=first_month, month__lte=last_month,
+    ).values('teacher_id', 'teacher__full_name').annotate(
+        present_sum=Sum('present'), absent_sum=Sum('absent'), late_sum=Sum('late'),
+        permission_sum=Sum('permission'), sessions_sum=Sum('sessions'),
+    ).order_by('teacher__full_name'))
+
+
+def teacher_sessions(month, teacher_ids=None):
+    """``{teacher_id: sessions}`` of one month, for payroll"""
+    rollups = TeacherAttendanceMonth.objects.filter(month=month)
+    if teacher_ids is not None:
+        rollups = rollups.filter(teacher_id__in=teacher_ids)
+    return dict(rollups.values_list('teacher_id', 'sessions'))
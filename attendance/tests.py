@@ -1,3 +1,40 @@
+import datetime
+
 from django.test import TestCase
 
-# Create your tests here.
+from attendance.models import ArchivedAttendance, Attendance, StudentAttendanceMonth
+from attendance.rollups import rebuild_rollups, refresh_student_month
+from classroom.models import Classroom
+from pages.archive import move_rows
+from students.models import Student
+
+
+class ArchivedRollupTests(TestCase):
+    # Saving any model checks the activity log table (pages.signals)
+    databases = {'default', 'activity'}
+
+    def setUp(self):
+        self.student = Student.objects.create(full_name='st')
+        self.classroom = Classroom.objects.create(name='c', class_type='course')
+        for day in range(45):
+            Attendance.objects.create(
+                student=self.student, classroom=self.classroom,
+                date=datetime.date(2020, 1, 1) + datetime.timedelta(days=day),
+                status='absent' if day % 3 else 'present',
+            )
+        Attendance.objects.create(student=self.student, classroom=self.classroom, date=datetime.date(2026, 1, 5))
+
+    def rollups(self):
+        return list(StudentAttendanceMonth.objects.order_by('month').values_list('month', 'present', 'absent'))
+
+    def test_archived_months_survive_a_rebuild(self):
+        expected = self.rollups()
+        move_rows(Attendance.objects.filter(date__year=2020), ArchivedAttendance, chunk_size=7)
+        self.assertEqual(ArchivedAttendance.objects.count(), 45)
+
+        self.assertEqual(rebuild_rollups(), (3, 0))
+        self.assertEqual(self.rollups(), expected)
+
+        refresh_student_month(self.student.pk, self.classroom.pk, datetime.date(2020, 1, 1))
+        self.assertEqual(self.rollups(), expected)
+        self.assertEqual(expected[0], (datetime.date(2020, 1, 1), 11, 20))
@@ -16,5 +16,6 @@ urlpatterns = [
         path('take-teacher-attendance/', views.TakeTeacherAttendanceView.as_view(), name='take_teacher_attendance'),
         path('teacher-attendance/detail/<str:date>/', views.TeacherAttendanceDetailView.as_view(), name='teacher_attendance_detail'),
         path('attendance/export/<int:classroom_id>/<str:date>/', views.export_attendance_to_excel, name='export_attendance'),
+        path('attendance/analytics/', views.AttendanceAnalyticsView.as_view(), name='attendance_analytics'),
 
 ]
\ No newline at end of file
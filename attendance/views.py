@@ -8,9 +8,11 @@ from employ.models import Teacher
 from django.contrib import messages
 from django.http import JsonResponse
 from django.db import IntegrityError
-import pandas as pd
 from django.http import HttpResponse
+from pages.exports import Column, export_format, export_response
 from django.utils import timezone
+import datetime
+from .rollups import chronic_absentees, classroom_trends, month_start, teacher_summary
 # Create your views here.
 
 class attendance(ListView):
@@ -302,37 +304,61 @@ class TeacherAttendanceDetailView(ListView):
     
     
     
-import pandas as pd
-from django.http import HttpResponse
-from django.utils import timezone
+class AttendanceAnalyticsView(TemplateView):
+    """اتجاهات الغياب لكل شعبة وقائمة الغياب المزمن، من الجداول الشهرية فقط"""
+    template_name = 'attendance/attendance_analytics.html'
+
+    def _month(self, name, default):
+        try:
+            year, month = (int(part) for part in self.request.GET.get(name, '').split('-')[:2])
+            return datetime.date(year, month, 1)
+        except (TypeError, ValueError):
+            return default
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        current = month_start(timezone.now().date())
+        last_month = self._month('to', current)
+        first_month = self._month('from', month_start(last_month - datetime.timedelta(days=90)))
+        if first_month > last_month:
+            first_month, last_month = last_month, first_month
+        try:
+            threshold = float(self.request.GET.get('threshold') or 20)
+        except ValueError:
+            threshold = 20.0
+        classroom_id = self.request.GET.get('classroom')
+        classroom_id = int(classroom_id) if classroom_id and classroom_id.isdigit() else None
+
+        months, trends = classroom_trends(first_month, last_month, classroom_id)
+        context.update({
+            'first_month': first_month,
+            'last_month': last_month,
+            'threshold': threshold,
+            'classroom_id': classroom_id,
+            'classrooms': Classroom.objects.order_by('name').only('id', 'name'),
+            'months': months,
+            'trends': trends,
+            'absentees': chronic_absentees(first_month, last_month, threshold, classroom_id),
+            'teachers': teacher_summary(first_month, last_month),
+        })
+        return context
+
 
 def export_attendance_to_excel(request, classroom_id, date):
+    classroom = get_object_or_404(Classroom, id=classroom_id)
+
     # جلب بيانات الحضور
     attendances = Attendance.objects.filter(
         classroom_id=classroom_id, 
         date=date
-    ).select_related('student')
-    
-    # إنشاء DataFrame من البيانات
-    data = []
-    for attendance in attendances:
-        data.append({
-            'اسم الطالب': attendance.student.full_name,
-            'الحالة': attendance.get_status_display(),
-            'ملاحظات': attendance.notes or ''
-        })
-    
-    df = pd.DataFrame(data)
-    
-    # إنشاء اسم للملف
-    classroom = get_object_or_404(Classroom, id=classroom_id)
-    filename = f"حضور_{classroom.name}_{date}.xlsx"
-    
-    # إنشاء الرد بـ Excel file
-    response = HttpResponse(content_type='application/vnd.ms-excel')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    # تصدير DataFrame إلى Excel
-    df.to_excel(response, index=False, sheet_name='الحضور')
-    
-    return response    
\ No newline at end of file
+    ).select_related('student').order_by('student__full_name')
+
+    columns = [
+        Column('اسم الطالب', 'student.full_name', width=35),
+        Column('الحالة', 'get_status_display', width=12),
+        Column('ملاحظات', lambda a: a.notes or '', width=40),
+    ]
+    return export_response(
+        attendances.iterator(), columns, f"حضور_{classroom.name}_{date}",
+        fmt=export_format(request), sheet_title='الحضور',
+    )
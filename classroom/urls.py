@@ -14,5 +14,6 @@ urlpatterns = [
         path('classroom/<int:classroom_id>/subjects/', views.ClassroomSubjectListView.as_view(), name='classroom_subject_list'),
         path('classroom/<int:classroom_id>/subjects/add/', views.ClassroomSubjectCreateView.as_view(), name='classroom_subject_create'),
         path('classroom/<int:classroom_id>/students/export/', views.export_classroom_students_to_excel, name='export_classroom_students'),
+        path('classroom/<int:classroom_id>/register-course/', views.RegisterClassroomCourseView.as_view(), name='register_classroom_course'),
 
 ]
\ No newline at end of file
@@ -6,13 +6,14 @@ from .models import Classroom ,Classroomenrollment ,ClassroomSubject
 from .form import ClassroomForm ,ClassroomSubjectForm
 from students.models import Student
 from courses.models import Subject
+from accounts.models import Course
+from accounts.services import enroll_students
+from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db import IntegrityError
 from django.core.exceptions import ValidationError
-import pandas as pd
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
-import openpyxl
-from openpyxl.styles import Font, Alignment
+from pages.exports import Column, export_format, export_response
 
 
 
@@ -129,8 +130,36 @@ class ClassroomStudentsView(ListView):
         context = super().get_context_data(**kwargs)
         classroom = get_object_or_404(Classroom, id=self.kwargs['classroom_id'])
         context['classroom'] = classroom
+        context['courses'] = Course.objects.filter(is_active=True).order_by('name')
         return context
 
+
+class RegisterClassroomCourseView(LoginRequiredMixin, View):
+    """تسجيل طلاب الشعبة (كلهم أو المحددين) في دورة مع قيود الاستحقاق دفعة واحدة"""
+
+    def post(self, request, classroom_id):
+        classroom = get_object_or_404(Classroom, id=classroom_id)
+        course_id = request.POST.get('course_id')
+        if not course_id:
+            messages.error(request, 'يجب اختيار دورة')
+            return redirect('classroom:classroom_students', classroom_id=classroom.id)
+        course = get_object_or_404(Course, pk=course_id, is_active=True)
+
+        students = Student.objects.filter(classroom_enrollments__classroom=classroom)
+        student_ids = request.POST.getlist('student_ids')
+        if student_ids:
+            students = students.filter(id__in=student_ids)
+
+        try:
+            enrollments, skipped = enroll_students(course, students, request.user)
+        except Exception as e:
+            messages.error(request, f'خطأ في التسجيل: {str(e)}')
+        else:
+            messages.success(request, f'تم تسجيل {len(enrollments)} طالب في دورة {course.name} وإنشاء القيود المحاسبية بنجاح')
+            if skipped:
+                messages.warning(request, f'{len(skipped)} طالب مسجلون بالفعل في هذه الدورة')
+        return redirect('classroom:classroom_students', classroom_id=classroom.id)
+
 class DeleteClassroomView(DeleteView):
     model = Classroom
     pk_url_kwarg = 'classroom_id'
@@ -261,50 +290,15 @@ def export_classroom_students_to_excel(request, classroom_id):
     # جلب طلاب الشعبة فقط
     students = Student.objects.filter(
         classroom_enrollments__classroom=classroom
-    ).values('full_name')
-    
-    # تحويل البيانات إلى DataFrame
-    df = pd.DataFrame(list(students))
-    
-    # إضافة عمود الأرقام التسلسلية
-    df.insert(0, '#', range(1, len(df) + 1))
-    
-    # إعادة تسمية الأعمدة بالعربية
-    df.rename(columns={'full_name': 'اسم الطالب'}, inplace=True)
-    
-    # إعداد اسم الملف والاستجابة
-    filename = f"طلاب_{classroom.name}.xlsx"
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    # إنشاء Excel باستخدام pandas
-    with pd.ExcelWriter(response, engine='openpyxl') as writer:
-        df.to_excel(
-            writer, 
-            sheet_name='الطلاب', 
-            index=False,
-            startrow=0
-        )
-        
-        # الحصول على ورقة العمل وتنسيقها
-        worksheet = writer.sheets['الطلاب']
-        
-        # تنسيق الأعمدة (ضبط العرض)
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        # تنسيق الرأس (جعل الخط عريض ومركز)
-        for cell in worksheet[1]:
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center', vertical='center')
+    ).order_by('full_name').values_list('full_name', flat=True)
     
-    return response
\ No newline at end of file
+    # عمود الأرقام التسلسلية + اسم الطالب
+    rows = enumerate(students.iterator(), 1)
+    columns = [
+        Column('#', lambda row: row[0], width=6),
+        Column('اسم الطالب', lambda row: row[1], width=40),
+    ]
+    return export_response(
+        rows, columns, f"طلاب_{classroom.name}",
+        fmt=export_format(request), sheet_title='الطلاب',
+    )
\ No newline at end of file
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:56
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employ', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(django.db.models.functions.text.Lower('full_name'), name='teacher_full_name_lower_idx'),
+        ),
+    ]
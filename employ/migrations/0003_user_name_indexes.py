@@ -0,0 +1,34 @@
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+# auth.User belongs to Django, so its indexes for the employee autocomplete
+# (accounts.views.autocomplete_employees) are created here
+USER_NAME_INDEXES = [
+    models.Index(Lower('first_name'), name='auth_user_first_lower_idx'),
+    models.Index(Lower('last_name'), name='auth_user_last_lower_idx'),
+    models.Index(Lower('username'), name='auth_user_username_lower_idx'),
+]
+
+
+def add_indexes(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    for index in USER_NAME_INDEXES:
+        schema_editor.add_index(User, index)
+
+
+def remove_indexes(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    for index in USER_NAME_INDEXES:
+        schema_editor.remove_index(User, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('employ', '0002_teacher_name_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_indexes, remove_indexes),
+    ]
@@ -4,6 +4,7 @@ from datetime import date
 from decimal import Decimal
 from django.contrib.auth.models import User
 from django.db.models import Sum, Count, Q
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -152,6 +153,10 @@ class Teacher(models.Model):
         verbose_name = 'مدرّس'
         verbose_name_plural = 'مدرّسون'
         ordering = ['-created_at']
+        indexes = [
+            # Prefix search in the autocomplete endpoints
+            models.Index(Lower('full_name'), name='teacher_full_name_lower_idx'),
+        ]
 
     def get_daily_sessions(self, date=None):
         if date is None:
@@ -169,30 +174,28 @@ class Teacher(models.Model):
             year = timezone.now().year
         if month is None:
             month = timezone.now().month
-        from attendance.models import TeacherAttendance
-        return TeacherAttendance.objects.filter(
+        # From the monthly rollup maintained by attendance.rollups
+        from attendance.models import TeacherAttendanceMonth
+        return TeacherAttendanceMonth.objects.filter(
             teacher=self,
-            date__year=year,
-            date__month=month,
-            status='present'
-        ).aggregate(total=Sum('session_count'))['total'] or 0
+            month=date(year, month, 1),
+        ).values_list('sessions', flat=True).first() or 0
 
     def get_yearly_sessions(self, year=None):
         if year is None:
             year = timezone.now().year
-        from attendance.models import TeacherAttendance
-        return TeacherAttendance.objects.filter(
+        from attendance.models import TeacherAttendanceMonth
+        return TeacherAttendanceMonth.objects.filter(
             teacher=self,
-            date__year=year,
-            status='present'
-        ).aggregate(total=Sum('session_count'))['total'] or 0
+            month__year=year,
+        ).aggregate(total=Sum('sessions'))['total'] or 0
 
-    def calculate_monthly_salary(self, year=None, month=None):
+    def calculate_monthly_salary(self, year=None, month=None, sessions=None):
         if year is None:
             year = timezone.now().year
         if month is None:
             month = timezone.now().month
-        monthly_sessions = self.get_monthly_sessions(year, month)
+        monthly_sessions = self.get_monthly_sessions(year, month) if sessions is None else sessions
         if self.salary_type == 'hourly':
             return Decimal(monthly_sessions) * (self.hourly_rate or Decimal('0'))
         if self.salary_type == 'monthly':
@@ -280,12 +283,12 @@ class Vacation(models.Model):
 
 @receiver(post_save, sender=Employee)
 def ensure_employee_salary_account(sender, instance, **kwargs):
-    from accounts.models import get_or_create_employee_salary_account
-    get_or_create_employee_salary_account(instance)
+    from accounts.models import get_employee_salary_account_id
+    get_employee_salary_account_id(instance)
 
 
 @receiver(post_save, sender=Teacher)
 def ensure_teacher_salary_account(sender, instance, **kwargs):
-    from accounts.models import get_or_create_teacher_salary_account
-    get_or_create_teacher_salary_account(instance)
+    from accounts.models import get_teacher_salary_account_id
+    get_teacher_salary_account_id(instance)
 
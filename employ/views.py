@@ -11,6 +11,7 @@ from accounts.models import ExpenseEntry, EmployeeAdvance, Account
 from .models import Teacher, Employee, Vacation
 from .forms import TeacherForm, EmployeeRegistrationForm, AdminVacationForm
 from attendance.models import TeacherAttendance
+from attendance.rollups import teacher_sessions
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import SetPasswordForm
 from decimal import Decimal
@@ -114,9 +115,10 @@ class teachers(LoginRequiredMixin, ListView):
         paid_count = 0
         unpaid_count = 0
 
+        sessions = teacher_sessions(date(salary_year, salary_month, 1))
         for teacher in teachers:
-            monthly_sessions = teacher.get_monthly_sessions(salary_year, salary_month)
-            salary_amount = teacher.calculate_monthly_salary(salary_year, salary_month)
+            monthly_sessions = sessions.get(teacher.pk, 0)
+            salary_amount = teacher.calculate_monthly_salary(salary_year, salary_month, sessions=monthly_sessions)
             salary_status = teacher.get_salary_status(salary_year, salary_month)
 
             if salary_status:
@@ -470,9 +472,10 @@ class SalaryManagementView(TemplateView):
         paid_count = 0
         unpaid_count = 0
         
+        sessions = teacher_sessions(date(selected_year, selected_month, 1))
         for teacher in teachers:
-            monthly_sessions = teacher.get_monthly_sessions(selected_year, selected_month)
-            calculated_salary = teacher.calculate_monthly_salary(selected_year, selected_month)
+            monthly_sessions = sessions.get(teacher.pk, 0)
+            calculated_salary = teacher.calculate_monthly_salary(selected_year, selected_month, sessions=monthly_sessions)
             salary_status = teacher.get_salary_status(selected_year, selected_month)
             
             teachers_salary_data.append({
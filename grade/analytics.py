@@ -0,0 +1,134 @@
+"""Grade statistics of a classroom or a whole branch.
+
+All grades of the scope are fetched with one ``values_list`` query into a
+pandas DataFrame.  Each student's score in a subject is the weighted mean
+of their exam-type marks (``weights``; a missing exam does not count).
+From the student × subject score matrix the module computes per-subject
+mean / median / standard deviation / pass rate / histogram and an overall
+rank and percentile per student, all with vectorized pandas/NumPy ops.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .models import Grade
+
+EXAM_TYPES = ('activity', 'monthly', 'midterm', 'final')
+DEFAULT_WEIGHTS = {'activity': 1.0, 'monthly': 1.0, 'midterm': 1.0, 'final': 1.0}
+PASS_MARK = 50.0
+BUCKET_EDGES = np.arange(0, 101, 10)
+
+
+def exam_weights(params=None):
+    """Exam-type weights: ``GRADE_EXAM_WEIGHTS`` setting, overridden by ``w_<type>`` params"""
+    weights = dict(DEFAULT_WEIGHTS, **getattr(settings, 'GRADE_EXAM_WEIGHTS', {}))
+    for exam_type in EXAM_TYPES:
+        value = (params or {}).get(f'w_{exam_type}')
+        if value not in (None, ''):
+            try:
+                value = float(value)
+            except ValueError:
+                continue
+            if math.isfinite(value):
+                weights[exam_type] = max(0.0, value)
+    return weights
+
+
+def scope_grades(classroom_id=None, branch=None):
+    grades = Grade.objects.filter(grade__isnull=False)
+    if classroom_id:
+        grades = grades.filter(classroom_id=classroom_id)
+    if branch:
+        grades = grades.filter(classroom__branches=branch)
+    return grades
+
+
+def grade_frame(grades):
+    """One row per grade: student, subject, exam type and mark (float)"""
+    columns = ['student_id', 'student_name', 'subject_id', 'subject_name', 'exam_type', 'grade']
+    rows = grades.order_by().values_list(
+        'student_id', 'student__full_name', 'subject_id', 'subject__name', 'exam_type', 'grade',
+    )
+    frame = pd.DataFrame.from_records(list(rows), columns=columns)
+    frame['grade'] = frame['grade'].astype(float)
+    return frame
+
+
+def score_matrix(frame, weights):
+    """Student × subject DataFrame of weighted scores (NaN when no mark)"""
+    weight = frame['exam_type'].map(weights).fillna(0.0)
+    frame = frame.assign(weight=weight, weighted=frame['grade'] * weight)[weight > 0]
+    sums = frame.groupby(['student_id', 'subject_id'])[['weighted', 'weight']].sum()
+    return (sums['weighted'] / sums['weight']).unstack('subject_id')
+
+
+def _number(value, digits=2):
+    return None if pd.isna(value) else round(float(value), digits)
+
+
+def analyze(grades, weights=None, pass_mark=PASS_MARK):
+    """Statistics of ``grades`` (a Grade queryset), see module docstring.
+
+    Returns ``{'subjects': [...], 'students': [...], 'buckets': [...]}``;
+    students are sorted by rank and carry one score per subject, in the
+    order of ``subjects``.
+    """
+    weights = weights or exam_weights()
+    buckets = [f"{low}-{high}" for low, high in zip(BUCKET_EDGES[:-1], BUCKET_EDGES[1:])]
+    frame = grade_frame(grades)
+    if frame.empty:
+        return {'subjects': [], 'students': [], 'buckets': buckets}
+
+    scores = score_matrix(frame, weights)
+    if scores.empty:
+        return {'subjects': [], 'students': [], 'buckets': buckets}
+    subject_names = frame.drop_duplicates('subject_id').set_index('subject_id')['subject_name']
+    student_names = frame.drop_duplicates('student_id').set_index('student_id')['student_name']
+    scores = scores[sorted(scores.columns, key=lambda pk: (subject_names[pk], pk))]
+
+    counts = scores.count()
+    means = scores.mean()
+    medians = scores.median()
+    stds = scores.std(ddof=0)
+    pass_rates = (scores >= pass_mark).sum() / counts.where(counts > 0) * 100
+    # Marks are clipped so 100 falls into the last bucket
+    clipped = scores.clip(lower=0, upper=BUCKET_EDGES[-1] - 1e-9).to_numpy()
+    bucket_index = np.floor(clipped / 10)
+
+    subjects = []
+    for position, subject_id in enumerate(scores.columns):
+        column = bucket_index[:, position]
+        histogram = np.bincount(column[~np.isnan(column)].astype(int), minlength=len(buckets))
+        subjects.append({
+            'id': int(subject_id),
+            'name': subject_names[subject_id],
+            'count': int(counts[subject_id]),
+            'mean': _number(means[subject_id]),
+            'median': _number(medians[subject_id]),
+            'std': _number(stds[subject_id]),
+            'pass_rate': _number(pass_rates[subject_id], 1),
+            'histogram': [
+                {'label': label, 'count': int(count), 'percent': round(100.0 * count / max(1, counts[subject_id]), 1)}
+                for label, count in zip(buckets, histogram)
+            ],
+        })
+
+    overall = scores.mean(axis=1)
+    ranks = overall.rank(ascending=False, method='min')
+    # Share of students scoring at or below the student
+    percentiles = overall.rank(method='max', pct=True) * 100
+    order = ranks.sort_values(kind='stable').index
+    score_values = scores.loc[order].to_numpy()
+
+    students = [{
+        'id': int(student_id),
+        'name': student_names[student_id],
+        'rank': int(ranks[student_id]),
+        'percentile': _number(percentiles[student_id], 1),
+        'overall': _number(overall[student_id]),
+        'scores': [_number(value) for value in row],
+    } for student_id, row in zip(order, score_values)]
+
+    return {'subjects': subjects, 'students': students, 'buckets': buckets}
@@ -0,0 +1,25 @@
+"""Background job handlers of the grade app (see pages/jobs.py)."""
+from classroom.models import Classroom
+from courses.models import Subject
+from pages.jobs import register, save_result_file
+from .printing import custom_grades_pdf
+from .report_cards import report_cards_pdf
+
+
+@register('grade.custom_print_pdf')
+def custom_print_pdf(job, classroom_id, subject_id, tables, include_notes=True, include_signature=True):
+    classroom = Classroom.objects.get(pk=classroom_id)
+    subject = Subject.objects.get(pk=subject_id)
+    job.set_progress(10, message='إنشاء ملف PDF / Rendering PDF')
+    pdf = custom_grades_pdf(classroom, subject, tables, include_notes, include_signature)
+    save_result_file(job, f'grades_{classroom.name}_{subject.name}.pdf', [pdf])
+    return {'size': len(pdf)}
+
+
+@register('grade.report_cards_pdf')
+def classroom_report_cards(job, classroom_id):
+    classroom = Classroom.objects.get(pk=classroom_id)
+    job.set_progress(10, message='إنشاء الجلاءات / Rendering report cards')
+    pdf = report_cards_pdf(classroom)
+    save_result_file(job, f'report_cards_{classroom.name}.pdf', [pdf])
+    return {'size': len(pdf)}
@@ -0,0 +1,41 @@
+from pages.pdf import render_pdf
+from .models import Grade
+
+EXAM_TYPES = ('activity', 'monthly', 'midterm', 'final')
+
+
+def subject_display_name(subject):
+    """اسم المادة مع أسماء المدرسين"""
+    teacher_names = ", ".join([teacher.full_name for teacher in subject.teachers.all()])
+    return f"{subject.name} ({teacher_names})" if teacher_names else subject.name
+
+
+def students_grade_rows(classroom, subject):
+    """علامات طلاب الشعبة في المادة مع المجموع، باستعلام واحد للعلامات"""
+    grades_by_student = {}
+    for grade in Grade.objects.filter(classroom=classroom, subject=subject).order_by('id'):
+        grades_by_student.setdefault(grade.student_id, {}).setdefault(grade.exam_type, grade)
+
+    for student in classroom.students.all().order_by('full_name').iterator():
+        student_grades = grades_by_student.get(student.id, {})
+        row = {'student': student, 'total': 0}
+        for exam_type in EXAM_TYPES:
+            grade = student_grades.get(exam_type)
+            row[exam_type] = grade.grade if grade and grade.grade else ''
+            if grade and grade.grade:
+                row['total'] += float(grade.grade)
+        activity = student_grades.get('activity')
+        row['activity_notes'] = activity.notes if activity else ''
+        yield row
+
+
+def custom_grades_pdf(classroom, subject, tables, include_notes=True, include_signature=True):
+    return render_pdf('grade/custom_print.html', {
+        'classroom': classroom,
+        'subject': subject,
+        'subject_display_name': subject_display_name(subject),
+        'students_data': list(students_grade_rows(classroom, subject)),
+        'selected_tables': tables,
+        'include_notes': include_notes,
+        'include_signature': include_signature,
+    })
@@ -0,0 +1,101 @@
+"""Report cards of a whole classroom.
+
+Three queries build every card: the classroom's subjects, all of its
+grades, and its students.  A fourth one reads the attendance counts from
+the monthly rollups (``attendance.rollups``).  Grades are pivoted into
+``student → subject → exam type`` with totals per subject and per student.
+"""
+from django.db.models import Sum
+
+from attendance.models import StudentAttendanceMonth
+from classroom.models import ClassroomSubject
+from pages.exports import Column
+from pages.pdf import render_pdf
+from .models import Grade
+from .printing import EXAM_TYPES
+
+
+def exam_type_labels():
+    return [(exam_type, Grade.ExamType(exam_type).label) for exam_type in EXAM_TYPES]
+
+
+def classroom_subjects(classroom):
+    return [cs.subject for cs in ClassroomSubject.objects.filter(
+        classroom=classroom,
+    ).select_related('subject').order_by('subject__name', 'subject_id')]
+
+
+def report_cards(classroom):
+    """``(subjects, cards)``; one card per student of the classroom, by name.
+
+    A card is ``{'student', 'subjects': [{'subject', 'marks': [...],
+    'total'}], 'total', 'attendance': {'present', 'absent', 'late'}}`` with
+    marks in ``EXAM_TYPES`` order (None when missing).
+    """
+    subjects = classroom_subjects(classroom)
+    marks = {}
+    for student_id, subject_id, exam_type, grade in Grade.objects.filter(
+        classroom=classroom, subject__in=subjects, grade__isnull=False,
+    ).order_by('id').values_list('student_id', 'subject_id', 'exam_type', 'grade'):
+        marks.setdefault(student_id, {}).setdefault(subject_id, {}).setdefault(exam_type, grade)
+
+    attendance = {
+        row['student_id']: row
+        for row in StudentAttendanceMonth.objects.filter(classroom=classroom).values('student_id').annotate(
+            present=Sum('present'), absent=Sum('absent'), late=Sum('late'),
+        ).order_by()
+    }
+
+    cards = []
+    for student in classroom.students.order_by('full_name', 'id'):
+        student_marks = marks.get(student.pk, {})
+        rows = []
+        for subject in subjects:
+            subject_marks = student_marks.get(subject.pk, {})
+            values = [subject_marks.get(exam_type) for exam_type in EXAM_TYPES]
+            rows.append({
+                'subject': subject,
+                'marks': values,
+                'total': sum(value for value in values if value is not None),
+            })
+        counts = attendance.get(student.pk, {})
+        cards.append({
+            'student': student,
+            'subjects': rows,
+            'total': sum(row['total'] for row in rows),
+            'attendance': {status: counts.get(status) or 0 for status in ('present', 'absent', 'late')},
+        })
+    return subjects, cards
+
+
+def report_cards_pdf(classroom):
+    """All report cards of the classroom, one page per student"""
+    subjects, cards = report_cards(classroom)
+    return render_pdf('grade/report_cards.html', {
+        'classroom': classroom,
+        'subjects': subjects,
+        'cards': cards,
+        'exam_types': exam_type_labels(),
+    })
+
+
+def report_card_columns(subjects):
+    """Workbook columns: one per subject and exam type, then totals and attendance"""
+    columns = [Column('اسم الطالب', 'student.full_name', width=30)]
+    for position, subject in enumerate(subjects):
+        for index, (exam_type, label) in enumerate(exam_type_labels()):
+            columns.append(Column(
+                f"{subject.name} - {label}",
+                lambda card, p=position, i=index: card['subjects'][p]['marks'][i],
+                width=12,
+            ))
+        columns.append(Column(
+            f"{subject.name} - المجموع", lambda card, p=position: card['subjects'][p]['total'], width=12,
+        ))
+    columns += [
+        Column('المجموع العام', 'total', width=12),
+        Column('حضور', 'attendance.present', width=8),
+        Column('غياب', 'attendance.absent', width=8),
+        Column('تأخر', 'attendance.late', width=8),
+    ]
+    return columns
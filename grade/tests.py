@@ -1,3 +1,10 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from grade.analytics import DEFAULT_WEIGHTS, exam_weights
+
+
+class ExamWeightTests(SimpleTestCase):
+    def test_unusable_weights_keep_the_default(self):
+        params = {'w_activity': 'inf', 'w_monthly': 'nan', 'w_midterm': 'x', 'w_final': '2'}
+
+        self.assertEqual(exam_weights(params), dict(DEFAULT_WEIGHTS, final=2.0))
@@ -5,7 +5,10 @@ app_name = 'grade'
 
 urlpatterns = [
     path('', views.grades_dashboard, name='dashboard'),
+    path('analytics/', views.grade_analytics, name='analytics'),
+    path('analytics/export/', views.export_grade_analytics, name='export_analytics'),
     path('<int:classroom_id>/subjects/', views.select_subject, name='select_subject'),  
+    path('<int:classroom_id>/report-cards/', views.classroom_report_cards, name='report_cards'),
     path('<int:classroom_id>/subjects/<int:subject_id>/', views.view_grades, name='view_grades'),
     path('<int:classroom_id>/subjects/<int:subject_id>/edit/', views.edit_grades, name='edit_grades'),
     path('<int:classroom_id>/subjects/<int:subject_id>/export-excel/', views.export_grades_excel, name='export_grades_excel'),
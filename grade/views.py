@@ -1,16 +1,18 @@
+import math
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.forms import modelformset_factory
 from django.http import HttpResponse
-from django.template.loader import render_to_string
-from xhtml2pdf import pisa
-import io
 from .models import Grade
 from classroom.models import Classroom
 from courses.models import Subject
 from students.models import Student
 from .form import GradeForm , CustomPrintForm
-import openpyxl
-from openpyxl.styles import Font, Alignment 
+from .printing import custom_grades_pdf, students_grade_rows, subject_display_name
+from pages.db import reports_db
+from pages.exports import Column, export_format, export_response
+from pages.jobs import enqueue, job_response
+from pages.pdf import render_pdf
 
 def grades_dashboard(request):
     classrooms = Classroom.objects.all()
@@ -129,66 +131,21 @@ def print_grades(request, classroom_id, subject_id):
     classroom = get_object_or_404(Classroom, pk=classroom_id)
     subject = get_object_or_404(Subject, pk=subject_id)
     
-    # الحصول على أسماء المعلمين للمادة
-    teacher_names = ", ".join([teacher.full_name for teacher in subject.teachers.all()])
-    subject_display_name = f"{subject.name} ({teacher_names})" if teacher_names else subject.name
-    
-    grades = Grade.objects.filter(
-        classroom=classroom,
-        subject=subject
-    ).select_related('student')
-    
-    # أنواع الامتحانات
-    exam_types = Grade.ExamType.choices
-    
-    # حساب المجموع لكل طالب
-    students_data = []
-    for student in classroom.students.all().order_by('full_name'):
-        student_grades = grades.filter(student=student)
-        activity_grade = student_grades.filter(exam_type='activity').first()
-        monthly_grade = student_grades.filter(exam_type='monthly').first()
-        midterm_grade = student_grades.filter(exam_type='midterm').first()
-        final_grade = student_grades.filter(exam_type='final').first()
-        
-        # حساب المجموع
-        total = 0
-        if activity_grade and activity_grade.grade: 
-            total += float(activity_grade.grade)
-        if monthly_grade and monthly_grade.grade: 
-            total += float(monthly_grade.grade)
-        if midterm_grade and midterm_grade.grade: 
-            total += float(midterm_grade.grade)
-        if final_grade and final_grade.grade: 
-            total += float(final_grade.grade)
-            
-        students_data.append({
-            'student': student,
-            'activity': activity_grade.grade if activity_grade and activity_grade.grade else '',
-            'monthly': monthly_grade.grade if monthly_grade and monthly_grade.grade else '',
-            'midterm': midterm_grade.grade if midterm_grade and midterm_grade.grade else '',
-            'final': final_grade.grade if final_grade and final_grade.grade else '',
-            'activity_notes': activity_grade.notes if activity_grade else '',
-            'total': total
-        })
-    
     # إنشاء PDF باستخدام xhtml2pdf
-    html_string = render_to_string('grade/print_grades.html', {
-        'classroom': classroom,
-        'subject': subject,
-        'subject_display_name': subject_display_name,
-        'students_data': students_data,
-        'exam_types': exam_types
-    })
-    
-    result = io.BytesIO()
-    pdf = pisa.pisaDocument(io.BytesIO(html_string.encode("UTF-8")), result)
-    
-    if not pdf.err:
-        response = HttpResponse(result.getvalue(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename=grades_{classroom.name}_{subject.name}.pdf'
-        return response
+    try:
+        pdf = render_pdf('grade/print_grades.html', {
+            'classroom': classroom,
+            'subject': subject,
+            'subject_display_name': subject_display_name(subject),
+            'students_data': list(students_grade_rows(classroom, subject)),
+            'exam_types': Grade.ExamType.choices,
+        })
+    except ValueError as e:
+        return HttpResponse(str(e))
     
-    return HttpResponse('Error generating PDF: %s' % pdf.err)
+    response = HttpResponse(pdf, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename=grades_{classroom.name}_{subject.name}.pdf'
+    return response
     
 def select_subject(request, classroom_id):
     classroom = get_object_or_404(Classroom, pk=classroom_id)
@@ -219,80 +176,38 @@ def custom_print_grades(request, classroom_id, subject_id):
     classroom = get_object_or_404(Classroom, pk=classroom_id)
     subject = get_object_or_404(Subject, pk=subject_id)
     
-    # الحصول على أسماء المعلمين للمادة
-    teacher_names = ", ".join([teacher.full_name for teacher in subject.teachers.all()])
-    subject_display_name = f"{subject.name} ({teacher_names})" if teacher_names else subject.name
-    
-    grades = Grade.objects.filter(
-        classroom=classroom,
-        subject=subject
-    ).select_related('student')
-    
-    # حساب المجموع لكل طالب
-    students_data = []
-    for student in classroom.students.all().order_by('full_name'):
-        student_grades = grades.filter(student=student)
-        activity_grade = student_grades.filter(exam_type='activity').first()
-        monthly_grade = student_grades.filter(exam_type='monthly').first()
-        midterm_grade = student_grades.filter(exam_type='midterm').first()
-        final_grade = student_grades.filter(exam_type='final').first()
-        
-        # حساب المجموع
-        total = 0
-        if activity_grade and activity_grade.grade: 
-            total += float(activity_grade.grade)
-        if monthly_grade and monthly_grade.grade: 
-            total += float(monthly_grade.grade)
-        if midterm_grade and midterm_grade.grade: 
-            total += float(midterm_grade.grade)
-        if final_grade and final_grade.grade: 
-            total += float(final_grade.grade)
-            
-        students_data.append({
-            'student': student,
-            'activity': activity_grade.grade if activity_grade and activity_grade.grade else '',
-            'monthly': monthly_grade.grade if monthly_grade and monthly_grade.grade else '',
-            'midterm': midterm_grade.grade if midterm_grade and midterm_grade.grade else '',
-            'final': final_grade.grade if final_grade and final_grade.grade else '',
-            'activity_notes': activity_grade.notes if activity_grade else '',
-            'total': total
-        })
-    
     if request.method == 'POST':
         form = CustomPrintForm(request.POST)
         if form.is_valid():
             # إعداد البيانات للطباعة
-            selected_tables = form.cleaned_data['tables']
-            include_notes = form.cleaned_data['include_notes']
-            include_signature = form.cleaned_data['include_signature']
-            
-            # إنشاء PDF
-            html_string = render_to_string('grade/custom_print.html', {
-                'classroom': classroom,
-                'subject': subject,
-                'subject_display_name': subject_display_name,
-                'students_data': students_data,
-                'selected_tables': selected_tables,
-                'include_notes': include_notes,
-                'include_signature': include_signature
-            })
+            options = {
+                'tables': form.cleaned_data['tables'],
+                'include_notes': form.cleaned_data['include_notes'],
+                'include_signature': form.cleaned_data['include_signature'],
+            }
             
-            result = io.BytesIO()
-            pdf = pisa.pisaDocument(io.BytesIO(html_string.encode("UTF-8")), result)
+            # إنشاء الملف في الخلفية بدل تعطيل الصفحة
+            if request.POST.get('background'):
+                job = enqueue('grade.custom_print_pdf', user=request.user,
+                              classroom_id=classroom.pk, subject_id=subject.pk, **options)
+                return job_response(request, job)
             
-            if not pdf.err:
-                response = HttpResponse(result.getvalue(), content_type='application/pdf')
-                response['Content-Disposition'] = f'attachment; filename=grades_{classroom.name}_{subject.name}.pdf'
-                return response
+            # إنشاء PDF
+            try:
+                pdf = custom_grades_pdf(classroom, subject, **options)
+            except ValueError as e:
+                return HttpResponse(str(e))
             
-            return HttpResponse('Error generating PDF: %s' % pdf.err)
+            response = HttpResponse(pdf, content_type='application/pdf')
+            response['Content-Disposition'] = f'attachment; filename=grades_{classroom.name}_{subject.name}.pdf'
+            return response
     else:
         form = CustomPrintForm()
     
     return render(request, 'grade/custom_print_options.html', {
         'classroom': classroom,
         'subject': subject,
-        'subject_display_name': subject_display_name,
+        'subject_display_name': subject_display_name(subject),
         'form': form
     }) 
     
@@ -301,81 +216,127 @@ def export_grades_excel(request, classroom_id, subject_id):
     classroom = get_object_or_404(Classroom, pk=classroom_id)
     subject = get_object_or_404(Subject, pk=subject_id)
     
-    # الحصول على أسماء المعلمين للمادة
-    teacher_names = ", ".join([teacher.full_name for teacher in subject.teachers.all()])
-    subject_display_name = f"{subject.name} ({teacher_names})" if teacher_names else subject.name
-    
-    grades = Grade.objects.filter(
-        classroom=classroom,
-        subject=subject
-    ).select_related('student')
-    
-    # حساب المجموع لكل طالب
-    students_data = []
-    for student in classroom.students.all().order_by('full_name'):
-        student_grades = grades.filter(student=student)
-        activity_grade = student_grades.filter(exam_type='activity').first()
-        monthly_grade = student_grades.filter(exam_type='monthly').first()
-        midterm_grade = student_grades.filter(exam_type='midterm').first()
-        final_grade = student_grades.filter(exam_type='final').first()
-        
-        # حساب المجموع
-        total = 0
-        if activity_grade and activity_grade.grade: 
-            total += float(activity_grade.grade)
-        if monthly_grade and monthly_grade.grade: 
-            total += float(monthly_grade.grade)
-        if midterm_grade and midterm_grade.grade: 
-            total += float(midterm_grade.grade)
-        if final_grade and final_grade.grade: 
-            total += float(final_grade.grade)
-            
-        students_data.append({
-            'student': student,
-            'activity': activity_grade.grade if activity_grade and activity_grade.grade else '',
-            'monthly': monthly_grade.grade if monthly_grade and monthly_grade.grade else '',
-            'midterm': midterm_grade.grade if midterm_grade and midterm_grade.grade else '',
-            'final': final_grade.grade if final_grade and final_grade.grade else '',
-            'activity_notes': activity_grade.notes if activity_grade else '',
-            'total': total
-        })
-    
-    # إنشاء ملف إكسل
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "العلامات"
-    
-    # كتابة العنوان
-    ws['A1'] = f"علامات مادة {subject_display_name} - صف {classroom.name}"
-    ws.merge_cells('A1:G1')
-    ws['A1'].font = Font(size=14, bold=True)
-    ws['A1'].alignment = Alignment(horizontal='center')
-    
-    # كتابة العناوين
-    headers = ['اسم الطالب', '1', '2', '3', 'نصفي', 'المجموع', 'ملاحظات']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col, value=header)
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
-    
-    # كتابة البيانات
-    for row, data in enumerate(students_data, 4):
-        ws.cell(row=row, column=1, value=data['student'].full_name)
-        ws.cell(row=row, column=2, value=data['activity'])
-        ws.cell(row=row, column=3, value=data['monthly'])
-        ws.cell(row=row, column=4, value=data['midterm'])
-        ws.cell(row=row, column=5, value=data['final'])
-        ws.cell(row=row, column=6, value=data['total'])
-        ws.cell(row=row, column=7, value=data['activity_notes'])
-    
-    # ضبط عرض الأعمدة
-    column_widths = [30, 10, 10, 10, 10, 10, 30]
-    for i, width in enumerate(column_widths, 1):
-        ws.column_dimensions[openpyxl.utils.get_column_letter(i)].width = width
-    
-    # إعداد الاستجابة
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename=grades_{classroom.name}_{subject.name}.xlsx'
-    
-    wb.save(response)
-    return response    
\ No newline at end of file
+    columns = [
+        Column('اسم الطالب', 'student.full_name', width=30),
+        Column('1', 'activity', width=10),
+        Column('2', 'monthly', width=10),
+        Column('3', 'midterm', width=10),
+        Column('نصفي', 'final', width=10),
+        Column('المجموع', 'total', width=10),
+        Column('ملاحظات', 'activity_notes', width=30),
+    ]
+    return export_response(
+        students_grade_rows(classroom, subject), columns, f"grades_{classroom.name}_{subject.name}",
+        fmt=export_format(request), sheet_title='العلامات',
+        title=f"علامات مادة {subject_display_name(subject)} - صف {classroom.name}",
+    )
+
+
+def _analytics_request(request):
+    """Scope, weights and pass mark of the grade analytics from the query string"""
+    from . import analytics
+
+    classroom = None
+    classroom_id = request.GET.get('classroom')
+    if classroom_id and classroom_id.isdigit():
+        classroom = get_object_or_404(Classroom, pk=classroom_id)
+    branch = request.GET.get('branch') or ''
+    if branch not in Classroom.BranchChoices.values:
+        branch = ''
+    try:
+        pass_mark = float(request.GET.get('pass_mark') or analytics.PASS_MARK)
+    except ValueError:
+        pass_mark = analytics.PASS_MARK
+    if not math.isfinite(pass_mark):
+        pass_mark = analytics.PASS_MARK
+
+    if classroom:
+        title = f"تحليل علامات صف {classroom.name}"
+    elif branch:
+        title = f"تحليل علامات الفرع {Classroom.BranchChoices(branch).label}"
+    else:
+        title = None
+    grades = analytics.scope_grades(classroom.pk if classroom else None, branch)
+    return {
+        'classroom': classroom,
+        'branch': branch,
+        'title': title,
+        'weights': analytics.exam_weights(request.GET),
+        'pass_mark': pass_mark,
+        'grades': grades,
+    }
+
+
+@reports_db
+def grade_analytics(request):
+    from . import analytics
+
+    scope = _analytics_request(request)
+    results = None
+    if scope['title']:
+        results = analytics.analyze(scope['grades'], scope['weights'], scope['pass_mark'])
+    return render(request, 'grade/analytics.html', {
+        **scope,
+        'results': results,
+        'classrooms': Classroom.objects.order_by('name'),
+        'branch_choices': Classroom.BranchChoices.choices,
+        'exam_types': [(exam_type, Grade.ExamType(exam_type).label, scope['weights'][exam_type])
+                       for exam_type in analytics.EXAM_TYPES],
+        'query': request.GET.urlencode(),
+    })
+
+
+@reports_db
+def export_grade_analytics(request):
+    from . import analytics
+
+    scope = _analytics_request(request)
+    if not scope['title']:
+        return redirect('grade:analytics')
+    results = analytics.analyze(scope['grades'], scope['weights'], scope['pass_mark'])
+
+    columns = [
+        Column('الترتيب', 'rank', width=8),
+        Column('اسم الطالب', 'name', width=30),
+    ]
+    columns += [
+        Column(subject['name'], lambda row, position=position: row['scores'][position], width=12)
+        for position, subject in enumerate(results['subjects'])
+    ]
+    columns += [
+        Column('المعدل', 'overall', width=10),
+        Column('المئين', 'percentile', width=10),
+    ]
+    name = scope['classroom'].name if scope['classroom'] else scope['branch']
+    return export_response(
+        results['students'], columns, f"grade_analytics_{name}",
+        fmt=export_format(request), sheet_title='التحليل', title=scope['title'],
+    )
+
+
+@reports_db
+def classroom_report_cards(request, classroom_id):
+    """جلاءات كل طلاب الشعبة: PDF بصفحة لكل طالب أو ملف إكسل/CSV واحد"""
+    from .report_cards import report_card_columns, report_cards, report_cards_pdf
+
+    classroom = get_object_or_404(Classroom, pk=classroom_id)
+    fmt = request.GET.get('format', 'pdf')
+
+    if fmt == 'pdf':
+        # إنشاء الملف في الخلفية بدل تعطيل الصفحة
+        if request.GET.get('background'):
+            job = enqueue('grade.report_cards_pdf', user=request.user, classroom_id=classroom.pk)
+            return job_response(request, job)
+        try:
+            pdf = report_cards_pdf(classroom)
+        except ValueError as e:
+            return HttpResponse(str(e))
+        response = HttpResponse(pdf, content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename=report_cards_{classroom.name}.pdf'
+        return response
+
+    subjects, cards = report_cards(classroom)
+    return export_response(
+        cards, report_card_columns(subjects), f"report_cards_{classroom.name}",
+        fmt=export_format(request), sheet_title='الجلاءات', title=f"جلاءات صف {classroom.name}",
+    )
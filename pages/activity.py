@@ -0,0 +1,104 @@
+"""Writing and compacting the activity log.
+
+The log lives in its own database (``ActivityLogRouter`` in
+``pages.db``).  ``record`` queues a row; inside a transaction of the
+``default`` database the rows are written in one batch after it commits
+(nothing is logged for work that rolls back, and the log file is never
+written while the ledger holds its lock), otherwise at once.
+
+``compact`` rolls rows older than the retention period into
+``ActivitySummary`` (one row per day, user, action and model type) and
+deletes them::
+
+    manage.py compact_activity_log --keep-days 180 --vacuum
+"""
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .archive import CHUNK_SIZE, purge
+from .models import ActivityLog, ActivitySummary
+
+KEEP_DAYS = 180
+
+
+def log_alias():
+    return router.db_for_write(ActivityLog)
+
+
+def record(**fields):
+    """Log one ``ActivityLog`` row once the current transaction commits"""
+    entry = ActivityLog(**fields)
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block or connection.alias == log_alias():
+        entry.save()
+        return
+    # One batch per outermost transaction: reuse it while its callback is pending
+    for _, callback, _ in connection.run_on_commit:
+        batch = getattr(callback, 'activity_batch', None)
+        if batch is not None:
+            batch.append(entry)
+            return
+    batch = [entry]
+
+    def flush():
+        ActivityLog.objects.bulk_create(batch)
+    flush.activity_batch = batch
+    # robust: a failing log write must not break the request after its commit
+    transaction.on_commit(flush, robust=True)
+
+
+@receiver(post_delete, sender=User, dispatch_uid='pages_activity_user_deleted')
+def forget_user(sender, instance, **kwargs):
+    from .signals import table_exists
+
+    if not table_exists('pages_activitylog'):
+        return
+    # No cascade across databases: keep the rows, without the user
+    for model in (ActivityLog, ActivitySummary):
+        model.objects.filter(user_id=instance.pk).update(user=None)
+
+
+def _summarize(rows):
+    """Add the rows of ``rows`` to the daily summaries"""
+    totals = rows.annotate(day=TruncDate('timestamp')).values(
+        'day', 'user_id', 'action', 'content_type',
+    ).annotate(n=Count('pk')).order_by()
+    for total in totals:
+        summary, _ = ActivitySummary.objects.get_or_create(
+            day=total['day'], user_id=total['user_id'],
+            action=total['action'], content_type=total['content_type'],
+        )
+        summary.count += total['n']
+        summary.save(update_fields=['count'])
+
+
+def compact(keep_days=KEEP_DAYS, chunk_size=CHUNK_SIZE):
+    """Roll log rows older than ``keep_days`` into daily summaries; returns how many"""
+    cutoff = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=keep_days)
+    old = ActivityLog.objects.filter(timestamp__lt=cutoff)
+    alias = log_alias()
+    compacted = 0
+    while True:
+        with transaction.atomic(using=alias):
+            ids = list(old.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                return compacted
+            rows = ActivityLog.objects.filter(pk__in=ids)
+            _summarize(rows)
+            purge(rows)
+        compacted += len(ids)
+
+
+def vacuum():
+    """Give the space of deleted log rows back to the file system"""
+    connection = connections[log_alias()]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM')
@@ -0,0 +1,78 @@
+"""Admin changelists for ledger-scale tables.
+
+``BigTableAdmin`` never runs an exact ``COUNT(*)`` over a whole big table:
+
+* the unfiltered changelist uses ``estimated_count`` (the planner
+  statistics of the database, else an exact count cached for
+  ``COUNT_CACHE_TTL`` seconds);
+* a filtered or searched changelist counts at most ``COUNT_LIMIT`` rows,
+  so narrowing with the date hierarchy or a filter stays exact while a
+  broad search is still bounded;
+* the "N total" link (``show_full_result_count``) is switched off.
+
+Estimates only shift the last page numbers; rows themselves are always
+read from the table.  Run ``ANALYZE`` (``manage.py dbshell``) from time to
+time on SQLite so the statistics exist.
+"""
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+COUNT_LIMIT = 10000
+COUNT_CACHE_TTL = 10 * 60
+
+
+def _statistics_count(model, using):
+    """Row count of ``model``'s table from the planner statistics, or None"""
+    connection = connections[using]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+                row = cursor.fetchone()
+                return row[0] if row and row[0] >= 0 else None
+            if connection.vendor == 'sqlite':
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+                if cursor.fetchone() is None:
+                    return None
+                # The first number of every row is the table's row count
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+                row = cursor.fetchone()
+                return int(row[0].split()[0]) if row else None
+    except (DatabaseError, ValueError):
+        return None
+    return None
+
+
+def estimated_count(queryset):
+    """Approximate row count of ``queryset``'s whole table"""
+    model, using = queryset.model, queryset.db
+    count = _statistics_count(model, using)
+    if count is not None and count >= COUNT_LIMIT:
+        return count
+    key = f'admin:count:{using}:{model._meta.label_lower}'
+    count = cache.get(key)
+    if count is None:
+        count = queryset.order_by().count()
+        cache.set(key, count, COUNT_CACHE_TTL)
+    return count
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that estimates the size of unfiltered big tables and caps other counts"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            return estimated_count(queryset)
+        return queryset.order_by()[:COUNT_LIMIT].count()
+
+
+class BigTableAdmin(admin.ModelAdmin):
+    """ModelAdmin defaults for tables with millions of rows"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
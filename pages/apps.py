@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class PagesConfig(AppConfig):
@@ -6,4 +7,10 @@ class PagesConfig(AppConfig):
     name = 'pages'
     
     def ready(self):
-        import pages.signals
\ No newline at end of file
+        import pages.signals
+        from django.db.backends.signals import connection_created
+        from pages.db import enable_sqlite_wal
+        connection_created.connect(enable_sqlite_wal, dispatch_uid='pages_sqlite_wal')
+        # Background job handlers (see pages/jobs.py)
+        autodiscover_modules('jobs')
+        import pages.backup
@@ -0,0 +1,44 @@
+"""Moving old rows of ever-growing tables into their archive tables.
+
+``move_rows`` copies rows into an archive model with the same column names
+(and primary keys) and deletes them from the hot table, ``chunk_size`` rows
+per transaction so cashiers are held up only briefly.  The delete is a raw
+``DELETE``: no signals fire, so the activity log does not record the move
+and the attendance rollups keep counting archived days.
+
+Run from ``manage.py archive_history``.
+"""
+from datetime import timedelta
+
+from django.db import router, transaction
+from django.utils import timezone
+
+CHUNK_SIZE = 1000
+
+
+def years_ago(years):
+    return timezone.now() - timedelta(days=round(365.25 * years))
+
+
+def purge(queryset):
+    """DELETE the rows of ``queryset`` without collecting them or sending signals"""
+    return queryset._raw_delete(queryset.db)
+
+
+def move_rows(queryset, archive_model, chunk_size=CHUNK_SIZE):
+    """Move the rows of ``queryset`` into ``archive_model``; returns how many moved"""
+    model = queryset.model
+    fields = [field.attname for field in model._meta.concrete_fields]
+    # The activity log has a database of its own (pages/db.py)
+    using = router.db_for_write(model)
+    moved = 0
+    while True:
+        with transaction.atomic(using=using):
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                return moved
+            archive_model.objects.bulk_create([
+                archive_model(**row) for row in model.objects.filter(pk__in=ids).values(*fields)
+            ])
+            purge(model.objects.filter(pk__in=ids))
+        moved += len(ids)
@@ -0,0 +1,185 @@
+"""Online backup and restore of the SQLite database.
+
+``backup_database`` copies the live database with SQLite's backup API in
+steps of ``pages`` pages and pauses between steps, so cashiers keep
+writing while a backup runs.  In WAL mode (see ``pages.db``) the copy
+holds one read snapshot for all steps: writers are never blocked and their
+commits do not restart it.  Otherwise SQLite restarts the copy whenever a
+step is overtaken by a write, never producing a torn file.
+The copy is checked with ``PRAGMA integrity_check``, optionally gzipped,
+and only the newest ``keep`` generations are kept in ``BACKUP_DIR``::
+
+    manage.py backupdb --compress --keep 14
+    manage.py restoredb --latest
+
+It also runs as the ``pages.backup_database`` background job.
+"""
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+from .jobs import register
+
+PREFIX = 'db_backup_'
+STEP_PAGES = 256          # pages copied per step (1 MB with 4 KB pages)
+STEP_PAUSE = 0.05         # seconds writers get between two steps
+
+
+class BackupError(Exception):
+    pass
+
+
+def backup_dir():
+    return Path(getattr(settings, 'BACKUP_DIR', Path(settings.BASE_DIR) / 'backups'))
+
+
+def database_path(alias='default'):
+    """File of the SQLite database ``alias``; BackupError for other engines"""
+    connection = connections[alias]
+    if connection.vendor != 'sqlite':
+        raise BackupError('النسخ الاحتياطي المباشر مدعوم لقواعد SQLite فقط / Online backup supports SQLite only')
+    return Path(connection.settings_dict['NAME'])
+
+
+def _copy(source, target, pages=STEP_PAGES, pause=STEP_PAUSE, progress=None):
+    """Copy database file ``source`` into ``target`` with the backup API"""
+    def step(status, remaining, total):
+        if progress:
+            progress(total - remaining, total)
+        if pause:
+            time.sleep(pause)
+
+    src = sqlite3.connect(str(source), timeout=30, isolation_level=None)
+    dst = sqlite3.connect(str(target), timeout=30)
+    try:
+        if src.execute('PRAGMA journal_mode').fetchone()[0] == 'wal':
+            # Pin a snapshot for the whole copy
+            src.execute('BEGIN')
+            src.execute('SELECT count(*) FROM sqlite_master').fetchone()
+        src.backup(dst, pages=pages, progress=step)
+        if src.in_transaction:
+            src.execute('COMMIT')
+    finally:
+        dst.close()
+        src.close()
+
+
+def check_integrity(path):
+    """Raise BackupError unless ``PRAGMA integrity_check`` of ``path`` is ok"""
+    connection = sqlite3.connect(f'{Path(path).resolve().as_uri()}?mode=ro', uri=True)
+    try:
+        rows = [row[0] for row in connection.execute('PRAGMA integrity_check')]
+    finally:
+        connection.close()
+    if rows != ['ok']:
+        raise BackupError(f"فشل فحص سلامة النسخة / Integrity check failed: {'; '.join(rows[:5])}")
+
+
+def list_backups(directory=None):
+    """Backup files of ``directory``, newest first"""
+    directory = Path(directory or backup_dir())
+    if not directory.is_dir():
+        return []
+    files = [path for path in directory.iterdir()
+             if path.name.startswith(PREFIX) and path.name.endswith(('.sqlite3', '.sqlite3.gz'))]
+    return sorted(files, key=lambda path: path.name, reverse=True)
+
+
+def rotate_backups(keep, directory=None):
+    """Delete all but the ``keep`` newest backups; returns the deleted paths"""
+    if not keep or keep < 1:
+        return []
+    removed = list_backups(directory)[keep:]
+    for path in removed:
+        path.unlink()
+    return removed
+
+
+def backup_database(directory=None, compress=False, verify=True, keep=None,
+                    pages=STEP_PAGES, pause=STEP_PAUSE, progress=None, alias='default'):
+    """Back up database ``alias`` into ``directory``; returns the backup's path.
+
+    ``progress(done, total)`` is called after every step with page counts.
+    """
+    source = database_path(alias)
+    if not source.exists():
+        raise BackupError(f'قاعدة البيانات غير موجودة / Database not found: {source}')
+    directory = Path(directory or backup_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"{PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.sqlite3"
+
+    # Work on a temporary file so a failed run never looks like a backup
+    fd, partial = tempfile.mkstemp(suffix='.partial', dir=directory)
+    os.close(fd)
+    try:
+        _copy(source, partial, pages=pages, pause=pause, progress=progress)
+        if verify:
+            check_integrity(partial)
+        if compress:
+            target = directory / f'{name}.gz'
+            with open(partial, 'rb') as raw, gzip.open(target, 'wb') as packed:
+                shutil.copyfileobj(raw, packed)
+        else:
+            target = directory / name
+            os.replace(partial, target)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+    rotate_backups(keep, directory)
+    return target
+
+
+def restore_database(backup, verify=True, alias='default'):
+    """Replace database ``alias`` with the contents of file ``backup`` (.gz or not).
+
+    The copy goes through the backup API into the live file in one pass
+    (the target stays locked until it is complete anyway), so open
+    connections see the restored data on their next transaction instead of
+    a file swapped under them.
+    """
+    backup = Path(backup)
+    if not backup.exists():
+        raise BackupError(f'ملف النسخة غير موجود / Backup not found: {backup}')
+    target = database_path(alias)
+
+    unpacked = None
+    try:
+        if backup.suffix == '.gz':
+            fd, unpacked = tempfile.mkstemp(suffix='.sqlite3', dir=backup.parent)
+            with os.fdopen(fd, 'wb') as raw, gzip.open(backup, 'rb') as packed:
+                shutil.copyfileobj(packed, raw)
+            source = Path(unpacked)
+        else:
+            source = backup
+        if verify:
+            check_integrity(source)
+        connections[alias].close()
+        _copy(source, target, pages=-1, pause=0)
+    finally:
+        if unpacked and os.path.exists(unpacked):
+            os.remove(unpacked)
+    return target
+
+
+@register('pages.backup_database')
+def backup_database_job(job, compress=True, keep=None, verify=True):
+    job.set_progress(0, message='نسخ قاعدة البيانات / Backing up database')
+    last = [0]
+
+    def progress(done, total):
+        percent = int(done * 100 / total) if total else 100
+        if percent - last[0] >= 10:
+            last[0] = percent
+            job.set_progress(percent)
+
+    path = backup_database(compress=compress, verify=verify, keep=keep, progress=progress)
+    return {'file': str(path), 'size': path.stat().st_size}
@@ -0,0 +1,157 @@
+"""Send heavy report reads to the ``reports`` database alias.
+
+``DATABASES['reports']`` is a read-only connection: on SQLite the same file
+opened with ``mode=ro`` (with ``SQLITE_WAL`` on, the ``default`` connection
+runs in WAL mode, so these readers never block cashier writes), on a server
+database a read replica.  ``ReportsRouter`` sends reads to it only inside ``reporting()``;
+every write, and every read outside it, stays on ``default``::
+
+    @method_decorator(reports_db, name='get')
+    class TrialBalanceView(...): ...
+
+    with reporting():
+        rows = list(ledger_rows(account))
+
+``reports_db`` also covers what runs after the view returns: lazy
+``TemplateResponse`` rendering and streamed export content.
+
+``ActivityLogRouter`` keeps the activity log in its own database
+(``DATABASES['activity']``, a separate SQLite file), so log writes never
+take the ledger's write lock.  Create its tables with
+``manage.py migrate --database activity``.
+"""
+import contextvars
+import functools
+from contextlib import contextmanager
+
+from django.conf import settings
+
+REPORTS_DB = 'reports'
+ACTIVITY_DB = 'activity'
+ACTIVITY_MODELS = {'activitylog', 'archivedactivitylog', 'activitysummary'}
+# Logins, sessions and flash messages must not see replica lag
+DEFAULT_ONLY_APPS = {'auth', 'sessions', 'contenttypes', 'admin', 'django_cache'}
+_reporting = contextvars.ContextVar('reporting', default=False)
+
+
+def reports_alias():
+    """``reports`` when configured, else ``default``"""
+    return REPORTS_DB if REPORTS_DB in settings.DATABASES else 'default'
+
+
+@contextmanager
+def reporting():
+    """Route ORM reads of the enclosed block to the reports alias"""
+    token = _reporting.set(True)
+    try:
+        yield
+    finally:
+        _reporting.reset(token)
+
+
+def _iterate_reporting(iterable):
+    # Each chunk is produced in a copied context with reporting switched on,
+    # so the flag never leaks into the server code between chunks
+    context = contextvars.copy_context()
+    context.run(_reporting.set, True)
+    iterator = context.run(iter, iterable)
+    while True:
+        try:
+            chunk = context.run(next, iterator)
+        except StopIteration:
+            return
+        yield chunk
+
+
+def reports_db(view):
+    """View decorator: the view, its template and its streamed body read from ``reports``"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        with reporting():
+            response = view(*args, **kwargs)
+            if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+                response.render()
+        if getattr(response, 'streaming', False):
+            response.streaming_content = _iterate_reporting(response.streaming_content)
+        return response
+    return wrapper
+
+
+class ReportsRouter:
+    """Reads of app models go to ``reports`` inside ``reporting()``; everything else to ``default``"""
+
+    def db_for_read(self, model, **hints):
+        if _reporting.get() and model._meta.app_label not in DEFAULT_ONLY_APPS:
+            return reports_alias()
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        # Also for objects that were read from the reports alias
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {'default', REPORTS_DB}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPORTS_DB:
+            return False
+        return None
+
+
+def activity_alias():
+    """``activity`` when configured, else ``default``"""
+    return ACTIVITY_DB if ACTIVITY_DB in settings.DATABASES else 'default'
+
+
+def _is_activity_model(app_label, model_name):
+    return app_label == 'pages' and model_name in ACTIVITY_MODELS
+
+
+class ActivityLogRouter:
+    """The activity log tables live in ``activity`` and nothing else does.
+
+    Goes before ``ReportsRouter`` in ``DATABASE_ROUTERS``.  Log rows point
+    at users by id only (no foreign key constraint across files).
+    """
+
+    def db_for_read(self, model, **hints):
+        if _is_activity_model(model._meta.app_label, model._meta.model_name):
+            return activity_alias()
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if any(_is_activity_model(obj._meta.app_label, obj._meta.model_name) for obj in (obj1, obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if activity_alias() == 'default':
+            return None
+        if db == ACTIVITY_DB:
+            # Raw SQL and data operations of other apps (model_name None) too
+            return app_label == 'pages' and (model_name is None or model_name in ACTIVITY_MODELS)
+        if model_name and _is_activity_model(app_label, model_name):
+            return False
+        return None
+
+
+def enable_sqlite_wal(sender, connection, **kwargs):
+    """``connection_created`` hook: WAL lets report readers run beside writers.
+
+    Only with ``settings.SQLITE_WAL``: the pragma rewrites the database file
+    header, which ``check``, ``makemigrations`` and a checked-out copy of the
+    database should not do.
+    """
+    if not getattr(settings, 'SQLITE_WAL', False):
+        return
+    if connection.vendor == 'sqlite' and connection.alias != REPORTS_DB:
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
+            if connection.alias == ACTIVITY_DB:
+                # A lost log row after a power cut is acceptable, a slow commit is not
+                cursor.execute('PRAGMA synchronous=NORMAL')
@@ -0,0 +1,196 @@
+"""Local background jobs without an external broker.
+
+Slow work (exports, PDFs, balance rebuilds) is stored as a ``Job`` row and
+executed by ``manage.py runworker`` instead of inside a web request.
+Handlers are registered by name in each app's ``jobs.py`` module, which is
+imported at startup (``PagesConfig.ready``)::
+
+    @register('accounts.rebuild_balances')
+    def rebuild_balances(job):
+        job.set_progress(50, message='...')
+        return {'changed': 12}            # stored in job.result
+
+A handler may attach a file with ``save_result_file``.  Workers claim a job
+with a conditional UPDATE, so several worker processes never run the same
+job twice.  While a handler runs, a heartbeat thread keeps the job's
+``updated_at`` fresh; jobs whose worker died are requeued after
+``STALE_AFTER``, and a worker that lost its job that way does not record
+an outcome for it.  Failures are retried with exponential backoff until
+``max_attempts``.
+"""
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.core.files import File
+from django.db import DatabaseError, close_old_connections, connections
+from django.db.models import F
+from django.http import JsonResponse
+from django.shortcuts import redirect
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY = 30          # seconds before the first retry, doubled each time
+STALE_AFTER = 15 * 60     # running jobs without a heartbeat for this long are requeued
+HEARTBEAT = 60            # seconds between heartbeats of a running job
+
+_registry = {}
+
+
+def register(name):
+    """Register ``func(job, **params)`` as the handler of jobs called ``name``"""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def is_registered(name):
+    return name in _registry
+
+
+def enqueue(name, user=None, max_attempts=3, **params):
+    """Queue job ``name``; ``params`` must be JSON serializable"""
+    if name not in _registry:
+        raise ValueError(f"Unknown job: {name}")
+    if user is not None and not user.is_authenticated:
+        user = None
+    return Job.objects.create(name=name, params=params, created_by=user, max_attempts=max_attempts)
+
+
+def job_response(request, job):
+    """Answer a view that queued ``job``: JSON for AJAX, else the job page"""
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({
+            'job_id': job.pk,
+            'status_url': reverse('pages:job_status', args=[job.pk]),
+            'page_url': reverse('pages:job_detail', args=[job.pk]),
+        }, status=202)
+    return redirect('pages:job_detail', pk=job.pk)
+
+
+def track(job, rows, total, every=1000):
+    """Pass ``rows`` through, reporting progress every ``every`` rows"""
+    for index, row in enumerate(rows, 1):
+        if index % every == 0:
+            job.set_progress(index, total)
+        yield row
+
+
+def save_result_file(job, filename, chunks):
+    """Store the bytes of ``chunks`` as the job's result file"""
+    with tempfile.TemporaryFile() as fh:
+        for chunk in chunks:
+            fh.write(chunk)
+        fh.seek(0)
+        job.result_file.save(filename, File(fh), save=False)
+    Job.objects.filter(pk=job.pk).update(result_file=job.result_file.name)
+
+
+def claim_next(worker):
+    """Mark the next due job as running for ``worker`` and return it"""
+    now = timezone.now()
+    due = Job.objects.filter(status='queued', run_after__lte=now).order_by('run_after', 'id')
+    for pk in due.values_list('pk', flat=True)[:10]:
+        claimed = Job.objects.filter(pk=pk, status='queued').update(
+            status='running', worker=worker, started_at=now, updated_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def _claimed(job):
+    """``job`` while it is still running for the worker that claimed it"""
+    return Job.objects.filter(pk=job.pk, worker=job.worker, status='running')
+
+
+def _heartbeat(job, stop):
+    """Touch ``updated_at`` every ``HEARTBEAT`` seconds until ``stop`` is set"""
+    try:
+        while not stop.wait(HEARTBEAT):
+            try:
+                _claimed(job).update(updated_at=timezone.now())
+            except DatabaseError:
+                logger.warning("Heartbeat of job %s failed", job.pk, exc_info=True)
+    finally:
+        connections.close_all()
+
+
+def _finish(job, **values):
+    """Record the outcome of ``job`` unless it was requeued meanwhile"""
+    values['updated_at'] = timezone.now()
+    if not _claimed(job).update(**values):
+        logger.warning("Job %s (%s) is no longer claimed by %s; outcome discarded", job.pk, job.name, job.worker)
+        job.refresh_from_db()
+        return job
+    for name, value in values.items():
+        setattr(job, name, value)
+    return job
+
+
+def run(job):
+    """Execute a claimed job and record the outcome"""
+    func = _registry.get(job.name)
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job, stop), name=f'job-{job.pk}-heartbeat', daemon=True)
+    heartbeat.start()
+    try:
+        if func is None:
+            raise LookupError(f"No handler registered for job {job.name!r}")
+        result = func(job, **job.params)
+    except Exception:
+        logger.exception("Job %s (%s) failed", job.pk, job.name)
+        now = timezone.now()
+        if func is not None and job.attempts < job.max_attempts:
+            outcome = {
+                'status': 'queued',
+                'run_after': now + timedelta(seconds=RETRY_DELAY * 2 ** (job.attempts - 1)),
+                'message': 'ستعاد المحاولة / Will retry',
+            }
+        else:
+            outcome = {'status': 'failed', 'finished_at': now, 'message': 'فشلت المهمة / Job failed'}
+        return _finish(job, error=traceback.format_exc(), **outcome)
+    finally:
+        stop.set()
+        heartbeat.join()
+
+    return _finish(job, status='done', progress=100, result=result, error='', finished_at=timezone.now())
+
+
+def requeue_stale():
+    """Give jobs of dead workers back to the queue (or fail them)"""
+    cutoff = timezone.now() - timedelta(seconds=STALE_AFTER)
+    stale = Job.objects.filter(status='running', updated_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', finished_at=timezone.now(), message='توقف العامل / Worker stopped',
+    )
+    return failed + stale.update(status='queued', run_after=timezone.now())
+
+
+def work(worker=None, poll=2.0, burst=False):
+    """Worker loop; with ``burst`` return once the queue is empty"""
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+    while True:
+        close_old_connections()
+        requeue_stale()
+        job = claim_next(worker)
+        if job is None:
+            if burst:
+                return processed
+            time.sleep(poll)
+            continue
+        logger.info("Worker %s running job %s (%s)", worker, job.pk, job.name)
+        run(job)
+        processed += 1
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from pages.archive import CHUNK_SIZE, move_rows, years_ago
+
+
+class Command(BaseCommand):
+    help = (
+        "Move old history into the archive tables: the journal of closed accounting "
+        "periods (replaced by carried-forward entries), old activity logs and attendance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--periods', action='store_true', help="Archive every closed, not yet archived period")
+        parser.add_argument('--user', help="Username recorded on the carried-forward entries (with --periods)")
+        parser.add_argument('--log-years', type=float, help="Archive activity logs older than N years")
+        parser.add_argument('--attendance-years', type=float, help="Archive attendance older than N years")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Rows (or entries) per transaction")
+        parser.add_argument('--dry-run', action='store_true', help="Only count what would be archived")
+
+    def handle(self, *args, **options):
+        if not (options['periods'] or options['log_years'] or options['attendance_years']):
+            raise CommandError("Nothing to archive: give --periods, --log-years and/or --attendance-years")
+        chunk_size = max(1, options['chunk_size'])
+        dry_run = options['dry_run']
+
+        if options['periods']:
+            from accounts.archive import archivable_entries, archivable_periods, archive_period
+
+            user = None
+            if not dry_run:
+                if not options['user']:
+                    raise CommandError("--periods needs --user")
+                User = get_user_model()
+                try:
+                    user = User.objects.get(username=options['user'])
+                except User.DoesNotExist:
+                    raise CommandError(f"User '{options['user']}' not found")
+            for period in archivable_periods():
+                if dry_run:
+                    self.stdout.write(f"{period.name}: {archivable_entries(period).count()} entries")
+                    continue
+                entries, lines = archive_period(period, user, chunk_size=chunk_size)
+                self.stdout.write(f"{period.name}: archived {entries} entries / {lines} transactions")
+
+        if options['log_years']:
+            from pages.models import ActivityLog, ArchivedActivityLog
+
+            logs = ActivityLog.objects.filter(timestamp__lt=years_ago(options['log_years']))
+            moved = logs.count() if dry_run else move_rows(logs, ArchivedActivityLog, chunk_size)
+            self.stdout.write(f"Activity logs: {moved}")
+
+        if options['attendance_years']:
+            from attendance.models import ArchivedAttendance, Attendance
+
+            records = Attendance.objects.filter(date__lt=years_ago(options['attendance_years']).date())
+            moved = records.count() if dry_run else move_rows(records, ArchivedAttendance, chunk_size)
+            self.stdout.write(f"Attendance records: {moved}")
+
+        self.stdout.write(self.style.SUCCESS("Dry run, nothing moved." if dry_run else "Archiving done."))
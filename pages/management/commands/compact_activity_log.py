@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from pages.activity import KEEP_DAYS, compact, vacuum
+from pages.archive import CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll activity log rows older than the retention period into daily "
+        "summaries (per day, user, action and model) and delete them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-days', type=int, default=KEEP_DAYS, help="Days of detailed log to keep")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Rows per transaction")
+        parser.add_argument('--vacuum', action='store_true', help="VACUUM the log database afterwards")
+
+    def handle(self, *args, **options):
+        compacted = compact(keep_days=max(0, options['keep_days']), chunk_size=max(1, options['chunk_size']))
+        self.stdout.write(f"Activity logs compacted: {compacted}")
+        if options['vacuum']:
+            vacuum()
+            self.stdout.write("Log database vacuumed.")
+        self.stdout.write(self.style.SUCCESS("Compaction done."))
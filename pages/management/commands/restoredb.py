@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pages.backup import BackupError, backup_database, list_backups, restore_database
+
+
+class Command(BaseCommand):
+    help = "Restore the SQLite database from a backup made by backupdb."
+
+    def add_arguments(self, parser):
+        parser.add_argument('backup', nargs='?', help="Backup file (.sqlite3 or .sqlite3.gz)")
+        parser.add_argument('--latest', action='store_true', help="Restore the newest backup")
+        parser.add_argument('--dir', help="Backup directory used with --latest")
+        parser.add_argument('--no-safety-backup', action='store_true',
+                            help="Do not back up the current database before restoring")
+        parser.add_argument('--no-verify', action='store_true', help="Skip PRAGMA integrity_check of the backup")
+        parser.add_argument('--no-input', action='store_true', help="Do not ask for confirmation")
+
+    def handle(self, *args, **options):
+        backup = options['backup']
+        if options['latest']:
+            backups = list_backups(options['dir'])
+            if not backups:
+                raise CommandError("No backups found")
+            backup = backups[0]
+        if not backup:
+            raise CommandError("Give a backup file or --latest")
+
+        if not options['no_input']:
+            confirm = input(f"⛔️ سيتم استبدال قاعدة البيانات الحالية بالنسخة {backup}\n"
+                            f"هل أنت متأكد؟ (نعم/لا): ")
+            if confirm.lower() not in ['نعم', 'yes', 'y', 'ن']:
+                self.stdout.write(self.style.WARNING('تم إلغاء العملية.'))
+                return
+
+        try:
+            if not options['no_safety_backup']:
+                safety = backup_database(directory=options['dir'], compress=True)
+                self.stdout.write(f"Current database saved to {safety}")
+            target = restore_database(backup, verify=not options['no_verify'])
+        except BackupError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"✅ {target} restored from {backup}"))
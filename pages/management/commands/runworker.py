@@ -0,0 +1,54 @@
+import multiprocessing
+import os
+import socket
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def _worker_main(index, poll, burst):
+    # Under the "spawn" start method (Windows) the child starts without Django
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    from pages.jobs import work
+
+    work(worker=f"{socket.gethostname()}:{os.getpid()}#{index}", poll=poll, burst=burst)
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (exports, PDFs, rebuilds) from the Job table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help="Number of worker processes")
+        parser.add_argument('--poll', type=float, default=2.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument('--burst', action='store_true', help="Exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        workers, poll, burst = max(1, options['workers']), options['poll'], options['burst']
+        self.stdout.write(f"Starting {workers} worker(s)...")
+
+        if workers == 1:
+            from pages.jobs import work
+
+            processed = work(poll=poll, burst=burst)
+            self.stdout.write(self.style.SUCCESS(f"Queue empty. Jobs processed: {processed}"))
+            return
+
+        # Children must not share the parent's database connection
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=_worker_main, args=(index, poll, burst), daemon=True)
+            for index in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+        self.stdout.write(self.style.SUCCESS("Workers stopped."))
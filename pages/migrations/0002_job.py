@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import pages.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('pages', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='المهمة')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='المعاملات')),
+                ('status', models.CharField(choices=[('queued', 'في الانتظار'), ('running', 'قيد التنفيذ'), ('done', 'منتهية'), ('failed', 'فشلت')], default='queued', max_length=10, verbose_name='الحالة')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='نسبة الإنجاز')),
+                ('message', models.CharField(blank=True, max_length=255, verbose_name='الرسالة')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='النتيجة')),
+                ('result_file', models.FileField(blank=True, upload_to=pages.models._job_result_path, verbose_name='ملف النتيجة')),
+                ('error', models.TextField(blank=True, verbose_name='الخطأ')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='عدد المحاولات')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3, verbose_name='الحد الأقصى للمحاولات')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='التنفيذ بعد')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='العامل')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='أنشئت بواسطة')),
+            ],
+            options={
+                'verbose_name': 'مهمة خلفية',
+                'verbose_name_plural': 'المهام الخلفية',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx')],
+            },
+        ),
+    ]
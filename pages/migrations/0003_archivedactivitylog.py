@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('pages', '0002_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedActivityLog',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('action', models.CharField(choices=[('create', 'إنشاء'), ('update', 'تعديل'), ('delete', 'حذف'), ('login', 'دخول'), ('logout', 'خروج'), ('view', 'عرض'), ('other', 'أخرى')], max_length=10)),
+                ('content_type', models.CharField(max_length=100)),
+                ('object_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('object_repr', models.CharField(max_length=200)),
+                ('timestamp', models.DateTimeField(db_index=True)),
+                ('details', models.TextField(blank=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'سجل نشاط مؤرشف',
+                'verbose_name_plural': 'سجلات النشاطات المؤرشفة',
+                'ordering': ['-timestamp'],
+            },
+        ),
+    ]
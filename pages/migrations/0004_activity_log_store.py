@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('pages', '0003_archivedactivitylog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivitySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='اليوم')),
+                ('action', models.CharField(choices=[('create', 'إنشاء'), ('update', 'تعديل'), ('delete', 'حذف'), ('login', 'دخول'), ('logout', 'خروج'), ('view', 'عرض'), ('other', 'أخرى')], max_length=10, verbose_name='الإجراء')),
+                ('content_type', models.CharField(max_length=100, verbose_name='النوع')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='العدد')),
+            ],
+            options={
+                'verbose_name': 'ملخص نشاط يومي',
+                'verbose_name_plural': 'ملخصات النشاط اليومية',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='activitylog',
+            name='user',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='archivedactivitylog',
+            name='user',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['timestamp'], name='activity_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['user', 'timestamp'], name='activity_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['content_type', 'object_id'], name='activity_object_idx'),
+        ),
+        migrations.AddField(
+            model_name='activitysummary',
+            name='user',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='المستخدم'),
+        ),
+        migrations.AddIndex(
+            model_name='activitysummary',
+            index=models.Index(fields=['day', 'user'], name='activity_summary_day_idx'),
+        ),
+    ]
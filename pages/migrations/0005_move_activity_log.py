@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:10
+
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import connections, migrations, transaction
+
+LEGACY_TABLES = [
+    ('ActivityLog', 'pages_activitylog'),
+    ('ArchivedActivityLog', 'pages_archivedactivitylog'),
+]
+CHUNK_SIZE = 1000
+
+
+def _aware(value):
+    # SQLite hands back the stored UTC datetimes without a time zone
+    if settings.USE_TZ and isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def move_legacy_rows(apps, schema_editor):
+    """Copy the log rows still kept in ``default`` into the activity database, then drop them there"""
+    alias = schema_editor.connection.alias
+    if alias == 'default':
+        return
+    legacy = connections['default']
+    existing = legacy.introspection.table_names()
+    for model_name, table in LEGACY_TABLES:
+        if table not in existing:
+            continue
+        model = apps.get_model('pages', model_name)
+        columns = [field.column for field in model._meta.concrete_fields]
+        attnames = [field.attname for field in model._meta.concrete_fields]
+        last_id = 0
+        while True:
+            with legacy.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT {", ".join(columns)} FROM {table} WHERE id > %s ORDER BY id LIMIT %s',
+                    [last_id, CHUNK_SIZE],
+                )
+                rows = cursor.fetchall()
+            if not rows:
+                break
+            with transaction.atomic(using=alias):
+                # ignore_conflicts: an interrupted run can simply be repeated
+                model.objects.using(alias).bulk_create(
+                    [model(**{name: _aware(value) for name, value in zip(attnames, row)}) for row in rows], ignore_conflicts=True,
+                )
+            last_id = rows[-1][0]
+        with legacy.cursor() as cursor:
+            cursor.execute(f'DROP TABLE {table}')
+
+
+class Migration(migrations.Migration):
+    # Every chunk commits on its own, before the legacy table is dropped
+    atomic = False
+
+    dependencies = [
+        ('pages', '0004_activity_log_store'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_legacy_rows, migrations.RunPython.noop),
+    ]
@@ -14,7 +14,9 @@ class ActivityLog(models.Model):
         ('other', 'أخرى'),
     ]
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    # السجل في قاعدة بيانات منفصلة (pages/db.py): لا قيد مفتاح أجنبي، وحذف
+    # المستخدم يفرغ الحقل بدل حذف سجلاته (pages/activity.py)
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True)
     action = models.CharField(max_length=10, choices=ACTION_CHOICES)
     content_type = models.CharField(max_length=100)  # نوع المودل
     object_id = models.PositiveIntegerField(null=True, blank=True)  # معرف العنصر
@@ -26,6 +28,113 @@ class ActivityLog(models.Model):
         ordering = ['-timestamp']
         verbose_name = 'سجل النشاط'
         verbose_name_plural = 'سجلات النشاطات'
+        indexes = [
+            models.Index(fields=['timestamp'], name='activity_timestamp_idx'),
+            models.Index(fields=['user', 'timestamp'], name='activity_user_time_idx'),
+            models.Index(fields=['content_type', 'object_id'], name='activity_object_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user} - {self.get_action_display()} - {self.content_type}"
\ No newline at end of file
+        return f"{self.user} - {self.get_action_display()} - {self.content_type}"
+
+
+class ArchivedActivityLog(models.Model):
+    """سجل نشاط قديم نُقل من ActivityLog (بنفس المعرّف)، انظر pages/archive.py"""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+')
+    action = models.CharField(max_length=10, choices=ActivityLog.ACTION_CHOICES)
+    content_type = models.CharField(max_length=100)
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    object_repr = models.CharField(max_length=200)
+    timestamp = models.DateTimeField(db_index=True)
+    details = models.TextField(blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-timestamp']
+        verbose_name = 'سجل نشاط مؤرشف'
+        verbose_name_plural = 'سجلات النشاطات المؤرشفة'
+
+
+class ActivitySummary(models.Model):
+    """عدد النشاطات في يوم لكل مستخدم وإجراء ونوع، بدل سجلاتها القديمة (انظر pages/activity.py)"""
+    day = models.DateField(verbose_name='اليوم')
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+                             related_name='+', verbose_name='المستخدم')
+    action = models.CharField(max_length=10, choices=ActivityLog.ACTION_CHOICES, verbose_name='الإجراء')
+    content_type = models.CharField(max_length=100, verbose_name='النوع')
+    count = models.PositiveIntegerField(default=0, verbose_name='العدد')
+
+    class Meta:
+        ordering = ['-day']
+        verbose_name = 'ملخص نشاط يومي'
+        verbose_name_plural = 'ملخصات النشاط اليومية'
+        indexes = [
+            models.Index(fields=['day', 'user'], name='activity_summary_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - {self.user_id} - {self.action} {self.content_type}: {self.count}"
+
+def _job_result_path(job, filename):
+    return f"jobs/{timezone.now():%Y/%m}/{job.pk}_{filename}"
+
+
+class Job(models.Model):
+    """مهمة خلفية تنفذها عملية ``runworker`` (انظر pages/jobs.py)"""
+
+    STATUS_CHOICES = [
+        ('queued', 'في الانتظار'),
+        ('running', 'قيد التنفيذ'),
+        ('done', 'منتهية'),
+        ('failed', 'فشلت'),
+    ]
+
+    name = models.CharField(max_length=100, verbose_name='المهمة')
+    params = models.JSONField(default=dict, blank=True, verbose_name='المعاملات')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued', verbose_name='الحالة')
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name='نسبة الإنجاز')
+    message = models.CharField(max_length=255, blank=True, verbose_name='الرسالة')
+    result = models.JSONField(null=True, blank=True, verbose_name='النتيجة')
+    result_file = models.FileField(upload_to=_job_result_path, blank=True, verbose_name='ملف النتيجة')
+    error = models.TextField(blank=True, verbose_name='الخطأ')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='عدد المحاولات')
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name='الحد الأقصى للمحاولات')
+    run_after = models.DateTimeField(default=timezone.now, verbose_name='التنفيذ بعد')
+    worker = models.CharField(max_length=100, blank=True, verbose_name='العامل')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='أنشئت بواسطة')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Heartbeat: bumped with every progress report
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'مهمة خلفية'
+        verbose_name_plural = 'المهام الخلفية'
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} - {self.get_status_display()}"
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed')
+
+    def set_progress(self, done, total=None, message=None):
+        """Report progress from inside a running job.
+
+        ``done``/``total`` are turned into a percentage (``done`` alone is
+        taken as one).  Only the progress columns are written.
+        """
+        if total:
+            done = int(done * 100 / total)
+        self.progress = max(0, min(100, int(done)))
+        fields = ['progress', 'updated_at']
+        if message is not None:
+            self.message = message[:255]
+            fields.append('message')
+        self.save(update_fields=fields)
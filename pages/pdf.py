@@ -0,0 +1,29 @@
+"""HTML template -> PDF with xhtml2pdf, shared by the apps that print."""
+import io
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.template.loader import render_to_string
+from xhtml2pdf import pisa
+
+
+def link_callback(uri, rel):
+    """Resolve /static/ and /media/ URLs to local files so images load"""
+    if uri.startswith(settings.STATIC_URL):
+        path = finders.find(uri[len(settings.STATIC_URL):])
+        if path:
+            return path
+    elif uri.startswith(settings.MEDIA_URL):
+        return os.path.join(settings.MEDIA_ROOT, uri[len(settings.MEDIA_URL):])
+    return uri
+
+
+def render_pdf(template_name, context):
+    """Render a template to PDF bytes; raises ValueError if xhtml2pdf fails"""
+    html_string = render_to_string(template_name, context)
+    result = io.BytesIO()
+    pdf = pisa.pisaDocument(io.BytesIO(html_string.encode("UTF-8")), result, link_callback=link_callback)
+    if pdf.err:
+        raise ValueError('Error generating PDF: %s' % pdf.err)
+    return result.getvalue()
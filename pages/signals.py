@@ -3,13 +3,26 @@ from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.core.exceptions import ObjectDoesNotExist
-from .models import ActivityLog
+from .activity import log_alias, record
 import inspect
-from django.db import connection
+from django.db import connections
+
+_existing_tables = set()
 
 def table_exists(table_name):
-    """يتأكد إذا الجدول موجود فعلاً بالـ DB"""
-    return table_name in connection.introspection.table_names()
+    """يتأكد إذا الجدول موجود فعلاً بقاعدة السجل (النتيجة الإيجابية تُحفظ لتجنب الاستعلام مع كل حفظ)"""
+    if table_name in _existing_tables:
+        return True
+    if table_name in connections[log_alias()].introspection.table_names():
+        _existing_tables.add(table_name)
+        return True
+    return False
+
+def is_logged_model(sender, raw=False):
+    """لا يُسجَّل تحميل البيانات الخام (loaddata) ولا ما يكتبه migrate: سجل الترحيلات والنماذج التاريخية"""
+    if raw or sender.__module__ == '__fake__' or sender._meta.app_label == 'migrations':
+        return False
+    return sender.__name__ not in ['ActivityLog', 'ActivitySummary', 'LogEntry', 'Session', 'ContentType']
 
 def get_current_user():
     """الحصول على المستخدم الحالي"""
@@ -25,8 +38,7 @@ def get_current_user():
 
 @receiver(post_save)
 def log_save(sender, instance, created, **kwargs):
-    excluded_models = ['ActivityLog', 'LogEntry', 'Session', 'ContentType']
-    if sender.__name__ in excluded_models:
+    if not is_logged_model(sender, kwargs.get('raw', False)):
         return
     
     # 🛑 وقف التنفيذ إذا جدول ActivityLog لسا ما انبنى
@@ -39,7 +51,7 @@ def log_save(sender, instance, created, **kwargs):
             return
 
         action = 'create' if created else 'update'
-        ActivityLog.objects.create(
+        record(
             user=user,
             action=action,
             content_type=sender.__name__,
@@ -52,8 +64,7 @@ def log_save(sender, instance, created, **kwargs):
 
 @receiver(post_delete)
 def log_delete(sender, instance, **kwargs):
-    excluded_models = ['ActivityLog', 'LogEntry', 'Session', 'ContentType']
-    if sender.__name__ in excluded_models:
+    if not is_logged_model(sender, kwargs.get('raw', False)):
         return
 
     if not table_exists('pages_activitylog'):
@@ -64,7 +75,7 @@ def log_delete(sender, instance, **kwargs):
         if user and user.is_superuser:
             return
 
-        ActivityLog.objects.create(
+        record(
             user=user,
             action='delete',
             content_type=sender.__name__,
@@ -83,7 +94,7 @@ def log_login(sender, request, user, **kwargs):
     if user.is_superuser:
         return
 
-    ActivityLog.objects.create(
+    record(
         user=user,
         action='login',
         content_type='User',
@@ -100,7 +111,7 @@ def log_logout(sender, request, user, **kwargs):
     if user.is_superuser:
         return
 
-    ActivityLog.objects.create(
+    record(
         user=user,
         action='logout',
         content_type='User',
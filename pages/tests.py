@@ -1,3 +1,118 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from pages import jobs
+from pages.db import enable_sqlite_wal
+from pages.models import Job
+
+
+class JobQueueTests(TestCase):
+    # Saving any model checks the activity log table (pages.signals)
+    databases = {'default', 'activity'}
+
+    def setUp(self):
+        self.calls = []
+
+        @jobs.register('tests.flaky')
+        def flaky(job, fail=True):
+            self.calls.append(job.attempts)
+            if fail:
+                raise RuntimeError('boom')
+            return {'ok': True}
+        self.addCleanup(jobs._registry.pop, 'tests.flaky')
+
+    def test_each_job_is_claimed_by_one_worker(self):
+        first = jobs.enqueue('tests.flaky', fail=False)
+        second = jobs.enqueue('tests.flaky', fail=False)
+
+        claimed = [jobs.claim_next('a'), jobs.claim_next('b'), jobs.claim_next('c')]
+
+        self.assertEqual([job and job.pk for job in claimed], [first.pk, second.pk, None])
+        self.assertEqual([(job.worker, job.status, job.attempts) for job in claimed[:2]],
+                         [('a', 'running', 1), ('b', 'running', 1)])
+
+    def test_running_jobs_are_not_claimed_again(self):
+        job = jobs.enqueue('tests.flaky', fail=False)
+        jobs.claim_next('other')
+
+        self.assertIsNone(jobs.claim_next('a'))
+        self.assertEqual(Job.objects.get(pk=job.pk).worker, 'other')
+
+    def test_failures_are_retried_with_backoff(self):
+        job = jobs.enqueue('tests.flaky', max_attempts=3)
+
+        delays = []
+        for _ in range(3):
+            claimed = jobs.claim_next('a')
+            before = timezone.now()
+            with self.assertLogs('pages.jobs', 'ERROR'):
+                jobs.run(claimed)
+            claimed.refresh_from_db()
+            if claimed.status == 'queued':
+                delays.append(round((claimed.run_after - before).total_seconds()))
+                self.assertIsNone(jobs.claim_next('a'))
+                Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+
+        job.refresh_from_db()
+        self.assertEqual(delays, [jobs.RETRY_DELAY, jobs.RETRY_DELAY * 2])
+        self.assertEqual((job.status, job.attempts, self.calls), ('failed', 3, [1, 2, 3]))
+        self.assertIn('boom', job.error)
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = jobs.enqueue('tests.flaky', fail=False)
+        jobs.claim_next('dead')
+        Job.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(seconds=jobs.STALE_AFTER + 1))
+
+        self.assertEqual(jobs.requeue_stale(), 1)
+
+        done = jobs.run(jobs.claim_next('a'))
+        self.assertEqual((done.status, done.attempts, done.result), ('done', 2, {'ok': True}))
+
+    def test_worker_that_lost_its_claim_does_not_record_an_outcome(self):
+        job = jobs.enqueue('tests.flaky', fail=False)
+        slow = jobs.claim_next('slow')
+        Job.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(seconds=jobs.STALE_AFTER + 1))
+        jobs.requeue_stale()
+        jobs.claim_next('fresh')
+
+        with self.assertLogs('pages.jobs', 'WARNING'):
+            outcome = jobs.run(slow)
+
+        self.assertEqual((outcome.status, outcome.worker, outcome.result), ('running', 'fresh', None))
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'running')
+
+
+class JobHeartbeatTests(TransactionTestCase):
+    # The heartbeat thread has its own connection, so the job must be committed
+    databases = {'default', 'activity'}
+
+    def test_running_job_keeps_its_claim_fresh(self):
+        @jobs.register('tests.slow')
+        def slow(job):
+            started = Job.objects.get(pk=job.pk).updated_at
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                if Job.objects.get(pk=job.pk).updated_at > started:
+                    return {'beats': True}
+                time.sleep(0.02)
+            return {'beats': False}
+        self.addCleanup(jobs._registry.pop, 'tests.slow')
+        jobs.enqueue('tests.slow')
+
+        with mock.patch.object(jobs, 'HEARTBEAT', 0.05):
+            done = jobs.run(jobs.claim_next('a'))
+
+        self.assertEqual((done.status, done.result), ('done', {'beats': True}))
+
+
+class SqliteWalTests(TestCase):
+    def test_wal_is_opt_in(self):
+        with self.assertNumQueries(0):
+            enable_sqlite_wal(None, connection)
+        with override_settings(SQLITE_WAL=True), self.assertNumQueries(1):
+            enable_sqlite_wal(None, connection)
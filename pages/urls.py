@@ -8,4 +8,8 @@ app_name = "pages"
 urlpatterns = [
     path('index',views.IndexView.as_view() , name="index"),
     path('',views.welcome.as_view() , name="welcome"),
+    path('jobs/enqueue/', views.JobEnqueueView.as_view(), name="job_enqueue"),
+    path('jobs/<int:pk>/', views.JobDetailView.as_view(), name="job_detail"),
+    path('jobs/<int:pk>/status/', views.job_status, name="job_status"),
+    path('jobs/<int:pk>/download/', views.job_download, name="job_download"),
 ]
\ No newline at end of file
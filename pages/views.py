@@ -10,6 +10,17 @@ from django.db.models import Sum ,Q
 from .models import ActivityLog  # استيراد النموذج الجديد
 from datetime import timedelta, datetime
 from django.contrib.auth.models import User
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.http import require_GET
+from .jobs import enqueue, is_registered, job_response
+from .models import Job
+import os
 
 class IndexView(LoginRequiredMixin, TemplateView):
     template_name = 'pages/index.html'
@@ -50,14 +61,15 @@ class IndexView(LoginRequiredMixin, TemplateView):
         context['start_date'] = start_date_filter
         context['end_date'] = end_date_filter
         
-        # بناء الاستعلام مع الفلترة - استبعاد نشاطات admin
-        activity_query = ActivityLog.objects.filter(
-            Q(user__is_superuser=False) | Q(user__isnull=True)
+        # بناء الاستعلام مع الفلترة - استبعاد نشاطات المشرفين والمستخدم admin
+        # (السجل في قاعدة بيانات منفصلة فلا ربط مع جدول المستخدمين)
+        hidden_users = User.objects.filter(
+            Q(is_superuser=True) | Q(username='admin')
+        ).values_list('id', flat=True)
+        activity_query = ActivityLog.objects.exclude(
+            user_id__in=list(hidden_users)
         ).exclude(content_type='LogEntry')
         
-        # استبعاد نشاطات المستخدم admin إذا كان اسم المستخدم admin
-        activity_query = activity_query.exclude(user__username='admin')
-        
         # تطبيق فلترة المستخدم
         if user_filter:
             activity_query = activity_query.filter(user_id=user_filter)
@@ -80,10 +92,74 @@ class IndexView(LoginRequiredMixin, TemplateView):
                 pass  # تجاهل في حالة تاريخ غير صحيح
         
         # ترتيب النتائج وتحديد العدد
-        context['recent_activities'] = activity_query.order_by('-timestamp')[:50]  # تحديد 50 نشاط فقط
+        context['recent_activities'] = activity_query.prefetch_related('user').order_by('-timestamp')[:50]  # تحديد 50 نشاط فقط
         
         return context
     
     
 class welcome(TemplateView):
-    template_name =   'pages/welcome.html'      
\ No newline at end of file
+    template_name =   'pages/welcome.html'
+
+
+# ==============================
+# Background jobs (pages/jobs.py)
+# ==============================
+def _user_job(request, pk):
+    """المهمة إن كانت للمستخدم الحالي أو كان مشرفاً"""
+    jobs = Job.objects.all()
+    if not request.user.is_staff:
+        jobs = jobs.filter(created_by=request.user)
+    return get_object_or_404(jobs, pk=pk)
+
+
+def _job_payload(job):
+    return {
+        'id': job.pk,
+        'name': job.name,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'progress': job.progress,
+        'message': job.message,
+        'attempts': job.attempts,
+        'result': job.result,
+        'error': job.error.strip().splitlines()[-1] if job.status == 'failed' and job.error else '',
+        'download_url': reverse('pages:job_download', args=[job.pk]) if job.result_file else None,
+    }
+
+
+class JobDetailView(LoginRequiredMixin, TemplateView):
+    template_name = 'pages/job_detail.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['job'] = _user_job(self.request, kwargs['pk'])
+        return context
+
+
+@login_required
+@require_GET
+def job_status(request, pk):
+    return JsonResponse(_job_payload(_user_job(request, pk)))
+
+
+@login_required
+@require_GET
+def job_download(request, pk):
+    job = _user_job(request, pk)
+    if job.status != 'done' or not job.result_file:
+        raise Http404('الملف غير جاهز / File not ready')
+    filename = os.path.basename(job.result_file.name).split('_', 1)[-1]
+    return FileResponse(job.result_file.open('rb'), as_attachment=True, filename=filename)
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class JobEnqueueView(View):
+    """تشغيل مهمة صيانة مسجلة (إعادة بناء الأرصدة، مطابقة حسابات الطلاب...)"""
+
+    def post(self, request):
+        name = request.POST.get('name', '')
+        if not is_registered(name):
+            return JsonResponse({'error': 'UNKNOWN_JOB', 'message': 'مهمة غير معروفة / Unknown job'}, status=400)
+        params = {k: v for k, v in request.POST.items() if k not in ('name', 'csrfmiddlewaretoken')}
+        return job_response(request, enqueue(name, user=request.user, **params))
+
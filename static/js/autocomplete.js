@@ -0,0 +1,79 @@
+// بحث تلقائي للقوائم الكبيرة (حسابات، طلاب، موظفون، مدرسون)
+// Selects rendered by AutocompleteSelect carry data-autocomplete-url and only
+// the chosen option; a search box above them fetches matching options.
+(function() {
+    const MIN_CHARS = 1;
+    const DELAY = 250;
+
+    function attach(select) {
+        if (select.dataset.autocompleteReady) {
+            return;
+        }
+        select.dataset.autocompleteReady = '1';
+
+        const search = document.createElement('input');
+        search.type = 'search';
+        search.className = (select.className || 'form-control') + ' autocomplete-search mb-1';
+        search.placeholder = 'ابحث... / Search...';
+        search.autocomplete = 'off';
+        select.parentNode.insertBefore(search, select);
+
+        let timer = null;
+        let controller = null;
+        search.addEventListener('input', function() {
+            clearTimeout(timer);
+            const q = search.value.trim();
+            if (q.length < MIN_CHARS) {
+                return;
+            }
+            timer = setTimeout(function() {
+                if (controller) {
+                    controller.abort();
+                }
+                controller = new AbortController();
+                const url = select.dataset.autocompleteUrl + '?q=' + encodeURIComponent(q);
+                fetch(url, {signal: controller.signal, headers: {'Accept': 'application/json'}})
+                    .then(function(response) { return response.json(); })
+                    .then(function(data) { fill(select, data.results || []); })
+                    .catch(function() {});
+            }, DELAY);
+        });
+    }
+
+    function fill(select, results) {
+        const current = select.value;
+        const keep = Array.from(select.options).filter(function(o) {
+            return o.value === '' || o.value === current;
+        });
+        select.innerHTML = '';
+        keep.forEach(function(o) { select.appendChild(o); });
+        results.forEach(function(item) {
+            if (String(item.id) === current) {
+                return;
+            }
+            select.appendChild(new Option(item.text, item.id));
+        });
+    }
+
+    function init(root) {
+        root.querySelectorAll('select[data-autocomplete-url]').forEach(function(select) {
+            // Skip formset templates (empty_form), they are cloned later
+            if (!select.name || select.name.indexOf('__prefix__') === -1) {
+                attach(select);
+            }
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        init(document);
+        new MutationObserver(function(mutations) {
+            mutations.forEach(function(mutation) {
+                mutation.addedNodes.forEach(function(node) {
+                    if (node.nodeType === 1) {
+                        init(node.matches('select') ? node.parentNode : node);
+                    }
+                });
+            });
+        }).observe(document.body, {childList: true, subtree: true});
+    });
+})();
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class StudentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'students'
\ No newline at end of file
+    name = 'students'
+    def ready(self):
+        # Connects the signals that drop the cached directory counts
+        from . import directory  # noqa: F401
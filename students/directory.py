@@ -0,0 +1,134 @@
+"""Student directory: filters, keyset pagination and cached counts.
+
+Pages are cut on ``(full_name, id)`` (see ``student_name_id_idx``), so a
+page costs the same however deep the user browses, and the cursor in the
+URL stays valid when students are added in between.  Totals and the
+statistics of ``stunum`` are cached for ``COUNT_TTL`` seconds and dropped
+whenever a student is saved or deleted.
+"""
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Student
+
+PAGE_SIZE = 50
+COUNT_TTL = 60
+
+FILTER_PARAMS = ('search', 'branch', 'gender', 'active', 'classroom')
+
+_GENERATION_KEY = 'students:directory:generation'
+_STATS_KEY = 'students:stats'
+
+
+def filter_students(queryset, params):
+    """Apply the directory filters found in ``params`` (usually request.GET)"""
+    search = params.get('search')
+    if search:
+        queryset = queryset.filter(
+            Q(full_name__icontains=search) |
+            Q(student_number__icontains=search) |
+            Q(branch__icontains=search) |
+            Q(father_phone__icontains=search)
+        )
+    if params.get('branch'):
+        queryset = queryset.filter(branch=params['branch'])
+    if params.get('gender'):
+        queryset = queryset.filter(gender=params['gender'])
+    if params.get('active') in ('1', '0'):
+        queryset = queryset.filter(is_active=params['active'] == '1')
+    if str(params.get('classroom') or '').isdigit():
+        queryset = queryset.filter(classroom_enrollments__classroom_id=params['classroom'])
+    return queryset
+
+
+def encode_cursor(student):
+    raw = json.dumps([student.full_name, student.pk], ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    """``(full_name, id)`` from a cursor, or None if it is missing or invalid"""
+    if not value:
+        return None
+    try:
+        name, pk = json.loads(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)))
+        return str(name), int(pk)
+    except (ValueError, TypeError):
+        return None
+
+
+def keyset_page(queryset, after=None, before=None, size=PAGE_SIZE):
+    """One page of ``queryset`` in (full_name, id) order.
+
+    ``after``/``before`` are decoded cursors of the last/first row of the
+    neighbouring page.  Returns a dict with ``object_list``, ``has_next``,
+    ``has_previous``, ``next_cursor`` and ``previous_cursor``.
+    """
+    if before:
+        name, pk = before
+        rows = list(queryset.filter(
+            Q(full_name__lt=name) | Q(full_name=name, id__lt=pk)
+        ).order_by('-full_name', '-id')[:size + 1])
+        has_previous, has_next = len(rows) > size, True
+        rows = rows[:size][::-1]
+    else:
+        if after:
+            name, pk = after
+            queryset = queryset.filter(Q(full_name__gt=name) | Q(full_name=name, id__gt=pk))
+        rows = list(queryset.order_by('full_name', 'id')[:size + 1])
+        has_previous, has_next = after is not None, len(rows) > size
+        rows = rows[:size]
+
+    return {
+        'object_list': rows,
+        'has_next': bool(rows) and has_next,
+        'has_previous': bool(rows) and has_previous,
+        'next_cursor': encode_cursor(rows[-1]) if rows and has_next else '',
+        'previous_cursor': encode_cursor(rows[0]) if rows and has_previous else '',
+    }
+
+
+def _generation():
+    return cache.get_or_set(_GENERATION_KEY, 0, None)
+
+
+def cached_count(queryset, params):
+    """``queryset.count()`` cached per combination of directory filters"""
+    filters = json.dumps({name: params.get(name) or '' for name in FILTER_PARAMS}, sort_keys=True)
+    key = f"students:count:{_generation()}:{hashlib.md5(filters.encode()).hexdigest()}"
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_TTL)
+    return count
+
+
+def student_stats():
+    """Student counts by gender and branch, from one query"""
+    stats = cache.get(_STATS_KEY)
+    if stats is None:
+        stats = Student.objects.aggregate(
+            students_count=Count('id'),
+            male_count=Count('id', filter=Q(gender=Student.Gender.MALE)),
+            female_count=Count('id', filter=Q(gender=Student.Gender.FEMALE)),
+            scientific_count=Count('id', filter=Q(branch=Student.Academic_Track.SCIENTIFIC)),
+            literary_count=Count('id', filter=Q(branch=Student.Academic_Track.LITERARY)),
+            ninth_grade_count=Count('id', filter=Q(branch=Student.Academic_Track.NINTH_GRADE)),
+        )
+        cache.set(_STATS_KEY, stats, COUNT_TTL)
+    return stats
+
+
+@receiver([post_save, post_delete], sender=Student, dispatch_uid='students_directory_invalidate')
+def invalidate_counts(sender, **kwargs):
+    cache.delete(_STATS_KEY)
+    try:
+        cache.incr(_GENERATION_KEY)
+    except ValueError:
+        cache.set(_GENERATION_KEY, 1, None)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0003_student_student_updated_at_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['full_name', 'id'], name='student_name_id_idx'),
+        ),
+    ]
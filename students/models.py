@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from datetime import datetime
 from decimal import Decimal
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -111,13 +112,26 @@ class Student(models.Model):
         ordering = ['full_name']
         verbose_name = 'طالب'
         verbose_name_plural = 'الطلاب'
+        indexes = [
+            # Prefix search in the autocomplete endpoints
+            models.Index(Lower('full_name'), name='student_full_name_lower_idx'),
+            models.Index(Lower('student_number'), name='student_number_lower_idx'),
+            # Keyset pagination of the directory
+            models.Index(fields=['full_name', 'id'], name='student_name_id_idx'),
+            # Incremental sync in the API (updated_since + cursor)
+            models.Index(fields=['updated_at'], name='student_updated_at_idx'),
+        ]
 
     def __str__(self):
         return self.full_name
 
     @property
     def ar_account(self):
-        """Get or create the AR account for this student"""
+        """The linked AR account, or None; reading it never writes"""
+        return self.account
+
+    def ensure_ar_account(self):
+        """Get or create the AR account for this student (for posting code)"""
         if self.account:
             return self.account
         
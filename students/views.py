@@ -11,14 +11,19 @@ from django.utils import timezone
 from django.shortcuts import render , redirect, get_object_or_404
 from django.views.generic import View , TemplateView ,ListView ,DetailView
 from .models import Student
+from .directory import (
+    FILTER_PARAMS, cached_count, decode_cursor, filter_students, keyset_page, student_stats
+)
 from django.contrib import messages
 from django.utils.dateparse import parse_date
 from .forms import StudentForm
 from collections import defaultdict
+from urllib.parse import urlencode
 from decimal import Decimal
 from django.views.decorators.http import require_POST
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
+from accounts.conditional import statement_condition
 from accounts.models import Transaction, StudentReceipt, StudentEnrollment
 from django.contrib.auth.mixins import UserPassesTestMixin
 
@@ -64,56 +69,64 @@ def register_course(request, student_id):
     
     return redirect('students:student_profile', student_id=student.id)
 
+
+def profile_queryset():
+    """Students with their classroom enrollments prefetched"""
+    from django.db.models import Prefetch
+
+    return Student.objects.prefetch_related(
+        Prefetch('classroom_enrollments', queryset=Classroomenrollment.objects.select_related('classroom')),
+    )
+
+
+def profile_context(student):
+    """Context of the student profile page.
+
+    Course enrollments carry ``total_paid``, ``net_due`` and ``remaining_due``
+    annotations, so the page costs a fixed number of queries however many
+    courses the student has.  Nothing here creates accounts.
+    """
+    from accounts.models import Course, CostCenter
+    from accounts.services import with_enrollment_balances
+
+    course_enrollments = list(with_enrollment_balances(StudentEnrollment.objects.filter(
+        student=student,
+        is_completed=False
+    )).select_related('course').order_by('course__name'))
+
+    # Courses with remaining balance for receipts
+    available_courses = [
+        {'course': enrollment.course, 'remaining': enrollment.remaining_due, 'enrollment': enrollment}
+        for enrollment in course_enrollments
+        if enrollment.remaining_due > Decimal('0.01')
+    ]
+
+    return {
+        'student': student,
+        'enrollments': student.classroom_enrollments.all(),
+        'available_courses': Course.objects.filter(is_active=True).order_by('name'),  # All courses for registration
+        'courses': available_courses,  # Courses with remaining balance for receipts
+        'cost_centers': CostCenter.objects.filter(is_active=True).order_by('code'),
+        'course_enrollments': course_enrollments,
+    }
+
+
 # Add missing view classes
 class StudentProfileView(DetailView):
     model = Student
     template_name = 'students/student_profile.html'
     context_object_name = 'student'
     pk_url_kwarg = 'student_id'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        student = self.get_object()
-        
-        # Get classroom enrollments
-        from classroom.models import Classroomenrollment
-        enrollments = Classroomenrollment.objects.filter(student=student).select_related('classroom')
-        context['enrollments'] = enrollments
-        
-        # Get available courses for receipt generation
-        from accounts.models import Course, CostCenter
-        from django.db.models import Sum
-        
-        # Get all available courses for registration
-        all_courses = Course.objects.filter(is_active=True).order_by('name')
-        
-        context['available_courses'] = all_courses
-        context['cost_centers'] = CostCenter.objects.filter(is_active=True).order_by('code')
 
-        # Get current enrollments
-        from accounts.models import StudentEnrollment
-        course_enrollments = StudentEnrollment.objects.filter(
-            student=student, 
-            is_completed=False
-        ).select_related('course').order_by('course__name')
-
-        context['course_enrollments'] = course_enrollments
-        
-        # Get courses with remaining balance for receipts
-        available_courses = []
-        for enrollment in course_enrollments:
-            remaining = enrollment.balance_due
-            if remaining > Decimal('0.01'):
-                available_courses.append({
-                    'course': enrollment.course,
-                    'remaining': remaining,
-                    'enrollment': enrollment
-                })
-        
-        context['courses'] = available_courses
+    def get_queryset(self):
+        return profile_queryset()
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(profile_context(self.object))
         return context
 
+@method_decorator(statement_condition, name='get')
 class StudentStatementView(DetailView):
     model = Student
     template_name = 'students/student_statement.html'
@@ -201,25 +214,29 @@ class student(ListView):
     context_object_name = 'student'
     
     def get_queryset(self):
-        # ترتيب الطلاب أبجديًا حسب الاسم
-        queryset = Student.objects.all().order_by('full_name')
-        
-        # إضافة وظيفة البحث
-        search_query = self.request.GET.get('search')
-        if search_query:
-            queryset = queryset.filter(
-                Q(full_name__icontains=search_query) |
-                Q(student_number__icontains=search_query) |
-                Q(branch__icontains=search_query) |
-                Q(father_phone__icontains=search_query)
-            )
-        
-        return queryset
+        # البحث والتصفية؛ الترتيب الأبجدي والتقسيم إلى صفحات في keyset_page
+        return filter_students(Student.objects.select_related('added_by'), self.request.GET)
     
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+        from classroom.models import Classroom
+
+        page = keyset_page(
+            self.object_list,
+            after=decode_cursor(self.request.GET.get('after')),
+            before=decode_cursor(self.request.GET.get('before')),
+        )
+        context = super().get_context_data(object_list=page['object_list'], **kwargs)
         # إضافة قيمة البحث للقالب للحفاظ عليها في واجهة المستخدم
         context['search_query'] = self.request.GET.get('search', '')
+        context.update({
+            'page': page,
+            'total_count': cached_count(self.object_list, self.request.GET),
+            'filters': {name: self.request.GET.get(name, '') for name in FILTER_PARAMS},
+            'filter_query': urlencode({name: self.request.GET[name] for name in FILTER_PARAMS if self.request.GET.get(name)}),
+            'branch_choices': Student.Academic_Track.choices,
+            'gender_choices': Student.Gender.choices,
+            'classrooms': Classroom.objects.order_by('name').only('id', 'name'),
+        })
         return context
     
     
@@ -228,45 +245,8 @@ class student_groups(TemplateView):
     
     
 def student_profile(request, student_id):
-    student = get_object_or_404(Student, id=student_id)
-    from classroom.models import Classroomenrollment
-    enrollments = Classroomenrollment.objects.filter(student=student).select_related('classroom')
-    
-    # Get available courses for registration
-    from accounts.models import Course, CostCenter
-    from django.db.models import Sum
-    
-    all_courses = Course.objects.filter(is_active=True).order_by('name')
-    
-    cost_centers = CostCenter.objects.filter(is_active=True).order_by('code')
-
-    # Get current enrollments
-    from accounts.models import StudentEnrollment
-    course_enrollments = StudentEnrollment.objects.filter(
-        student=student, 
-        is_completed=False
-    ).select_related('course').order_by('course__name')
-    
-    # Get courses with remaining balance for receipts
-    available_courses = []
-    for enrollment in course_enrollments:
-        remaining = enrollment.balance_due
-        if remaining > Decimal('0.01'):
-            available_courses.append({
-                'course': enrollment.course,
-                'remaining': remaining,
-                'enrollment': enrollment
-            })
-
-    context = {
-        'student': student,
-        'enrollments': enrollments,
-        'available_courses': all_courses,  # All courses for registration
-        'courses': available_courses,  # Courses with remaining balance for receipts
-        'cost_centers': cost_centers,
-        'course_enrollments': course_enrollments,
-    }
-    return render(request, 'students/student_profile.html', context)
+    student = get_object_or_404(profile_queryset(), id=student_id)
+    return render(request, 'students/student_profile.html', profile_context(student))
     
 class grades(TemplateView):
     template_name = 'students/grades.html'
@@ -324,21 +304,11 @@ class stunum(TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        
-        # حساب عدد الطلاب الإجمالي
-        context['students_count'] = Student.objects.count()
-        
-        # حساب عدد الطلاب حسب الجنس
-        context['male_count'] = Student.objects.filter(gender='male').count()
-        context['female_count'] = Student.objects.filter(gender='female').count()
-        
-        # حساب عدد الطلاب حسب الفرع الدراسي
-        context['scientific_count'] = Student.objects.filter(branch='علمي').count()
-        context['literary_count'] = Student.objects.filter(branch='أدبي').count()
-        context['ninth_grade_count'] = Student.objects.filter(branch='تاسع').count()
-        
+        # عدد الطلاب الإجمالي وحسب الجنس والفرع، باستعلام واحد مخزن مؤقتاً
+        context.update(student_stats())
         return context
 
+@statement_condition
 def student_statement(request, student_id):
     student = get_object_or_404(Student, id=student_id)
     account = getattr(student, 'account', None)